@@ -3,6 +3,9 @@
 # Windows: pyinstaller --noconfirm --onedir --windowed --copy-metadata flask --copy-metadata werkzeug --add-data "static;static" --add-data "templates;templates" --add-binary "bin/yt-dlp.exe;bin" --add-binary "bin/ffmpeg.exe;bin" app.py
 # macOS: pyinstaller --noconfirm --onedir --windowed --copy-metadata flask --copy-metadata werkzeug --add-data "static:static" --add-data "templates:templates" --add-binary "bin/yt-dlp:bin" --add-binary "bin/ffmpeg:bin" app.py
 
+import io
+import math
+import multiprocessing
 import os
 import shutil
 import sys
@@ -11,10 +14,16 @@ import time
 import uuid
 import webbrowser
 import subprocess
-import requests
-from packaging import version
-from flask import Flask, request, render_template, send_file, jsonify, send_from_directory
+from functools import partial
+
+from modules.startup import StartupReport
+
+# 임포트 시간부터 측정하도록 다른 임포트보다 먼저 생성
+STARTUP = StartupReport()
+
+from flask import Flask, Response, request, render_template, send_file, jsonify, send_from_directory
 from flask_cors import CORS
+from werkzeug.wsgi import ClosingIterator, wrap_file
 
 # ---------------------------------------------------------
 # 1. 전역 설정 및 초기화
@@ -31,10 +40,22 @@ UPDATE_INFO = {
 }
 
 # --- 모듈 임포트 ---
-from modules.youtube_downloader import get_video_stream_url, get_single_frame_as_bytes, download_youtube_video, \
-    get_bin_path, get_startup_info
-from modules.image_processor import process_video_frames
-from modules.pdf_generator import create_pdf_from_images
+# OpenCV/NumPy/Pillow를 쓰는 모듈(image_processor, feature_store, page_index, pdf_generator)은
+# 처음 사용하는 함수 안에서 불러와 서버가 바로 뜨도록 함 (서버 시작 후 preload_modules가 미리 불러옴)
+from modules.youtube_downloader import get_preview_frame, get_video_stream_url, get_frames_as_sprite, \
+    download_youtube_video, extract_video_id, get_bin_path, get_startup_info, plan_download_section, \
+    section_offset, select_video_format, SPRITE_MAX_FRAMES, YTDLP_GATE, YTDLP_LOCK_FILE
+from modules.session_store import FEATURES_FILE, save_session_meta, load_session_meta, save_page_manifest, \
+    load_page_manifest, list_session_images, find_session_dir
+from modules.frame_store import FrameStore, FrameStoreWriter, frame_entry, has_frame_store, load_frame_index, \
+    open_frame
+from modules.cache import TTLCache
+from modules.job_manager import JobManager, JobQueueFullError
+from modules import metrics, prefork
+from modules.shared_state import STATE_DB_FILE, open_state
+from modules.video_store import VideoNotCachedError, VideoStore, dir_size
+
+STARTUP.mark('imports')
 
 
 def resource_path(relative_path):
@@ -55,8 +76,105 @@ if getattr(sys, 'frozen', False):
 else:
     EXE_LOCATION = os.path.dirname(os.path.abspath(__file__))
 TEMP_BASE_DIR = os.path.join(EXE_LOCATION, 'temp')
+# 시작 시 이전 실행의 임시 폴더를 이 접두어의 이름으로 바꿔 두고 백그라운드에서 삭제
+TEMP_TRASH_PREFIX = 'temp.trash-'
 if not os.path.exists(TEMP_BASE_DIR):
     os.makedirs(TEMP_BASE_DIR)
+# 서버 프로세스들이 공유하는 세션/작업/업데이트 상태 (SQLite WAL). 임시 폴더와 함께 시작 시 초기화됨
+SHARED_STATE = open_state(os.path.join(TEMP_BASE_DIR, STATE_DB_FILE))
+# yt-dlp 업데이트가 다른 서버 프로세스의 실행과도 겹치지 않도록 같은 폴더의 잠금 파일을 사용
+YTDLP_GATE.configure(os.path.join(TEMP_BASE_DIR, YTDLP_LOCK_FILE))
+
+# --- 다운로드 영상 캐시 설정 ---
+# temp 폴더는 시작 시 초기화되므로 별도 폴더에 보관
+VIDEO_CACHE_DIR = os.path.join(EXE_LOCATION, 'video_cache')
+VIDEO_CACHE_QUOTA_MB = int(os.environ.get('YSC_VIDEO_CACHE_MB', 2048))
+# 크롭된 악보 영역이 이 세로 픽셀 이상이 되는 가장 작은 스트림을 다운로드 (0이면 bestvideo)
+# 저장되는 페이지(PDF, 검수 이미지)도 같은 스트림에서 잘라내므로 켜면 결과물 해상도가 낮아짐 -> 기본은 끔
+MIN_ROI_HEIGHT = int(os.environ.get('YSC_MIN_ROI_HEIGHT', 0))
+# 시작/종료 시간이 지정되면 해당 구간만 받되, 앞뒤로 여유를 둠 (시작은 키프레임으로 당겨질 수 있음, section_offset 참고)
+SECTION_MARGIN_SEC = 5
+_VIDEO_STORE = None
+_VIDEO_STORE_LOCK = threading.Lock()
+
+
+def get_video_store():
+    """
+    영상 캐시 저장소를 처음 사용할 때 만듭니다.
+
+    병렬 분석 워커(spawn)는 app을 __mp_main__으로 다시 임포트하므로, 임포트 시점에 만들면
+    워커마다 캐시 폴더를 다시 읽고 정리하게 됩니다.
+    """
+    global _VIDEO_STORE
+    with _VIDEO_STORE_LOCK:
+        if _VIDEO_STORE is None:
+            _VIDEO_STORE = VideoStore(VIDEO_CACHE_DIR, VIDEO_CACHE_QUOTA_MB * 1024 * 1024)
+        return _VIDEO_STORE
+
+
+# --- 작업 큐 설정 ---
+# 동시에 실행할 추출 작업 수와 대기열 길이 (초과 시 503 응답)
+JOB_WORKERS = int(os.environ.get('YSC_JOB_WORKERS', 2))
+JOB_MAX_PENDING = int(os.environ.get('YSC_JOB_MAX_PENDING', 8))
+JOB_RETENTION_SEC = 3600  # 완료된 작업 결과 보관 시간
+# 등록 후 이 시간(초)이 지나도 끝나지 않은 작업은 취소 (0이면 제한 없음)
+JOB_DEADLINE_SEC = int(os.environ.get('YSC_JOB_DEADLINE_SEC', 1800))
+# 진행 중인 작업의 상태 조회가 이 시간(초) 동안 없으면 탭이 닫힌 것으로 보고 취소 (0이면 비활성화)
+# 백그라운드 탭의 타이머는 브라우저가 분 단위로 늦출 수 있으므로 넉넉하게 둠
+JOB_HEARTBEAT_SEC = int(os.environ.get('YSC_JOB_HEARTBEAT_SEC', 120))
+JOB_MANAGER = JobManager(max_workers=JOB_WORKERS, max_pending=JOB_MAX_PENDING,
+                         deadline_sec=JOB_DEADLINE_SEC or None, state=SHARED_STATE)
+
+# --- 서버 프로세스 설정 ---
+# 요청을 처리할 서버 프로세스 수. 2 이상이면 미리 띄운(pre-fork) 워커들이 같은 포트를 나눠 받아
+# 추출 작업이 코어 수만큼 병렬로 실행됨 (fork가 필요하므로 macOS/Linux 전용, Windows에서는 1로 동작)
+# 작업 대기열(JOB_WORKERS, JOB_MAX_PENDING)은 워커마다 따로 적용됨
+SERVER_WORKERS = int(os.environ.get('YSC_SERVER_WORKERS', 1))
+# 여러 서버 프로세스로 실행할 때 /metrics가 모든 프로세스의 값을 합산하도록
+# 각 프로세스의 카운터/히스토그램을 state.db에 기록하는 주기 (초)
+METRICS_PUBLISH_SEC = 5
+
+# --- 프레임 디코딩 백엔드 ---
+# 'opencv': cv2.VideoCapture 전체 프레임 디코딩 / 'ffmpeg': 샘플링·크롭을 ffmpeg 필터에서 처리
+DECODE_BACKEND = os.environ.get('YSC_DECODE_BACKEND', 'opencv')
+# 한 작업 안에서 구간 병렬 분석에 사용할 프로세스 수 (1이면 순차 처리)
+ANALYSIS_WORKERS = int(os.environ.get('YSC_ANALYSIS_WORKERS', 1))
+# 'fixed': 고정 간격 샘플링 / 'adaptive': 거친 간격으로 훑고 변화 구간만 이분 탐색
+SAMPLING_MODE = os.environ.get('YSC_SAMPLING', 'fixed')
+# 디코딩/분석/PNG 저장을 스레드로 나누어 겹쳐 실행
+PIPELINE_MODE = os.environ.get('YSC_PIPELINE', '1') == '1'
+# 변화 감지를 이 폭(px)으로 축소한 ROI에서 수행 (0이면 원본 해상도)
+ANALYSIS_WIDTH = int(os.environ.get('YSC_ANALYSIS_WIDTH', 0)) or None
+# 이전에 저장한 페이지와 지각 해시 거리(256비트 중 다른 비트 수)가 이 값 이하이면 중복으로 봄 (0이면 비활성화)
+# 바로 PDF를 만들 때는 중복 페이지를 건너뛰고, 검수 모드에서는 표시만 하여 사용자가 고르게 함
+DEDUPE_DISTANCE = int(os.environ.get('YSC_DEDUPE_DISTANCE', 24))
+# 바로 PDF를 만들 때 페이지 이미지 압축 방식 ('flate': 무손실 / 'jpeg': 더 작은 파일)
+PDF_IMAGE_FORMAT = os.environ.get('YSC_PDF_IMAGE_FORMAT', 'flate')
+# 세션 이미지는 같은 이름으로 내용이 바뀌지 않으므로 브라우저가 재검증 없이 캐시해도 됨 (초)
+IMAGE_CACHE_MAX_AGE = 365 * 24 * 3600
+# 검수 세션 페이지를 PDF에 넣을 형태로 읽어 둔 결과를 이 크기(MB)까지 메모리에 보관
+# 선택을 바꿔 다시 PDF를 만들 때는 페이지 배치만 새로 계산하고 이미지 객체는 재사용함
+PDF_PAGE_CACHE_MB = int(os.environ.get('YSC_PDF_PAGE_CACHE_MB', 256))
+PDF_PAGE_CACHE = TTLCache(maxsize=4096, ttl=JOB_RETENTION_SEC, weigher=lambda image: len(image.data),
+                          max_weight=PDF_PAGE_CACHE_MB * 1024 * 1024)
+
+# --- 시작 설정 ---
+# 서버가 요청을 받기 시작한 뒤 백그라운드에서 미리 불러올 무거운 모듈 (YSC_PRELOAD=0이면 처음 사용할 때 로드)
+PRELOAD_MODULES = ('numpy', 'cv2', 'PIL.Image', 'modules.image_processor', 'modules.feature_store',
+                   'modules.page_index', 'modules.pdf_generator')
+PRELOAD_ENABLED = os.environ.get('YSC_PRELOAD', '1') == '1'
+# 시작 직후의 첫 요청과 경쟁하지 않도록 yt-dlp 자체 업데이트를 이 시간(초)만큼 미룸
+# 이후에도 실행 중인 yt-dlp(다운로드, 스트림 조회)가 있으면 끝날 때까지 재시도 간격마다 다시 확인
+YTDLP_UPDATE_DELAY_SEC = int(os.environ.get('YSC_YTDLP_UPDATE_DELAY_SEC', 60))
+YTDLP_UPDATE_RETRY_SEC = 30
+
+# /metrics 수집 시점에 계산하는 디스크 사용량 (검수 세션 임시 폴더, 영상 캐시)
+metrics.register_gauge(
+    'ysc_disk_usage_bytes', 'Disk used by temporary sessions and the video cache.', ['area'],
+    lambda: {('temp',): dir_size(TEMP_BASE_DIR), ('video_cache',): get_video_store().total_size()}
+)
+# 시작 단계별 시각과 미리 불러온 모듈의 임포트 시간
+STARTUP.register_metrics()
 
 
 # ---------------------------------------------------------
@@ -72,7 +190,14 @@ def launch_browser():
 
 
 def update_yt_dlp_binary():
-    """yt-dlp 바이너리를 자동으로 업데이트합니다."""
+    """yt-dlp 바이너리를 자동으로 업데이트합니다. (다운로드와 겹치지 않도록 실행 중인 yt-dlp가 없을 때만)"""
+    time.sleep(YTDLP_UPDATE_DELAY_SEC)
+    # 추출 작업과 yt-dlp 실행은 (어느 서버 프로세스에서든) 잠금 파일에 공유 잠금을 잡으므로 모두 끝나야 시작됨
+    while not YTDLP_GATE.try_exclusive(_run_yt_dlp_update):
+        time.sleep(YTDLP_UPDATE_RETRY_SEC)
+
+
+def _run_yt_dlp_update():
     ytdlp_path = get_bin_path('yt-dlp')
     startup_info = get_startup_info()
     try:
@@ -88,7 +213,9 @@ def update_yt_dlp_binary():
 
 def check_for_updates():
     """GitHub에서 최신 릴리스를 확인하고 업데이트 정보를 설정합니다."""
-    global UPDATE_INFO
+    import requests
+    from packaging import version
+
     api_url = f"https://api.github.com/repos/{GITHUB_REPO_OWNER}/{GITHUB_REPO_NAME}/releases/latest"
     try:
         response = requests.get(api_url, timeout=5)
@@ -103,43 +230,106 @@ def check_for_updates():
                 UPDATE_INFO["needs_update"] = True
                 UPDATE_INFO["latest_version"] = latest_version_str
                 UPDATE_INFO["download_url"] = latest_release.get("html_url")
+                SHARED_STATE.set_setting('update_info', UPDATE_INFO)  # 다른 서버 프로세스도 볼 수 있도록
     except (requests.RequestException, version.InvalidVersion):
         pass  # 네트워크 오류 또는 버전 파싱 실패 시 조용히 실패
 
 
 def cleanup_worker():
-    """만료된 임시 세션 폴더를 주기적으로 삭제합니다."""
-    # Local environment: limit removed
-    # 로컬 실행 환경에서는 세션 타임아웃이 불필요하므로 관련 로직을 비활성화합니다.
-    # 주기적인 폴더 검사는 유지하되, 시간 기반 삭제 로직은 제거됩니다.
+    """
+    완료된 작업 기록과 받아 가지 않은 PDF 결과를 주기적으로 정리하고 영상 캐시를 용량 한도 안으로 유지합니다.
+
+    로컬 실행 환경이므로 검수 세션 폴더는 시간 제한 없이 두며, 다음 시작 시 retire_temp_dir가 정리합니다.
+    """
+    while True:
+        try:
+            JOB_MANAGER.prune(JOB_RETENTION_SEC)
+            get_video_store().evict()
+            _remove_expired_results()
+        except Exception:
+            pass
+        time.sleep(3600)
+
+
+def _remove_expired_results():
+    """파일로 남긴 PDF 결과 중 받아 가지 않은 채 보관 시간이 지난 것을 삭제합니다."""
+    now = time.time()
+    for name in os.listdir(TEMP_BASE_DIR):
+        path = os.path.join(TEMP_BASE_DIR, name)
+        if name.endswith('.pdf') and now - os.path.getmtime(path) > JOB_RETENTION_SEC:
+            os.unlink(path)
+
+
+def job_watchdog():
+    """클라이언트가 더 이상 상태를 조회하지 않는 작업을 취소하여 CPU와 대역폭을 돌려받습니다."""
     while True:
         try:
-            if os.path.exists(TEMP_BASE_DIR):
-                # 기존 로직:
-                # now = time.time()
-                # for folder_name in os.listdir(TEMP_BASE_DIR):
-                #     folder_path = os.path.join(TEMP_BASE_DIR, folder_name)
-                #     if os.path.isdir(folder_path):
-                #         if (now - os.path.getmtime(folder_path)) > 180:
-                #             shutil.rmtree(folder_path)
-                pass  # 아무 작업도 하지 않음
+            # 다른 서버 프로세스가 받은 상태 조회/취소 요청을 반영
+            JOB_MANAGER.sync_shared()
+            if JOB_HEARTBEAT_SEC:
+                JOB_MANAGER.cancel_abandoned(JOB_HEARTBEAT_SEC)
         except Exception:
             pass
-        time.sleep(3600)  # 검사 주기를 1시간으로 늘림
+        time.sleep(1)
 
 
-def cleanup_temp_dir_startup():
-    """시작 시 임시 폴더를 초기화합니다."""
-    if os.path.exists(TEMP_BASE_DIR):
+_METRICS_PROCESS_KEYS = {}
+
+
+def metrics_process_key() -> str:
+    """ state.db에서 이 프로세스의 지표 행 이름 (pid가 재사용되어도 종료된 프로세스의 값을 덮어쓰지 않도록 임의 문자열을 붙임) """
+    pid = os.getpid()
+    if pid not in _METRICS_PROCESS_KEYS:
+        _METRICS_PROCESS_KEYS[pid] = f"{pid}-{uuid.uuid4().hex[:8]}"
+    return _METRICS_PROCESS_KEYS[pid]
+
+
+def metrics_publisher():
+    """이 프로세스의 카운터/히스토그램을 주기적으로 state.db에 기록합니다. (다른 프로세스가 받은 /metrics 요청에서 합산)"""
+    while True:
+        try:
+            SHARED_STATE.save_metrics(metrics_process_key(), metrics.REGISTRY.snapshot())
+        except Exception:
+            pass
+        time.sleep(METRICS_PUBLISH_SEC)
+
+
+def retire_temp_dir():
+    """
+    시작 시 임시 폴더를 초기화합니다.
+
+    삭제를 기다리지 않도록 이전 실행의 폴더는 이름만 바꿔 두고(tombstone) 빈 폴더를 새로 만듭니다.
+    실제 삭제는 purge_retired_temp_dirs가 백그라운드에서 수행합니다.
+    """
+    if not os.listdir(TEMP_BASE_DIR):
+        return
+    tombstone = os.path.join(EXE_LOCATION, f"{TEMP_TRASH_PREFIX}{int(time.time())}-{os.getpid()}")
+    try:
+        os.rename(TEMP_BASE_DIR, tombstone)
+    except OSError:
+        # 폴더 안의 파일을 다른 프로그램이 열고 있으면 (Windows) 폴더째 옮길 수 없으므로 항목별로 옮김
+        os.makedirs(tombstone, exist_ok=True)
         for item in os.listdir(TEMP_BASE_DIR):
-            item_path = os.path.join(TEMP_BASE_DIR, item)
             try:
-                if os.path.isdir(item_path):
-                    shutil.rmtree(item_path)
-                else:
-                    os.unlink(item_path)
-            except Exception:
+                os.rename(os.path.join(TEMP_BASE_DIR, item), os.path.join(tombstone, item))
+            except OSError:
                 pass
+    os.makedirs(TEMP_BASE_DIR, exist_ok=True)
+
+
+def purge_retired_temp_dirs():
+    """이름을 바꿔 둔 이전 임시 폴더를 삭제합니다. (중단된 이전 실행이 남긴 것 포함)"""
+    for name in os.listdir(EXE_LOCATION):
+        if name.startswith(TEMP_TRASH_PREFIX):
+            shutil.rmtree(os.path.join(EXE_LOCATION, name), ignore_errors=True)
+    STARTUP.mark('temp_purged')
+
+
+def preload_modules():
+    """서버가 요청을 받기 시작한 뒤 무거운 모듈을 미리 불러오고 시작 시간 보고를 출력합니다."""
+    if PRELOAD_ENABLED:
+        STARTUP.preload(PRELOAD_MODULES)
+    print(f"⏱️ Startup: {STARTUP.summary()}")
 
 
 def time_to_seconds(time_str):
@@ -166,21 +356,63 @@ def index():
 @app.route('/check_update')
 def check_update_route():
     """업데이트 상태를 JSON으로 반환합니다."""
-    return jsonify(UPDATE_INFO)
+    return jsonify(SHARED_STATE.get_setting('update_info', UPDATE_INFO))
 
 
 @app.route('/inspect/<session_id>')
 def inspect_page(session_id):
-    session_dir = os.path.join(TEMP_BASE_DIR, session_id, 'images')
-    if not os.path.exists(session_dir):
+    session_dir = find_session_dir(TEMP_BASE_DIR, session_id)
+    if session_dir is None:
         return "Session expired or not found.", 404
-    images = sorted([f for f in os.listdir(session_dir) if f.endswith('.png')])
-    return render_template('inspect.html', session_id=session_id, images=images)
+    images = list_session_images(session_dir)
+    meta = load_session_meta(session_dir) or {}
+    can_reselect = os.path.exists(os.path.join(session_dir, FEATURES_FILE))
+    # 썸네일 크기를 미리 알려 주어 이미지가 도착하기 전에도 레이아웃이 고정되도록 함
+    thumbs = {name: record['thumb'] for name, record in load_frame_index(session_dir).items()}
+    return render_template('inspect.html', session_id=session_id, images=images,
+                           threshold=meta.get('threshold'), can_reselect=can_reselect,
+                           duplicates=_visible_duplicates(meta, images), thumbs=thumbs)
+
+
+def _visible_duplicates(meta, images):
+    """ 현재 목록에 원본 페이지도 함께 있는 중복 페이지만 반환합니다. """
+    shown = set(images)
+    return {f: src for f, src in meta.get('duplicates', {}).items() if f in shown and src in shown}
 
 
 @app.route('/temp_images/<session_id>/<filename>')
 def serve_temp_image(session_id, filename):
-    return send_from_directory(os.path.join(TEMP_BASE_DIR, session_id, 'images'), filename)
+    return _serve_session_image(session_id, filename, thumbnail=False)
+
+
+@app.route('/temp_thumbs/<session_id>/<filename>')
+def serve_temp_thumbnail(session_id, filename):
+    return _serve_session_image(session_id, filename, thumbnail=True)
+
+
+def _serve_session_image(session_id, filename, thumbnail):
+    """ 세션 이미지(원본 또는 썸네일)를 ETag/Range를 지원하는 영구 캐시 응답으로 반환합니다. """
+    session_dir = find_session_dir(TEMP_BASE_DIR, session_id)
+    if session_dir is None:
+        return "Session expired or not found.", 404
+    record = load_frame_index(session_dir).get(filename)
+    if record is None:
+        # 프레임 저장소가 없는 이전 형식 세션: 썸네일이 없으므로 원본 사용
+        response = send_from_directory(os.path.join(session_dir, 'images'), filename,
+                                       max_age=IMAGE_CACHE_MAX_AGE)
+    else:
+        # 프레임 저장소 파일에서 해당 구간만 읽어 전송 (wsgi.file_wrapper를 지원하는 서버는 sendfile 사용)
+        entry = frame_entry(record, thumbnail)
+        response = Response(wrap_file(request.environ, open_frame(session_dir, entry)), mimetype=entry['mimetype'],
+                            direct_passthrough=True)
+        response.content_length = entry['length']
+        # 저장소는 추가만 되므로 (세션, 위치, 길이)가 같으면 내용도 같음 -> 강한 ETag
+        response.set_etag(f"{session_id}-{entry['offset']}-{entry['length']}")
+        response.make_conditional(request, accept_ranges=True, complete_length=entry['length'])
+    response.cache_control.private = True
+    response.cache_control.max_age = IMAGE_CACHE_MAX_AGE
+    response.cache_control.immutable = True
+    return response
 
 
 @app.route('/get_frame', methods=['POST'])
@@ -188,22 +420,270 @@ def get_frame():
     url = request.form.get('url')
     time_str = request.form.get('start_time')
     seconds = time_to_seconds(time_str) or 0
+    try:
+        # 스트림 URL과 미리보기 JPEG는 캐시되므로 같은 지점을 다시 요청하면 즉시 반환됨
+        image_bytes = get_preview_frame(url, seconds)
+        if image_bytes: return send_file(io.BytesIO(image_bytes), mimetype='image/jpeg')
+        return jsonify({'error': 'Frame capture failed.'}), 500
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@YTDLP_GATE.holding
+def run_extraction_job(job, session_id, temp_dir, youtube_url, start_time, end_time, config,
+                       inspection_mode, streaming=False):
+    """ 다운로드 -> 프레임 분석 -> PDF 생성을 수행하는 백그라운드 작업 """
+    from modules.feature_store import FeatureWriter
+    from modules.image_processor import process_video_frames, process_video_stream
+    from modules.page_index import PageIndex
+    from modules.pdf_generator import PAGE_SPOOL_FILE, PageSpool, encode_page_image, stream_pdf
+
+    frame_store = page_spool = None
+    try:
+        image_output_dir = os.path.join(temp_dir, 'images')
+        os.makedirs(image_output_dir)
+        analyze_progress = lambda done, total, saved: job.update(
+            'analyze', frames_analysed=done, frames_total=total, pages_saved=saved)
+
+        format_spec = select_video_format(config['y_start'], config['y_end'], MIN_ROI_HEIGHT)
+        section = None if streaming else plan_download_section(start_time, end_time, SECTION_MARGIN_SEC)
+        store_format = f"{format_spec}|{section}" if section else format_spec
+
+        # 검수 모드에서는 threshold 재조정을 위해 샘플별 특징을 기록하고, 페이지는 프레임 저장소 한 파일에 모음
+        feature_writer = FeatureWriter(os.path.join(temp_dir, FEATURES_FILE)) if inspection_mode else None
+        frame_store = FrameStoreWriter(temp_dir) if inspection_mode else None
+        page_index = PageIndex(DEDUPE_DISTANCE, 'flag' if inspection_mode else 'skip') if DEDUPE_DISTANCE else None
+        # 바로 PDF를 만들 때는 PNG 파일을 거치지 않고 PDF에 넣을 압축 데이터를 임시 파일에 모음 (메모리에는 위치만)
+        page_spool = None if inspection_mode else PageSpool(os.path.join(temp_dir, PAGE_SPOOL_FILE))
+        page_encoder = None if inspection_mode else (
+            lambda image: page_spool.append(encode_page_image(image, PDF_IMAGE_FORMAT)))
+
+        if streaming:
+            # 다운로드와 분석을 동시에 진행
+            job.update('analyze', frames_analysed=0, frames_total=None, pages_saved=0)
+            processed_image_paths = process_video_stream(
+                youtube_url, image_output_dir, start_time, end_time, **config,
+                progress_callback=analyze_progress, format_spec=format_spec,
+                feature_writer=feature_writer, pipeline=PIPELINE_MODE, analysis_width=ANALYSIS_WIDTH,
+                page_index=page_index, page_encoder=page_encoder, frame_store=frame_store,
+                cancel_token=job.cancel_token
+            )
+        else:
+            job.update('download', downloaded_bytes=0, total_bytes=None)
+            download_fn = lambda download_dir: download_youtube_video(
+                youtube_url, download_dir,
+                progress_callback=lambda done, total: job.update('download', downloaded_bytes=done, total_bytes=total),
+                format_spec=format_spec, section=section, cancel_token=job.cancel_token
+            )
+
+            # 같은 영상은 세션 간에 공유되며, 동시에 요청되면 한 번만 다운로드됨
+            with get_video_store().acquire(extract_video_id(youtube_url), store_format, download_fn) as video_path:
+                # 구간만 받은 경우 분석 시간은 클립 0초(clip_start 앞의 키프레임일 수 있음) 기준의 상대 시간
+                clip_offset = section_offset(video_path, section) if section else 0
+                clip_start_time = start_time - clip_offset if start_time else None
+                clip_end_time = end_time - clip_offset if end_time else None
+                job.update('analyze', frames_analysed=0, frames_total=None, pages_saved=0)
+                processed_image_paths = process_video_frames(
+                    video_path, image_output_dir, clip_start_time, clip_end_time, **config,
+                    progress_callback=analyze_progress, backend=DECODE_BACKEND,
+                    workers=ANALYSIS_WORKERS, feature_writer=feature_writer,
+                    sampling=SAMPLING_MODE, pipeline=PIPELINE_MODE, analysis_width=ANALYSIS_WIDTH,
+                    page_index=page_index, page_encoder=page_encoder, frame_store=frame_store,
+                    cancel_token=job.cancel_token
+                )
+
+        if not processed_image_paths:
+            raise ValueError("No images extracted.")
+
+        if inspection_mode:
+            feature_writer.close()
+            save_session_meta(temp_dir, {
+                'url': youtube_url,
+                'video_id': extract_video_id(youtube_url),
+                'format_spec': format_spec,
+                'section': section,
+                'store_format': store_format,
+                'streaming': streaming,
+                'crop': {k: config[k] for k in ('x_start', 'x_end', 'y_start', 'y_end')},
+                'threshold': config['threshold'],
+                # {중복 페이지 파일명: 원본 페이지 파일명}
+                'duplicates': page_index.duplicates if page_index else {},
+            })
+            _save_initial_manifest(temp_dir, processed_image_paths)
+            return {'inspection_needed': True, 'session_id': session_id}
+
+        # 임시 파일의 페이지를 한 장씩 읽어 PDF 파일로 조립 (결과 요청은 어느 서버 프로세스든 받을 수 있음)
+        pdf_path = os.path.join(TEMP_BASE_DIR, f"{job.id}.pdf")
+        job.update('pdf', pages_done=0, pages_total=len(processed_image_paths))
+        with open(f"{pdf_path}.tmp", 'wb') as f:
+            for chunk in stream_pdf(
+                    page_spool.images(processed_image_paths), len(processed_image_paths),
+                    progress_callback=lambda done, total: job.update('pdf', pages_done=done, pages_total=total)):
+                f.write(chunk)
+        os.replace(f"{pdf_path}.tmp", pdf_path)
+        return {'pdf_file': pdf_path}
+
+    except Exception:
+        # Windows에서 열린 파일은 삭제할 수 없음
+        if frame_store: frame_store.close()
+        if page_spool: page_spool.close()
+        if os.path.exists(temp_dir): shutil.rmtree(temp_dir)
+        raise
+    finally:
+        if frame_store: frame_store.close()
+        if page_spool: page_spool.close()
+        if not inspection_mode and os.path.exists(temp_dir):
+            shutil.rmtree(temp_dir)
+
+
+def _save_initial_manifest(session_dir, processed_image_paths):
+    """ 추출 직후의 이미지 목록을 특징 파일의 저장 샘플 번호와 연결하여 기록합니다. """
+    from modules.feature_store import FeatureSet
+
+    files = [os.path.basename(p) for p in processed_image_paths]
+    features_path = os.path.join(session_dir, FEATURES_FILE)
+    samples = FeatureSet(features_path).saved_samples() if os.path.exists(features_path) else []
+    if len(samples) != len(files):
+        samples = [None] * len(files)
+    pages = [{'file': f, 'sample': s} for f, s in zip(files, samples)]
+    save_page_manifest(session_dir, pages, {str(s): f for f, s in zip(files, samples) if s is not None})
+
+
+@app.route('/reselect', methods=['POST'])
+def reselect():
+    """
+    저장된 샘플 특징으로 새 threshold에 대한 페이지를 다시 선택합니다.
+
+    영상을 다시 분석하지 않으며, 이전에 만들어지지 않은 페이지만 캐시된 영상에서 잘라옵니다.
+    스트리밍으로 분석한 세션은 영상을 저장하지 않으므로, 새 페이지가 필요한데 캐시된 영상이 없으면
+    요청 안에서 전체 영상을 받는 대신 409를 반환합니다.
+    """
+    from modules.feature_store import FeatureSet
+    from modules.image_processor import extract_frames_at
+
+    data = request.get_json(silent=True)
+    data = data if isinstance(data, dict) else {}
+    session_id = data.get('session_id')
+    try:
+        threshold = float(data['threshold'])
+        if not math.isfinite(threshold) or threshold < 0:
+            raise ValueError
+    except (KeyError, TypeError, ValueError):
+        return jsonify({'error': 'threshold must be a non-negative number.'}), 400
+
+    try:
+        session_dir = find_session_dir(TEMP_BASE_DIR, session_id)
+        if session_dir is None:
+            return jsonify({'error': 'Session expired or not found.'}), 404
+        features_path = os.path.join(session_dir, FEATURES_FILE)
+        meta = load_session_meta(session_dir)
+        if meta is None or not os.path.exists(features_path):
+            return jsonify({'error': 'Session expired or not found.'}), 404
+
+        features = FeatureSet(features_path)
+        samples = features.select_pages(threshold)
+        files = load_page_manifest(session_dir)['files']
+
+        missing = [s for s in samples if str(s) not in files]
+        if missing:
+            new_files = {s: f'frame_s{s:06d}.png' for s in missing}
+            download_fn = None if meta.get('streaming') else lambda download_dir: download_youtube_video(
+                meta['url'], download_dir, format_spec=meta['format_spec'],
+                section=tuple(meta['section']) if meta['section'] else None
+            )
+            with get_video_store().acquire(meta['video_id'], meta['store_format'], download_fn) as video_path, \
+                    FrameStoreWriter(session_dir) as frame_store:
+                written = extract_frames_at(
+                    video_path,
+                    [features.sample_time(s) for s in missing],
+                    [os.path.join(session_dir, 'images', new_files[s]) for s in missing],
+                    **meta['crop'], frame_store=frame_store
+                )
+            written = {os.path.basename(p) for p in written}
+            files.update({str(s): f for s, f in new_files.items() if f in written})
+
+        pages = [{'file': files[str(s)], 'sample': s} for s in samples if str(s) in files]
+        save_page_manifest(session_dir, pages, files)
+        meta['threshold'] = threshold
+        save_session_meta(session_dir, meta)
+        images = [page['file'] for page in pages]
+        return jsonify({'images': images, 'threshold': threshold,
+                        'duplicates': _visible_duplicates(meta, images)})
+    except VideoNotCachedError:
+        return jsonify({'error': 'This session was streamed and its video is not cached. '
+                                 'Run the extraction again to select new pages at this threshold.'}), 409
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/get_frames', methods=['POST'])
+def get_frames():
+    """
+    여러 시점의 미리보기를 타일 JPEG 한 장으로 반환합니다.
+
+    - timestamps: 쉼표로 구분한 시간 목록 (예: "0:10,0:20,1:05")
+    - 또는 start_time, end_time, step(초)로 구간 지정
+    레이아웃은 X-Sprite-* 응답 헤더로 전달됩니다.
+    """
+    url = request.form.get('url')
+    try:
+        timestamps = _sprite_timestamps(request.form)
+        tile_width = int(request.form.get('tile_width') or 320)
+        columns = int(request.form.get('columns') or 5)
+        if tile_width <= 0 or columns <= 0:
+            raise ValueError("tile_width and columns must be positive.")
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if not url:
+        return jsonify({'error': 'url is required.'}), 400
+    if not timestamps:
+        return jsonify({'error': 'No timestamps given.'}), 400
+    tile_width = min(tile_width, 640)
+
     try:
         stream_url = get_video_stream_url(url)
         if not stream_url: return jsonify({'error': 'URL not found.'}), 400
-        image_bytes = get_single_frame_as_bytes(stream_url, seconds)
-        if image_bytes: return send_file(image_bytes, mimetype='image/jpeg')
-        return jsonify({'error': 'Frame capture failed.'}), 500
+        sprite, layout = get_frames_as_sprite(stream_url, timestamps, tile_width, columns)
+        if not sprite: return jsonify({'error': 'Frame capture failed.'}), 500
+
+        response = send_file(io.BytesIO(sprite), mimetype='image/jpeg')
+        response.headers['X-Sprite-Columns'] = str(layout['columns'])
+        response.headers['X-Sprite-Tile-Width'] = str(layout['tile_width'])
+        response.headers['X-Sprite-Tile-Height'] = str(layout['tile_height'])
+        response.headers['X-Sprite-Timestamps'] = ','.join(f"{t:g}" for t in layout['timestamps'])
+        response.headers['X-Sprite-Missing'] = ','.join(f"{t:g}" for t in layout['missing'])
+        return response
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+def _sprite_timestamps(form):
+    """ timestamps 목록 또는 start_time/end_time/step 구간을 초 목록으로 바꿉니다. 잘못된 값은 ValueError """
+    def parse_time(name, value):
+        seconds = time_to_seconds(value)
+        if seconds is None or seconds < 0:
+            raise ValueError(f"Invalid {name}: {value}")
+        return seconds
+
+    if form.get('timestamps'):
+        return [parse_time('timestamp', t.strip()) for t in form['timestamps'].split(',') if t.strip()]
+
+    start = parse_time('start_time', form['start_time']) if form.get('start_time') else 0
+    if not form.get('end_time'):
+        raise ValueError("end_time and a positive step are required.")
+    end = parse_time('end_time', form['end_time'])
+    step = float(form.get('step') or 10)
+    if not math.isfinite(step) or step <= 0:
+        raise ValueError("end_time and a positive step are required.")
+    count = min(int((end - start) / step) + 1, SPRITE_MAX_FRAMES)
+    return [start + i * step for i in range(max(count, 0))]
+
+
 @app.route('/execute', methods=['POST'])
 def execute():
-    session_id = str(uuid.uuid4())
-    temp_dir = os.path.join(TEMP_BASE_DIR, session_id)
-    os.makedirs(temp_dir)
+    """ 추출 작업을 대기열에 등록하고 즉시 job_id를 반환합니다. """
     inspection_mode = request.form.get('inspection_mode') == 'true'
+    streaming = request.form.get('streaming') == 'true'
 
     try:
         youtube_url = request.form.get('url')
@@ -218,57 +698,172 @@ def execute():
             'threshold': float(request.form.get('threshold') or 5.0),
             'frame_interval_sec': float(request.form.get('frame_interval_sec') or 1.0)
         }
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
-        video_path = download_youtube_video(youtube_url, temp_dir)
-        image_output_dir = os.path.join(temp_dir, 'images')
-        os.makedirs(image_output_dir)
-        processed_image_paths = process_video_frames(video_path, image_output_dir, start_time, end_time, **config)
+    session_id = str(uuid.uuid4())
+    temp_dir = os.path.join(TEMP_BASE_DIR, session_id)
+    os.makedirs(temp_dir)
 
-        if not processed_image_paths:
-            raise ValueError("No images extracted.")
+    try:
+        job = JOB_MANAGER.submit(run_extraction_job, session_id, temp_dir, youtube_url,
+                                 start_time, end_time, config, inspection_mode, streaming)
+    except JobQueueFullError as e:
+        shutil.rmtree(temp_dir)
+        return jsonify({'error': str(e)}), 503
+
+    return jsonify({'job_id': job.id}), 202
+
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """ 작업 상태와 단계별 진행률을 반환합니다. (?timings=1이면 단계별 소요 시간 포함) """
+    job = JOB_MANAGER.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found.'}), 404
+    job.touch()  # 클라이언트가 아직 기다리는 중 (job_watchdog 참고)
+    return jsonify(job.to_dict(timings=request.args.get('timings') == '1'))
+
+
+@app.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """ 진행 중인 작업을 취소합니다. (탭을 닫거나 새로 실행할 때 navigator.sendBeacon으로도 호출) """
+    job = JOB_MANAGER.cancel(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found.'}), 404
+    return jsonify(job.to_dict()), 202
+
+
+@app.route('/jobs/<job_id>/result')
+def job_result(job_id):
+    """ 완료된 작업의 PDF 또는 검수 세션 정보를 반환합니다. """
+    job = JOB_MANAGER.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found.'}), 404
+    if job.status == 'error':
+        return jsonify({'error': job.error}), 500
+    if job.status == 'cancelled':
+        return jsonify({'error': job.error, 'status': job.status}), 410
+    if job.status != 'done':
+        return jsonify({'error': 'Job not finished.', 'status': job.status}), 409
+
+    if 'pdf_file' in job.result:
+        pdf_path = job.result['pdf_file']
+        if not os.path.exists(pdf_path):
+            return jsonify({'error': 'Result expired.'}), 410
+        response = send_file(pdf_path, mimetype='application/pdf', as_attachment=True, download_name='score.pdf')
+        if request.method == 'GET':
+            # 결과는 한 번 받으면 다시 쓰지 않으므로 전송이 끝나면(파일을 닫은 뒤) 바로 삭제
+            # send_file의 응답은 그대로 전달(direct_passthrough)되어 call_on_close가 호출되지 않으므로 본문을 감쌈
+            response.response = ClosingIterator(response.response, [partial(_discard_result_file, pdf_path)])
+        return response
+    return jsonify(job.result)
+
+
+def _discard_result_file(path):
+    try:
+        os.unlink(path)
+    except OSError:
+        pass  # 다른 요청이 아직 전송 중이면 (Windows) 보관 시간이 지난 뒤 cleanup_worker가 삭제
 
-        if inspection_mode:
-            return jsonify({'inspection_needed': True, 'session_id': session_id})
-        else:
-            pdf_io = create_pdf_from_images(processed_image_paths)
-            return send_file(pdf_io, as_attachment=True, download_name='score.pdf', mimetype='application/pdf')
 
-    except Exception as e:
-        if os.path.exists(temp_dir): shutil.rmtree(temp_dir)
-        return jsonify({'error': str(e)}), 500
-    finally:
-        if not inspection_mode and os.path.exists(temp_dir):
-            shutil.rmtree(temp_dir)
+def _pdf_response(chunks, download_name):
+    """ PDF 조각을 만들어지는 대로 전송합니다. (전체 PDF를 메모리에 만들지 않음) """
+    return Response(chunks, mimetype='application/pdf',
+                    headers={'Content-Disposition': f'attachment; filename="{download_name}"'})
 
 
 @app.route('/finalize', methods=['POST'])
 def finalize():
+    from modules.pdf_generator import iter_page_images, stream_pdf
+
     try:
         data = request.json
         session_id = data.get('session_id')
         selected_files = data.get('selected_images')
-        session_dir = os.path.join(TEMP_BASE_DIR, session_id)
-        image_paths = [os.path.join(session_dir, 'images', f) for f in selected_files]
-        pdf_io = create_pdf_from_images(image_paths)
-        return send_file(pdf_io, as_attachment=True, download_name='final_score.pdf', mimetype='application/pdf')
+        session_dir = find_session_dir(TEMP_BASE_DIR, session_id)
+        if session_dir is None:
+            return jsonify({'error': 'Session expired or not found.'}), 404
+        if not selected_files:
+            return jsonify({'error': 'No images selected.'}), 400
+        # 저장된 PNG의 압축 데이터를 디코딩 없이 PDF에 옮겨 담으며 페이지 단위로 전송
+        if has_frame_store(session_dir):
+            pages = _iter_stored_pages(session_dir, selected_files)
+        else:
+            pages = iter_page_images([os.path.join(session_dir, 'images', f) for f in selected_files])
+        return _pdf_response(stream_pdf(pages, len(selected_files)), 'final_score.pdf')
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+def _iter_stored_pages(session_dir, names):
+    """ 프레임 저장소의 페이지를 메모리 맵에서 바로 읽어 PDF 이미지로 넘깁니다. (이전에 읽은 페이지는 캐시 사용) """
+    from modules.pdf_generator import page_image_from_bytes
+
+    with FrameStore(session_dir) as store:
+        for name in names:
+            record = store.index.get(name)
+            if record is None:
+                continue
+            # 저장소는 추가만 되므로 (세션, 위치, 길이)가 같으면 내용도 같음 (재선택으로 추가된 페이지는 새 키)
+            key = (session_dir, record['offset'], record['length'])
+            image = PDF_PAGE_CACHE.get(key)
+            metrics.CACHE_LOOKUPS.inc(cache='pdf_page', result='miss' if image is None else 'hit')
+            if image is None:
+                image = page_image_from_bytes(store.view(name))
+                PDF_PAGE_CACHE.set(key, image)
+            yield image
+
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """
+    단계별 소요 시간, 프레임 수, 다운로드 양, 디스크 사용량 (Prometheus 텍스트 형식)
+
+    여러 서버 프로세스로 실행 중이면 다른 프로세스가 state.db에 기록한 카운터/히스토그램을 더해 서버 전체 값을 반환합니다.
+    """
+    others = SHARED_STATE.load_metrics(exclude=metrics_process_key()) if SERVER_WORKERS > 1 else ()
+    return Response(metrics.REGISTRY.render(others), content_type=metrics.CONTENT_TYPE)
+
+
 # ---------------------------------------------------------
 # 4. 메인 실행
 # ---------------------------------------------------------
 
 if __name__ == '__main__':
-    cleanup_temp_dir_startup()
-
-    # 백그라운드 스레드 시작
-    threading.Thread(target=cleanup_worker, daemon=True).start()
-    threading.Thread(target=update_yt_dlp_binary, daemon=True).start()
-    threading.Thread(target=check_for_updates, daemon=True).start()
-
-    # 브라우저 자동 실행 예약
-    threading.Timer(1.5, launch_browser).start()
-
-    # Flask 서버 실행
-    app.run(host='127.0.0.1', port=5000, debug=False)
\ No newline at end of file
+    # PyInstaller 빌드에서 병렬 분석 워커 프로세스가 앱을 다시 실행하지 않도록 함
+    multiprocessing.freeze_support()
+
+    retire_temp_dir()
+
+    # Flask 서버 실행 (소켓을 연 시점을 기록하고 워커 프로세스가 공유하도록 app.run 대신 직접 생성)
+    from werkzeug.serving import make_server
+    server = make_server('127.0.0.1', 5000, app, threaded=True)
+    print(f"🚀 Serving on http://127.0.0.1:5000 ({STARTUP.mark('listening'):.2f}s after start)")
+
+    def start_worker_tasks():
+        """ 요청을 처리하는 프로세스마다 실행하는 백그라운드 작업 """
+        if SERVER_WORKERS > 1:
+            # 부모에서 물려받은 값은 부모가 따로 기록하므로 비우고 시작
+            metrics.REGISTRY.reset()
+            threading.Thread(target=metrics_publisher, daemon=True).start()
+        threading.Thread(target=cleanup_worker, daemon=True).start()
+        threading.Thread(target=job_watchdog, daemon=True).start()
+        threading.Thread(target=preload_modules, daemon=True).start()
+
+    def start_server_tasks():
+        """ 서버 전체에서 한 번만 실행하는 백그라운드 작업 """
+        if SERVER_WORKERS > 1:
+            # 부모 프로세스의 값(yt-dlp 업데이트 시간 등)도 /metrics에 합산되도록
+            threading.Thread(target=metrics_publisher, daemon=True).start()
+        threading.Thread(target=purge_retired_temp_dirs, daemon=True).start()
+        threading.Thread(target=update_yt_dlp_binary, daemon=True).start()
+        threading.Thread(target=check_for_updates, daemon=True).start()
+        # 브라우저 자동 실행 예약
+        threading.Timer(1.5, launch_browser).start()
+
+    prefork.serve_forever(
+        server, SERVER_WORKERS, on_worker_start=start_worker_tasks, on_started=start_server_tasks,
+        # 비정상 종료된 워커가 실행하던 작업을 기다리는 클라이언트에게 알림
+        on_worker_exit=lambda pid: SHARED_STATE.fail_jobs_of(pid, "Server worker exited unexpectedly.")
+    )
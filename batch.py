@@ -0,0 +1,335 @@
+# batch.py
+"""
+여러 영상/재생목록을 브라우저 없이 한 번에 PDF로 변환합니다.
+
+사용 예 (저장소 루트에서):
+    python batch.py "https://www.youtube.com/playlist?list=..." -o scores
+    python batch.py -i urls.txt -o scores --download-jobs 3 --extract-jobs 2 --threshold 4
+
+- 다운로드(네트워크)와 추출(CPU)은 각각의 동시 실행 수로 따로 제한되며 서로 겹쳐 진행됩니다.
+- 영상은 웹 앱과 같은 영상 캐시(video_cache)를 공유하므로 이미 받은 영상은 다시 받지 않습니다.
+- 결과 폴더에는 영상마다 <영상 ID>.pdf와 진행 상태/소요 시간을 기록한 batch_manifest.json이 남습니다.
+  중단된 뒤 같은 명령을 다시 실행하면 완료된 영상은 건너뛰고 나머지만 처리합니다.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import signal
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Dict, List, Optional
+
+from modules import metrics
+from modules.cancellation import CancelToken, JobCancelledError
+from modules.image_processor import check_processing_options, process_video_frames
+from modules.page_index import PageIndex
+from modules.pdf_generator import PAGE_SPOOL_FILE, PageSpool, encode_page_image, stream_pdf
+from modules.video_store import VideoStore
+from modules.youtube_downloader import download_youtube_video, list_playlist_videos, select_video_format
+
+MANIFEST_FILE = 'batch_manifest.json'
+MANIFEST_VERSION = 1
+
+if getattr(sys, 'frozen', False):
+    EXE_LOCATION = os.path.dirname(sys.executable)
+else:
+    EXE_LOCATION = os.path.dirname(os.path.abspath(__file__))
+# 웹 앱(app.py)과 같은 영상 캐시 폴더
+DEFAULT_VIDEO_CACHE_DIR = os.path.join(EXE_LOCATION, 'video_cache')
+
+
+class BatchManifest:
+    """
+    영상별 상태(pending -> downloading -> downloaded -> extracting -> done | error)와 소요 시간을 기록하는 JSON 파일.
+
+    상태가 바뀔 때마다 임시 파일에 쓴 뒤 교체하므로, 중간에 강제 종료되어도 마지막으로 기록된 상태가 남습니다.
+    """
+
+    def __init__(self, path: str, config: Dict[str, Any]):
+        self.path = path
+        self._lock = threading.Lock()
+        self.data = {'version': MANIFEST_VERSION, 'config': config, 'videos': {}}
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                previous = json.load(f)
+            if previous.get('config') != config:
+                print("⚠️ Options differ from the previous run; finished videos are kept as they are.")
+            self.data['videos'] = previous.get('videos', {})
+
+    def add(self, video: Dict[str, Any]) -> Dict[str, Any]:
+        """ 영상을 등록하고 기록을 반환합니다. 이전 실행의 기록이 있으면 그대로 사용합니다. """
+        with self._lock:
+            record = self.data['videos'].setdefault(video['id'], {
+                'url': video['url'], 'title': video['title'], 'status': 'pending',
+                'pdf': None, 'pages': None, 'error': None, 'timings': {},
+            })
+            if video['title'] and not record.get('title'):
+                record['title'] = video['title']
+            return record
+
+    def update(self, video_id: str, **values):
+        with self._lock:
+            self.data['videos'][video_id].update(values)
+            self.save()
+
+    def save(self):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+class BatchRunner:
+    """
+    다운로드 풀과 추출 풀로 나누어 영상을 처리합니다.
+
+    다운로드가 끝난 영상은 곧바로 추출 풀에 넘어가며, 다운로드는 됐지만 아직 추출하지 않은 영상 수를
+    제한하여(lookahead) 다운로드만 앞서 나가 캐시 용량을 넘기는 일을 막습니다.
+
+    영상마다 CancelToken을 두어, 중단(Ctrl-C)되면 실행 중인 다운로드(yt-dlp)와 추출(ffmpeg, 분석 워커)을
+    즉시 종료합니다. 중단된 영상은 pending으로 되돌려 다음 실행에서 이어서 처리합니다.
+    """
+
+    def __init__(self, args, manifest: BatchManifest, video_store: VideoStore):
+        self.args = args
+        self.manifest = manifest
+        self.video_store = video_store
+        self.format_spec = select_video_format(args.y_start, args.y_end, args.min_roi_height)
+        self._ready = threading.BoundedSemaphore(args.download_jobs + args.extract_jobs)
+        self._download_pool = ThreadPoolExecutor(args.download_jobs, thread_name_prefix='batch-download')
+        self._extract_pool = ThreadPoolExecutor(args.extract_jobs, thread_name_prefix='batch-extract')
+        self._total = 0
+        self._finished = 0
+        self._failed = 0
+        self._tokens: List[CancelToken] = []
+        self._lock = threading.Lock()
+
+    def run(self, videos: List[Dict[str, Any]]) -> int:
+        """ 모든 영상을 처리하고 실패한 영상 수를 반환합니다. """
+        self._total = len(videos)
+        try:
+            for video in videos:
+                timings = metrics.JobTimings()
+                token = CancelToken()
+                self._tokens.append(token)
+                self._download_pool.submit(self._download, video, timings, time.time(), token)
+            # 다운로드 작업이 모두 추출 작업을 등록한 뒤에 추출 풀을 닫음
+            self._download_pool.shutdown(wait=True)
+            self._extract_pool.shutdown(wait=True)
+        except KeyboardInterrupt:
+            print("🛑 Interrupted. Stopping running downloads and extractions...")
+            # 외부 프로세스는 별도 세션에서 실행되어 터미널의 SIGINT를 받지 않으므로 토큰으로 프로세스 그룹째 종료
+            # (Ctrl-C를 한 번 더 눌러도 종료가 중간에 끊기지 않도록 그동안은 SIGINT를 무시)
+            previous_handler = signal.signal(signal.SIGINT, signal.SIG_IGN)
+            try:
+                for token in self._tokens:
+                    token.cancel("Interrupted.")
+            finally:
+                signal.signal(signal.SIGINT, previous_handler)
+            self._download_pool.shutdown(wait=True, cancel_futures=True)
+            self._extract_pool.shutdown(wait=True, cancel_futures=True)
+            print("🛑 Interrupted. Run the same command again to resume.")
+            raise
+        return self._failed
+
+    def _download_fn(self, url: str, token: CancelToken, download_dir: str) -> Optional[str]:
+        return download_youtube_video(url, download_dir, format_spec=self.format_spec, cancel_token=token)
+
+    def _download(self, video: Dict[str, Any], timings: metrics.JobTimings, queued_at: float, token: CancelToken):
+        video_id = video['id']
+        # 추출을 기다리는 영상 수 제한 (중단되면 더 기다리지 않음)
+        while not self._ready.acquire(timeout=0.5):
+            if token.cancelled:
+                return
+        try:
+            token.check()
+            started = time.time()
+            self.manifest.update(video_id, status='downloading', error=None)
+            print(f"⬇️ Downloading {video_id}...")
+            with metrics.job_context(timings), \
+                    self.video_store.acquire(video_id, self.format_spec,
+                                             partial(self._download_fn, video['url'], token)):
+                pass  # 캐시에 받아 두기만 함 (추출 시 다시 고정)
+            self.manifest.update(video_id, status='downloaded')
+        except JobCancelledError:
+            self._ready.release()
+            self.manifest.update(video_id, status='pending')
+            return
+        except Exception as e:
+            self._ready.release()
+            self._fail(video_id, e, timings, queued_at)
+            return
+        self._extract_pool.submit(self._extract, video, timings, queued_at, time.time() - started, token)
+
+    def _extract(self, video: Dict[str, Any], timings: metrics.JobTimings, queued_at: float, download_sec: float,
+                 token: CancelToken):
+        video_id = video['id']
+        work_dir = os.path.join(self.args.output_dir, '.work', video_id)
+        page_spool = None
+        try:
+            self.manifest.update(video_id, status='extracting')
+            shutil.rmtree(work_dir, ignore_errors=True)
+            os.makedirs(work_dir)
+            args = self.args
+            page_index = PageIndex(args.dedupe_distance, 'skip') if args.dedupe_distance else None
+            # 압축된 페이지는 메모리 대신 작업 폴더의 임시 파일에 모음
+            page_spool = PageSpool(os.path.join(work_dir, PAGE_SPOOL_FILE))
+
+            with metrics.job_context(timings), \
+                    self.video_store.acquire(video_id, self.format_spec,
+                                             partial(self._download_fn, video['url'], token)) as video_path:
+                started = time.time()
+                pages = process_video_frames(
+                    video_path, work_dir, None, None, args.x_start, args.x_end, args.y_start, args.y_end,
+                    args.threshold, args.interval, backend=args.backend, workers=args.analysis_workers,
+                    sampling=args.sampling, pipeline=True, analysis_width=args.analysis_width,
+                    page_index=page_index,
+                    page_encoder=lambda image: page_spool.append(encode_page_image(image, args.pdf_format)),
+                    cancel_token=token
+                )
+                extract_sec = time.time() - started
+            if not pages:
+                raise ValueError("No images extracted.")
+
+            started = time.time()
+            pdf_path = os.path.join(args.output_dir, f"{video_id}.pdf")
+            with metrics.job_context(timings), open(pdf_path + '.tmp', 'wb') as f:
+                for chunk in stream_pdf(page_spool.images(pages), len(pages)):
+                    f.write(chunk)
+            os.replace(pdf_path + '.tmp', pdf_path)
+            pdf_sec = time.time() - started
+
+            self.manifest.update(video_id, status='done', pdf=os.path.basename(pdf_path), pages=len(pages),
+                                 timings=self._timings(timings, queued_at, download_sec, extract_sec, pdf_sec))
+            self._progress(f"✅ {video_id}: {len(pages)} pages, {time.time() - queued_at:.1f}s")
+        except JobCancelledError:
+            self.manifest.update(video_id, status='pending')
+        except Exception as e:
+            self._fail(video_id, e, timings, queued_at)
+        finally:
+            if page_spool:
+                page_spool.close()  # Windows에서 열린 파일은 삭제할 수 없음
+            shutil.rmtree(work_dir, ignore_errors=True)
+            self._ready.release()
+
+    @staticmethod
+    def _timings(timings: metrics.JobTimings, queued_at: float, download_sec: Optional[float] = None,
+                 extract_sec: Optional[float] = None, pdf_sec: Optional[float] = None) -> Dict[str, Any]:
+        rounded = lambda value: round(value, 3) if value is not None else None
+        return {
+            'download_sec': rounded(download_sec), 'extract_sec': rounded(extract_sec),
+            'pdf_sec': rounded(pdf_sec), 'total_sec': rounded(time.time() - queued_at),
+            'stages': timings.to_dict(),
+        }
+
+    def _fail(self, video_id: str, error: Exception, timings: metrics.JobTimings, queued_at: float):
+        self.manifest.update(video_id, status='error', error=str(error), timings=self._timings(timings, queued_at))
+        with self._lock:
+            self._failed += 1
+        self._progress(f"❌ {video_id}: {error}")
+
+    def _progress(self, message: str):
+        with self._lock:
+            self._finished += 1
+            print(f"[{self._finished}/{self._total}] {message}")
+
+
+def read_url_list(path: str) -> List[str]:
+    """ 한 줄에 URL 하나. 빈 줄과 #으로 시작하는 줄은 무시합니다. """
+    with open(path, encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith('#')]
+
+
+def expand_videos(urls: List[str]) -> List[Dict[str, Any]]:
+    """ 재생목록/채널을 영상 목록으로 펼치고 중복 영상을 제거합니다. (순서 유지) """
+    videos = {}
+    for url in urls:
+        try:
+            entries = list_playlist_videos(url)
+        except Exception as e:
+            print(f"⚠️ Could not list {url}: {e}")
+            continue
+        for entry in entries:
+            videos.setdefault(entry['id'], entry)
+    return list(videos.values())
+
+
+def _crop(value: str):
+    parts = [int(p) for p in value.split(',')]
+    if len(parts) != 4:
+        raise argparse.ArgumentTypeError("expected x_start,x_end,y_start,y_end")
+    return parts
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Convert many YouTube score videos to PDFs without the web UI.")
+    parser.add_argument('urls', nargs='*', help="video, playlist or channel URLs")
+    parser.add_argument('-i', '--input', help="file with one URL per line")
+    parser.add_argument('-o', '--output-dir', default='batch_output')
+    parser.add_argument('--download-jobs', type=int, default=2, help="concurrent downloads")
+    parser.add_argument('--extract-jobs', type=int, default=max((os.cpu_count() or 2) // 2, 1),
+                        help="concurrent extractions")
+    parser.add_argument('--crop', type=_crop, default=[0, 100, 0, 100], help="x_start,x_end,y_start,y_end in %%")
+    parser.add_argument('--threshold', type=float, default=5.0)
+    parser.add_argument('--interval', type=float, default=1.0, help="frame_interval_sec")
+    parser.add_argument('--backend', default='opencv', choices=['opencv', 'ffmpeg'])
+    parser.add_argument('--sampling', default='fixed', choices=['fixed', 'adaptive'])
+    parser.add_argument('--analysis-workers', type=int, default=1, help="processes per extraction")
+    parser.add_argument('--analysis-width', type=int, default=0)
+    parser.add_argument('--dedupe-distance', type=int, default=24, help="0 disables duplicate page removal")
+    parser.add_argument('--pdf-format', default='flate', choices=['flate', 'jpeg'])
+    parser.add_argument('--min-roi-height', type=int, default=0,
+                        help="download the smallest stream whose cropped height reaches this; "
+                             "pages are cut from it too, so the PDF gets that resolution (0: best)")
+    parser.add_argument('--cache-dir', default=DEFAULT_VIDEO_CACHE_DIR, help="shared video cache")
+    parser.add_argument('--cache-mb', type=int, default=int(os.environ.get('YSC_VIDEO_CACHE_MB', 2048)))
+    parser.add_argument('--retry-failed', action='store_true', help="also retry videos that failed before")
+    args = parser.parse_args(argv)
+    args.x_start, args.x_end, args.y_start, args.y_end = args.crop
+    args.analysis_width = args.analysis_width or None
+    try:
+        check_processing_options(args.backend, args.sampling, args.analysis_workers)
+    except ValueError as e:
+        parser.error(str(e))
+
+    urls = list(args.urls) + (read_url_list(args.input) if args.input else [])
+    if not urls:
+        parser.error("no URLs given")
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    config = {k: getattr(args, k) for k in (
+        'crop', 'threshold', 'interval', 'backend', 'sampling', 'analysis_width',
+        'dedupe_distance', 'pdf_format', 'min_roi_height')}
+    manifest = BatchManifest(os.path.join(args.output_dir, MANIFEST_FILE), config)
+
+    print(f"🔎 Listing {len(urls)} input URL(s)...")
+    todo = []
+    for video in expand_videos(urls):
+        record = manifest.add(video)
+        pdf_done = record['pdf'] and os.path.exists(os.path.join(args.output_dir, record['pdf']))
+        if record['status'] == 'done' and pdf_done:
+            continue
+        if record['status'] == 'error' and not args.retry_failed:
+            continue
+        todo.append(video)
+    manifest.save()
+    skipped = len(manifest.data['videos']) - len(todo)
+    print(f"🚀 {len(todo)} video(s) to process ({skipped} already finished or failed before).")
+
+    video_store = VideoStore(args.cache_dir, args.cache_mb * 1024 * 1024)
+    failed = BatchRunner(args, manifest, video_store).run(todo)
+    shutil.rmtree(os.path.join(args.output_dir, '.work'), ignore_errors=True)
+    print(f"📄 Done: {len(todo) - failed} succeeded, {failed} failed. Manifest: "
+          f"{os.path.join(args.output_dir, MANIFEST_FILE)}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    # PyInstaller 빌드에서 병렬 분석 워커 프로세스가 다시 실행되지 않도록 함
+    multiprocessing.freeze_support()
+    sys.exit(main())
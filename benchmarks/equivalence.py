@@ -0,0 +1,142 @@
+# benchmarks/equivalence.py
+"""
+병렬 구간 분석(workers > 1)이 순차 분석과 똑같은 페이지를 저장하는지 합성 영상으로 확인합니다.
+검수 화면의 재선택(FeatureSet.select_pages)이 같은 threshold로 다시 추출한 결과와 같은 샘플을 고르는지도 확인합니다.
+
+사용 예 (저장소 루트에서):
+    python -m benchmarks.equivalence
+    python -m benchmarks.equivalence --resolutions 480p,1080p --workers 2,3,4 --intervals 0.25,0.5
+    python -m benchmarks.equivalence --reselect-thresholds 1,3,8 --analysis-width 640
+
+경우마다 페이지 이름/시각/변화량, PNG 데이터, 저장 샘플 목록을 비교하며 하나라도 다르면 종료 코드 1을 반환합니다.
+구간이 MIN_SEGMENT_SAMPLES * 2개 샘플보다 짧으면 병렬 분석을 하지 않으므로, 영상 길이와 간격을 그에 맞게 고릅니다.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+from typing import Dict, List, Optional, Tuple
+
+from benchmarks.run import DEFAULT_CACHE_DIR
+from benchmarks.synthetic_video import RESOLUTIONS, cached_score_video
+
+
+def extract_pages(video_path: str, meta: Dict, interval: float, threshold: float, workers: int,
+                  analysis_width: Optional[int] = None) -> Dict:
+    """ 페이지 기록(이름, 시각, 변화량)과 PNG 데이터, 저장 샘플 목록, 기록된 특징(FeatureSet)을 반환합니다. """
+    from modules.feature_store import FeatureSet, FeatureWriter
+    from modules.frame_store import FrameStore, FrameStoreWriter
+    from modules.image_processor import MIN_SEGMENT_SAMPLES, process_video_frames
+    from modules.session_store import FEATURES_FILE
+
+    samples = int(meta['frames'] / max(int(meta['fps'] * interval), 1))
+    if workers > 1 and samples < 2 * MIN_SEGMENT_SAMPLES:
+        raise ValueError(f"{samples} samples are too few for parallel analysis; use a longer video or interval.")
+
+    session_dir = tempfile.mkdtemp(prefix='ysc-equiv-')
+    try:
+        image_dir = os.path.join(session_dir, 'images')
+        os.makedirs(image_dir)
+        features_path = os.path.join(session_dir, FEATURES_FILE)
+        feature_writer = FeatureWriter(features_path)
+        x_start, x_end, y_start, y_end = meta['crop']
+        with FrameStoreWriter(session_dir) as frame_store:
+            process_video_frames(video_path, image_dir, None, None, x_start, x_end, y_start, y_end,
+                                 threshold, interval, workers=workers, feature_writer=feature_writer,
+                                 frame_store=frame_store, analysis_width=analysis_width)
+        feature_writer.close()
+
+        with FrameStore(session_dir) as store:
+            pages = [(name, record['time'], record['score'], bytes(store.view(name)))
+                     for name, record in store.index.items()]
+        features = FeatureSet(features_path)
+        return {'pages': pages, 'saved_samples': features.saved_samples(), 'features': features}
+    finally:
+        shutil.rmtree(session_dir, ignore_errors=True)
+
+
+def compare(sequential: Dict, parallel: Dict) -> List[str]:
+    """ 다른 점을 설명하는 문자열 목록 (같으면 빈 목록) """
+    differences = []
+    seq_pages, par_pages = sequential['pages'], parallel['pages']
+    if len(seq_pages) != len(par_pages):
+        differences.append(f"page count {len(seq_pages)} != {len(par_pages)}")
+    for seq, par in zip(seq_pages, par_pages):
+        if seq[:3] != par[:3]:
+            differences.append(f"page {seq[:3]} != {par[:3]}")
+        elif seq[3] != par[3]:
+            differences.append(f"page {seq[0]}: image data differs")
+    if sequential['saved_samples'] != parallel['saved_samples']:
+        differences.append("saved samples differ")
+    return differences
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Check that parallel segment analysis matches sequential output.")
+    parser.add_argument('--resolutions', default='480p', help=f"comma separated, from {', '.join(RESOLUTIONS)}")
+    parser.add_argument('--workers', default='2,3', help="comma separated worker counts to compare")
+    parser.add_argument('--intervals', default='0.25,0.5', help="comma separated frame_interval_sec values")
+    parser.add_argument('--threshold', type=float, default=5.0)
+    parser.add_argument('--reselect-thresholds', default='2,10',
+                        help="comma separated thresholds to reselect from the recorded features and re-extract")
+    parser.add_argument('--analysis-width', type=int, default=0)
+    parser.add_argument('--pages', type=int, default=8)
+    parser.add_argument('--page-sec', type=float, default=10.0)
+    parser.add_argument('--fps', type=float, default=30.0)
+    parser.add_argument('--noise', type=float, default=4.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help="where generated videos are kept")
+    args = parser.parse_args(argv)
+
+    analysis_width = args.analysis_width or None
+    failures: List[Tuple[str, List[str]]] = []
+    for resolution in [r.strip() for r in args.resolutions.split(',') if r.strip()]:
+        print(f"🎬 Preparing {resolution} synthetic video...")
+        video_path, meta = cached_score_video(
+            args.cache_dir, resolution=resolution, fps=args.fps, pages=args.pages,
+            page_sec=args.page_sec, noise=args.noise, seed=args.seed
+        )
+        for interval in [float(v) for v in args.intervals.split(',')]:
+            sequential = extract_pages(video_path, meta, interval, args.threshold, 1, analysis_width)
+            for workers in [int(v) for v in args.workers.split(',')]:
+                key = f"{resolution}-i{interval:g}-w{workers}"
+                parallel = extract_pages(video_path, meta, interval, args.threshold, workers, analysis_width)
+                differences = compare(sequential, parallel)
+                print(f"{'✅' if not differences else '❌'} {key}: {len(sequential['pages'])} pages")
+                if differences:
+                    failures.append((key, differences))
+
+            # 기록된 특징으로 계산한 변화량 == 추출 때 기록된 페이지 변화량
+            key = f"{resolution}-i{interval:g}-scores"
+            saved, pages = sequential['saved_samples'], sequential['pages']
+            differences = [f"page {page[0]}: score {page[2]} != {score}" for page, score in zip(
+                pages[1:], (sequential['features'].score(a, b) for a, b in zip(saved, saved[1:])))
+                if abs(page[2] - score) > 1e-6]
+            print(f"{'✅' if not differences else '❌'} {key}: {len(saved) - 1} scores")
+            if differences:
+                failures.append((key, differences))
+
+            # 재선택: 기록된 특징으로 고른 샘플 == 그 threshold로 다시 추출해 저장된 샘플
+            for threshold in [args.threshold] + [float(v) for v in args.reselect_thresholds.split(',') if v]:
+                key = f"{resolution}-i{interval:g}-reselect{threshold:g}"
+                selected = sequential['features'].select_pages(threshold)
+                expected = sequential['saved_samples'] if threshold == args.threshold else \
+                    extract_pages(video_path, meta, interval, threshold, 1, analysis_width)['saved_samples']
+                differences = [] if selected == expected else [f"selected {selected} != extracted {expected}"]
+                print(f"{'✅' if not differences else '❌'} {key}: {len(expected)} pages")
+                if differences:
+                    failures.append((key, differences))
+
+    if failures:
+        print("❌ Parallel analysis or reselection differs from sequential extraction:")
+        for key, differences in failures:
+            for line in differences:
+                print(f"   {key}: {line}")
+        return 1
+    print("✅ Parallel analysis and reselection match sequential extraction.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,212 @@
+# benchmarks/run.py
+"""
+합성 악보 영상으로 추출 파이프라인의 속도와 정확도를 측정합니다. (네트워크/yt-dlp 불필요)
+
+사용 예 (저장소 루트에서):
+    python -m benchmarks.run --resolutions 480p,1080p,2160p
+    python -m benchmarks.run --workers 4 --baseline benchmarks/baseline.json
+    python -m benchmarks.run --save-baseline benchmarks/baseline.json
+
+각 측정은 새 프로세스에서 실행되므로 최대 메모리(peak RSS)가 측정 간에 섞이지 않습니다.
+기준 파일과 비교하여 성능이 tolerance 이상 나빠지거나 정확도가 떨어지면 종료 코드 1을 반환합니다.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+from benchmarks.synthetic_video import RESOLUTIONS, cached_score_video, match_pages
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache')
+
+# 기준 대비 비교할 지표: (이름, 값이 클수록 좋은지)
+PERFORMANCE_METRICS = [
+    ('frames_per_sec', True),
+    ('extract_sec', False),
+    ('pdf_sec', False),
+    ('peak_rss_mb', False),
+]
+ACCURACY_METRICS = ['precision', 'recall']
+
+
+def _peak_rss_mb() -> Optional[float]:
+    """ 현재 프로세스와 종료된 자식 프로세스(병렬 워커, ffmpeg) 중 최대 RSS (MB) """
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # Linux는 KB, macOS는 바이트 단위
+    return round(peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024, 1)
+
+
+def run_case(video_path: str, meta: Dict, config: Dict) -> Dict:
+    """ 자식 프로세스: 추출 -> PDF 생성을 실행하고 단계별 시간과 정확도를 측정합니다. """
+    from modules.frame_store import FrameStore, FrameStoreWriter, load_frame_index
+    from modules.image_processor import process_video_frames
+    from modules.pdf_generator import page_image_from_bytes, stream_pdf
+
+    session_dir = tempfile.mkdtemp(prefix='ysc-bench-')
+    try:
+        image_dir = os.path.join(session_dir, 'images')
+        os.makedirs(image_dir)
+        x_start, x_end, y_start, y_end = meta['crop']
+        samples = {'count': 0, 'first_page_sec': None}
+        started = time.perf_counter()
+
+        def on_progress(done, total, saved):
+            samples['count'] += 1
+            if saved and samples['first_page_sec'] is None:
+                samples['first_page_sec'] = time.perf_counter() - started
+
+        with FrameStoreWriter(session_dir) as frame_store:
+            process_video_frames(
+                video_path, image_dir, None, None, x_start, x_end, y_start, y_end,
+                config['threshold'], config['interval'], progress_callback=on_progress,
+                backend=config['backend'], workers=config['workers'], sampling=config['sampling'],
+                pipeline=config['pipeline'], analysis_width=config['analysis_width'],
+                frame_store=frame_store
+            )
+        extract_sec = time.perf_counter() - started
+
+        index = load_frame_index(session_dir)
+        started = time.perf_counter()
+        pdf_bytes = 0
+        with FrameStore(session_dir) as store:
+            for chunk in stream_pdf(page_image_from_bytes(store.view(name)) for name in index):
+                pdf_bytes += len(chunk)
+        pdf_sec = time.perf_counter() - started
+
+        result = {
+            'pages_detected': len(index),
+            'pages_expected': len(meta['pages']),
+            'extract_sec': round(extract_sec, 3),
+            'pdf_sec': round(pdf_sec, 3),
+            'first_page_sec': round(samples['first_page_sec'], 3) if samples['first_page_sec'] else None,
+            'frames_per_sec': round(meta['frames'] / extract_sec, 1),
+            'progress_updates': samples['count'],
+            'pdf_bytes': pdf_bytes,
+            'peak_rss_mb': _peak_rss_mb(),
+        }
+        result.update(match_pages([record['time'] for record in index.values()], meta['pages']))
+        return result
+    finally:
+        shutil.rmtree(session_dir, ignore_errors=True)
+
+
+def case_key(resolution: str, config: Dict) -> str:
+    return (f"{resolution}-{config['backend']}-{config['sampling']}-w{config['workers']}"
+            f"-p{int(config['pipeline'])}-a{config['analysis_width'] or 0}")
+
+
+def compare_with_baseline(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """ 기준보다 나빠진 항목을 설명하는 문자열 목록을 반환합니다. """
+    regressions = []
+    for key, current in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        for metric, higher_is_better in PERFORMANCE_METRICS:
+            if current.get(metric) is None or not base.get(metric):
+                continue
+            change = (current[metric] - base[metric]) / base[metric]
+            if (-change if higher_is_better else change) > tolerance:
+                regressions.append(f"{key}: {metric} {base[metric]} -> {current[metric]} ({change:+.0%})")
+        for metric in ACCURACY_METRICS:
+            if current[metric] < base[metric] - 1e-6:
+                regressions.append(f"{key}: {metric} {base[metric]:.3f} -> {current[metric]:.3f}")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Synthetic-video benchmark for the score extractor.")
+    parser.add_argument('--resolutions', default='480p,720p,1080p,2160p',
+                        help=f"comma separated, from {', '.join(RESOLUTIONS)}")
+    parser.add_argument('--pages', type=int, default=6)
+    parser.add_argument('--page-sec', type=float, default=6.0)
+    parser.add_argument('--fps', type=float, default=30.0)
+    parser.add_argument('--noise', type=float, default=4.0, help="gaussian noise sigma per frame")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--threshold', type=float, default=5.0)
+    parser.add_argument('--interval', type=float, default=1.0, help="frame_interval_sec")
+    parser.add_argument('--backend', default='opencv', choices=['opencv', 'ffmpeg'])
+    parser.add_argument('--sampling', default='fixed', choices=['fixed', 'adaptive'])
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--pipeline', action='store_true')
+    parser.add_argument('--analysis-width', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=1, help="runs per case; the fastest is reported")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help="where generated videos are kept")
+    parser.add_argument('--output', help="write results JSON here")
+    parser.add_argument('--baseline', help="compare against this results JSON")
+    parser.add_argument('--save-baseline', help="write results as the new baseline")
+    parser.add_argument('--tolerance', type=float, default=0.15, help="allowed relative slowdown")
+    args = parser.parse_args(argv)
+    from modules.image_processor import check_processing_options
+    try:
+        check_processing_options(args.backend, args.sampling, args.workers)
+    except ValueError as e:
+        parser.error(str(e))
+
+    config = {
+        'threshold': args.threshold, 'interval': args.interval, 'backend': args.backend,
+        'sampling': args.sampling, 'workers': args.workers, 'pipeline': args.pipeline,
+        'analysis_width': args.analysis_width or None,
+    }
+
+    import cv2
+    results = {}
+    for resolution in [r.strip() for r in args.resolutions.split(',') if r.strip()]:
+        print(f"🎬 Preparing {resolution} synthetic video...")
+        video_path, meta = cached_score_video(
+            args.cache_dir, resolution=resolution, fps=args.fps, pages=args.pages,
+            page_sec=args.page_sec, noise=args.noise, seed=args.seed
+        )
+        key = case_key(resolution, config)
+        runs = []
+        for _ in range(max(args.repeat, 1)):
+            # 새 프로세스에서 실행하여 측정마다 메모리 최대치를 따로 기록
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as pool:
+                runs.append(pool.submit(run_case, video_path, meta, config).result())
+        results[key] = min(runs, key=lambda r: r['extract_sec'])
+        r = results[key]
+        print(f"⏱️ {key}: {r['frames_per_sec']} fps, extract {r['extract_sec']}s, pdf {r['pdf_sec']}s, "
+              f"peak RSS {r['peak_rss_mb']} MB, pages {r['pages_detected']}/{r['pages_expected']}, "
+              f"precision {r['precision']:.3f}, recall {r['recall']:.3f}")
+
+    report = {
+        'environment': {
+            'python': platform.python_version(), 'platform': platform.platform(),
+            'opencv': cv2.__version__, 'cpus': os.cpu_count(),
+        },
+        'video': {'pages': args.pages, 'page_sec': args.page_sec, 'fps': args.fps,
+                  'noise': args.noise, 'seed': args.seed},
+        'cases': results,
+    }
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_with_baseline(results, baseline.get('cases', {}), args.tolerance)
+        if regressions:
+            print("❌ Regressions against baseline:")
+            for line in regressions:
+                print(f"   {line}")
+            return 1
+        print("✅ No regressions against baseline.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,167 @@
+# benchmarks/synthetic_video.py
+import json
+import os
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+RESOLUTIONS = {
+    '480p': (854, 480),
+    '720p': (1280, 720),
+    '1080p': (1920, 1080),
+    '1440p': (2560, 1440),
+    '2160p': (3840, 2160),
+}
+
+# 악보가 표시되는 영역 (퍼센트, x_start, x_end, y_start, y_end). 위아래는 영상 제목/자막 띠
+SCORE_CROP = (0, 100, 12, 88)
+SYSTEMS_PER_PAGE = 3
+PLAYHEAD_COLORS = [(0, 0, 230), (230, 120, 0), (0, 170, 0)]  # BGR: 빨강, 파랑, 초록
+NOISE_FRAMES = 8  # 미리 만들어 순환 사용하는 노이즈 프레임 수
+
+
+def render_page(seed: int, width: int, height: int) -> np.ndarray:
+    """ 오선 SYSTEMS_PER_PAGE단과 무작위 음표로 이루어진 악보 페이지 한 장을 그립니다. """
+    rng = np.random.default_rng(seed)
+    page = np.full((height, width, 3), 255, np.uint8)
+    unit = height / 100.0  # 해상도와 무관한 비율 좌표
+    line_gap = max(int(round(unit * 1.6)), 2)
+    thickness = max(int(round(unit * 0.15)), 1)
+    system_h = height / SYSTEMS_PER_PAGE
+
+    for s in range(SYSTEMS_PER_PAGE):
+        top = int(s * system_h + system_h * 0.35)
+        x0, x1 = int(width * 0.04), int(width * 0.96)
+        for line in range(5):
+            y = top + line * line_gap
+            cv2.line(page, (x0, y), (x1, y), (0, 0, 0), thickness)
+        # 마디선
+        for m in range(1, 5):
+            x = x0 + (x1 - x0) * m // 4
+            cv2.line(page, (x, top), (x, top + 4 * line_gap), (0, 0, 0), thickness)
+        # 음표 (머리 + 기둥)
+        head = (max(int(line_gap * 0.7), 2), max(int(line_gap * 0.5), 1))
+        for _ in range(int(rng.integers(24, 40))):
+            x = int(rng.integers(x0 + line_gap * 2, x1 - line_gap * 2))
+            y = top + int(rng.integers(-3, 12)) * line_gap // 2
+            cv2.ellipse(page, (x, y), head, -20, 0, 360, (0, 0, 0), -1)
+            cv2.line(page, (x + head[0], y), (x + head[0], y - line_gap * 3), (0, 0, 0), thickness)
+    return page
+
+
+def _compose_frame(page: np.ndarray, frame_size: Tuple[int, int], title: str) -> np.ndarray:
+    """ 악보 페이지를 SCORE_CROP 영역에 놓고 위아래에 영상 제목 띠를 그립니다. """
+    width, height = frame_size
+    frame = np.full((height, width, 3), 30, np.uint8)
+    y1, y2 = height * SCORE_CROP[2] // 100, height * SCORE_CROP[3] // 100
+    frame[y1:y2] = cv2.resize(page, (width, y2 - y1), interpolation=cv2.INTER_AREA)
+    scale = height / 720.0
+    cv2.putText(frame, title, (int(20 * scale), int(y1 * 0.65)), cv2.FONT_HERSHEY_SIMPLEX,
+                1.2 * scale, (220, 220, 220), max(int(2 * scale), 1))
+    return frame
+
+
+def make_score_video(path: str, resolution: str = '1080p', fps: float = 30.0, pages: int = 6,
+                     page_sec: float = 6.0, noise: float = 4.0, seed: int = 0,
+                     playhead_color: Optional[Tuple[int, int, int]] = None) -> Dict:
+    """
+    페이지 넘김 시각을 아는 합성 악보 영상을 만들고 정답(ground truth)을 반환합니다.
+
+    - 각 페이지는 page_sec초 동안 표시되며, 현재 단 위를 색 재생 바와 반투명 마디 강조가 지나갑니다.
+    - noise는 프레임마다 더하는 가우시안 노이즈의 표준편차 (압축 잡음 흉내)
+    - 정답은 path + '.json'에도 저장됩니다: {'pages': [{'start', 'end', 'seed'}], 'crop', ...}
+    """
+    width, height = RESOLUTIONS[resolution]
+    color = playhead_color or PLAYHEAD_COLORS[seed % len(PLAYHEAD_COLORS)]
+    rng = np.random.default_rng(seed)
+
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+    if not writer.isOpened():
+        raise IOError(f"Cannot open video writer: {path}")
+
+    noise_frames = []
+    if noise > 0:
+        for _ in range(NOISE_FRAMES):
+            n = np.empty((height, width, 3), np.int16)
+            cv2.randn(n, 0, noise)
+            noise_frames.append(n)
+
+    y1, y2 = height * SCORE_CROP[2] // 100, height * SCORE_CROP[3] // 100
+    system_h = (y2 - y1) / SYSTEMS_PER_PAGE
+    bar_w = max(width // 200, 2)
+    frames_per_page = int(round(page_sec * fps))
+    truth = []
+    frame_no = 0
+    try:
+        for p in range(pages):
+            page_seed = seed * 1000 + p
+            base = _compose_frame(render_page(page_seed, width, y2 - y1), (width, height), f"Synthetic Score {p + 1}")
+            truth.append({'start': frame_no / fps, 'end': (frame_no + frames_per_page) / fps, 'seed': page_seed})
+
+            for k in range(frames_per_page):
+                frame = base.copy()
+                # 재생 위치: 단을 차례로 훑음
+                progress = k / frames_per_page * SYSTEMS_PER_PAGE
+                system = min(int(progress), SYSTEMS_PER_PAGE - 1)
+                x = int(width * (0.04 + 0.92 * (progress - system)))
+                top = int(y1 + system * system_h + system_h * 0.15)
+                bottom = int(y1 + (system + 1) * system_h - system_h * 0.15)
+                # 현재 마디 반투명 강조 + 재생 바
+                measure = width * 0.92 / 4
+                mx = int(width * 0.04 + measure * int((x - width * 0.04) // measure))
+                overlay = frame[top:bottom, mx:min(mx + int(measure), width)]
+                if overlay.size:
+                    overlay[:] = cv2.addWeighted(overlay, 0.75, np.full_like(overlay, color), 0.25, 0)
+                cv2.rectangle(frame, (x, top), (x + bar_w, bottom), color, -1)
+
+                if noise_frames:
+                    n = noise_frames[int(rng.integers(len(noise_frames)))]
+                    frame = cv2.add(frame, n, dtype=cv2.CV_8U)
+                writer.write(frame)
+                frame_no += 1
+    finally:
+        writer.release()
+
+    meta = {
+        'resolution': resolution, 'size': [width, height], 'fps': fps, 'frames': frame_no,
+        'crop': list(SCORE_CROP), 'noise': noise, 'seed': seed, 'pages': truth,
+    }
+    with open(path + '.json', 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+    return meta
+
+
+def cached_score_video(cache_dir: str, **params) -> Tuple[str, Dict]:
+    """ 같은 파라미터의 영상이 이미 있으면 재사용합니다. (4K 생성은 수십 초가 걸림) """
+    os.makedirs(cache_dir, exist_ok=True)
+    key = '-'.join(f"{k}{params[k]}" for k in sorted(params))
+    path = os.path.join(cache_dir, f"score-{key}.mp4")
+    if os.path.exists(path) and os.path.exists(path + '.json'):
+        with open(path + '.json', encoding='utf-8') as f:
+            return path, json.load(f)
+    return path, make_score_video(path, **params)
+
+
+def match_pages(detected_times: List[float], truth_pages: List[Dict]) -> Dict:
+    """
+    검출된 페이지 시각을 정답 페이지 구간과 비교합니다.
+
+    정답 구간 안에 들어간 첫 검출만 정답(TP)으로 보고, 같은 구간의 추가 검출과
+    어느 구간에도 속하지 않는 검출은 오검출(FP)로 봅니다.
+    """
+    matched = set()
+    tp = 0
+    for t in detected_times:
+        for i, page in enumerate(truth_pages):
+            if page['start'] <= t < page['end'] and i not in matched:
+                matched.add(i)
+                tp += 1
+                break
+    fp = len(detected_times) - tp
+    fn = len(truth_pages) - tp
+    return {
+        'true_positives': tp, 'false_positives': fp, 'false_negatives': fn,
+        'precision': tp / (tp + fp) if tp + fp else 0.0,
+        'recall': tp / (tp + fn) if tp + fn else 0.0,
+    }
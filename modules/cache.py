@@ -0,0 +1,73 @@
+# modules/cache.py
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+class TTLCache:
+    """
+    만료 시간(TTL)과 LRU 제거를 지원하는 스레드 안전 인메모리 캐시.
+
+    - 항목마다 개별 TTL을 지정할 수 있습니다. (지정하지 않으면 기본 TTL)
+    - maxsize를 넘으면 가장 오래 사용되지 않은 항목부터 제거합니다.
+    - weigher(값)가 주어지면 항목 무게(바이트 등)의 합이 max_weight를 넘지 않도록 같은 순서로 제거합니다.
+    """
+
+    def __init__(self, maxsize: int = 128, ttl: float = 3600,
+                 weigher: Optional[Callable[[Any], int]] = None, max_weight: Optional[int] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.weigher = weigher
+        self.max_weight = max_weight
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._weight = 0
+        self._lock = threading.Lock()
+
+    def _weigh(self, value: Any) -> int:
+        return self.weigher(value) if self.weigher else 0
+
+    def _remove(self, key: Hashable):
+        value, _ = self._data.pop(key)
+        self._weight -= self._weigh(value)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        weight = self._weigh(value)
+        if self.max_weight is not None and weight > self.max_weight:
+            return  # 한도보다 큰 항목은 다른 항목을 모두 밀어내지 않도록 저장하지 않음
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._weight += weight
+            while len(self._data) > self.maxsize or (self.max_weight is not None and self._weight > self.max_weight):
+                self._remove(next(iter(self._data)))
+
+    def pop(self, key: Hashable):
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._weight = 0
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
@@ -0,0 +1,98 @@
+# modules/cancellation.py
+import threading
+from contextlib import contextmanager
+from functools import partial
+from typing import Callable, List, Optional
+
+
+class JobCancelledError(RuntimeError):
+    """작업이 취소되었거나 제한 시간을 넘겨 중단될 때 발생합니다."""
+
+
+class CancelToken:
+    """
+    실행 중인 작업에 취소를 알리는 토큰.
+
+    - 프레임 루프 등은 check()를 주기적으로 호출하여 취소되었으면 JobCancelledError로 빠져나갑니다.
+    - 블로킹 중인 서브프로세스는 kill_on_cancel()로 등록해 두면 취소 즉시 종료됩니다.
+    - deadline_sec가 주어지면 생성 시점부터 그 시간이 지났을 때 자동으로 취소됩니다.
+    """
+
+    def __init__(self, deadline_sec: Optional[float] = None):
+        self.reason: Optional[str] = None
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], None]] = []
+        self._timer = None
+        if deadline_sec:
+            self._timer = threading.Timer(deadline_sec, self.cancel, ("Job deadline exceeded.",))
+            self._timer.daemon = True
+            self._timer.start()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self, reason: str = "Job cancelled."):
+        """ 취소를 알리고 등록된 콜백(서브프로세스 종료 등)을 실행합니다. 여러 번 호출해도 안전합니다. """
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass
+
+    def check(self):
+        if self._event.is_set():
+            raise JobCancelledError(self.reason)
+
+    def wait(self, timeout: float) -> bool:
+        """ 최대 timeout초 동안 취소를 기다립니다. 취소되었으면 True """
+        return self._event.wait(timeout)
+
+    @contextmanager
+    def kill_on_cancel(self, *procs, kill: Optional[Callable] = None):
+        """
+        with 블록 동안 취소되면 procs를 종료합니다. 이미 취소된 상태면 즉시 종료합니다.
+
+        kill(proc)이 주어지면 proc.kill() 대신 사용합니다. (자식 프로세스까지 종료할 때)
+        """
+        callbacks = [partial(kill, proc) if kill else proc.kill for proc in procs]
+        with self._lock:
+            cancelled = self._event.is_set()
+            if not cancelled:
+                self._callbacks.extend(callbacks)
+        if cancelled:
+            for callback in callbacks:
+                callback()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._callbacks = [c for c in self._callbacks if not any(c is d for d in callbacks)]
+
+    def close(self):
+        """ 작업이 끝나면 제한 시간 타이머를 정리합니다. """
+        if self._timer is not None:
+            self._timer.cancel()
+
+
+def check_cancelled(token: Optional[CancelToken]):
+    """ token이 없으면 아무것도 하지 않는 check() """
+    if token is not None:
+        token.check()
+
+
+@contextmanager
+def kill_on_cancel(token: Optional[CancelToken], *procs, kill: Optional[Callable] = None):
+    """ token이 없으면 아무것도 하지 않는 CancelToken.kill_on_cancel """
+    if token is None:
+        yield
+    else:
+        with token.kill_on_cancel(*procs, kill=kill):
+            yield
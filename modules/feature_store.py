@@ -0,0 +1,142 @@
+# modules/feature_store.py
+import json
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# 특징 압축 수준 (빠른 압축으로도 흰 바탕의 악보 비트맵은 크게 줄어듦)
+FEATURE_COMPRESSION = 1
+
+
+def pack_features(binary: np.ndarray, dilated_mask: np.ndarray) -> Tuple[bytes, bytes, Tuple[int, int]]:
+    """
+    이진 영상과 가변 영역 마스크를 분석 해상도(AnalysisPlan) 그대로 비트 단위로 압축합니다.
+
+    축소하지 않으므로 select_pages의 변화량이 분석 때의 _diff_score와 같습니다.
+    """
+    h, w = binary.shape[:2]
+    return (zlib.compress(np.packbits(binary > 0).tobytes(), FEATURE_COMPRESSION),
+            zlib.compress(np.packbits(dilated_mask > 0).tobytes(), FEATURE_COMPRESSION),
+            (h, w))
+
+
+# 바이트 값별 1인 비트 수
+_POPCOUNT = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1)
+
+
+def _join(blobs: List[bytes]) -> Tuple[np.ndarray, np.ndarray]:
+    """ 압축 특징들을 한 배열로 이어 붙이고 각 항목의 끝 위치를 함께 반환합니다. """
+    ends = np.cumsum([len(b) for b in blobs], dtype=np.int64)
+    return np.frombuffer(b''.join(blobs), dtype=np.uint8), ends
+
+
+class FeatureWriter:
+    """
+    샘플링된 모든 프레임의 특징을 모아 세션 폴더에 .npz 파일로 저장합니다.
+
+    이후 select_pages()로 다른 threshold에 대한 저장 페이지를 영상 없이 다시 계산할 수 있습니다.
+    메모리에는 샘플별로 압축된 특징만 보관합니다.
+    """
+
+    def __init__(self, path: str, fps: float = 30.0, start_f: int = 0, frame_step: int = 1):
+        self.path = path
+        self.meta = {'fps': fps, 'start_f': start_f, 'frame_step': frame_step}
+        self._offsets: List[int] = []
+        self._saved: List[bool] = []
+        self._binary: List[bytes] = []
+        self._mask: List[bytes] = []
+        self._shape: Optional[Tuple[int, int]] = None
+
+    def set_timing(self, fps: float, start_f: int, frame_step: int):
+        self.meta = {'fps': fps, 'start_f': start_f, 'frame_step': frame_step}
+
+    def append(self, offset: int, features: Tuple[np.ndarray, np.ndarray], saved: bool):
+        self.append_packed(offset, pack_features(*features), saved)
+
+    def append_packed(self, offset: int, packed, saved: bool):
+        packed_binary, packed_mask, shape = packed
+        if self._shape is None:
+            self._shape = shape
+        elif shape != self._shape:
+            return  # 크롭 크기가 달라진 프레임은 비교 대상이 아님
+        self._offsets.append(offset)
+        self._saved.append(saved)
+        self._binary.append(packed_binary)
+        self._mask.append(packed_mask)
+
+    def close(self):
+        if self._shape is None:
+            return
+        binary, binary_ends = _join(self._binary)
+        mask, mask_ends = _join(self._mask)
+        np.savez(
+            self.path,
+            offsets=np.asarray(self._offsets, dtype=np.int64),
+            saved=np.asarray(self._saved, dtype=bool),
+            binary=binary, binary_ends=binary_ends,
+            mask=mask, mask_ends=mask_ends,
+            shape=np.asarray(self._shape, dtype=np.int64),
+            meta=np.frombuffer(json.dumps(self.meta).encode('utf-8'), dtype=np.uint8),
+        )
+
+
+class FeatureSet:
+    """ 저장된 특징 파일을 읽어 재선택에 사용합니다. """
+
+    def __init__(self, path: str):
+        with np.load(path) as data:
+            self.offsets = data['offsets']
+            self.saved = data['saved']
+            self._binary, self._binary_ends = data['binary'], data['binary_ends']
+            self._mask, self._mask_ends = data['mask'], data['mask_ends']
+            self.shape = tuple(int(v) for v in data['shape'])
+            self.meta: Dict = json.loads(data['meta'].tobytes().decode('utf-8'))
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def sample_time(self, sample: int) -> float:
+        """ 분석한 영상 기준 샘플 시각(초) """
+        return (self.meta['start_f'] + int(self.offsets[sample])) / self.meta['fps']
+
+    def saved_samples(self) -> List[int]:
+        return [int(i) for i in np.flatnonzero(self.saved)]
+
+    @staticmethod
+    def _unpack(blob: np.ndarray, ends: np.ndarray, sample: int) -> np.ndarray:
+        start = int(ends[sample - 1]) if sample else 0
+        return np.frombuffer(zlib.decompress(blob[start:int(ends[sample])].tobytes()), dtype=np.uint8)
+
+    def features(self, sample: int) -> Tuple[np.ndarray, np.ndarray]:
+        """ 샘플의 (이진 영상, 가변 영역 마스크) 비트 배열 (np.packbits 형식) """
+        return (self._unpack(self._binary, self._binary_ends, sample),
+                self._unpack(self._mask, self._mask_ends, sample))
+
+    def score(self, reference: int, sample: int) -> float:
+        """ 기준 샘플 대비 변화량 (분석 때의 _diff_score와 같은 값) """
+        return self._score(self.features(reference), self.features(sample))
+
+    def _score(self, reference: Tuple[np.ndarray, np.ndarray], features: Tuple[np.ndarray, np.ndarray]) -> float:
+        changed = np.bitwise_xor(reference[0], features[0])
+        changed &= ~np.bitwise_or(reference[1], features[1])
+        # 패딩 비트는 항상 0이므로 popcount에 영향을 주지 않음
+        return 255.0 * int(_POPCOUNT[changed].sum()) / (self.shape[0] * self.shape[1])
+
+    def select_pages(self, threshold: float) -> List[int]:
+        """
+        주어진 threshold로 저장될 샘플 번호 목록을 계산합니다.
+
+        _ChangeDetector와 같은 규칙(직전 저장 페이지 대비 가변 영역을 제외한 평균 변화량)을
+        분석 해상도의 비트 배열 위에서 수행하므로, 추출 때와 같은 threshold면 같은 샘플이 선택됩니다.
+        """
+        if len(self) == 0:
+            return []
+        selected = [0]
+        reference = self.features(0)
+        for i in range(1, len(self)):
+            features = self.features(i)
+            if self._score(reference, features) > threshold:
+                selected.append(i)
+                reference = features
+        return selected
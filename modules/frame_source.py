@@ -0,0 +1,186 @@
+# modules/frame_source.py
+import math
+import os
+import subprocess
+import sys
+import time
+from typing import Optional, Tuple
+
+import numpy as np
+
+from modules import metrics
+from modules.youtube_downloader import get_bin_path, get_startup_info, get_video_stream_info, kill_process_tree, \
+    open_video_pipe
+
+# 영상 길이를 알 수 없을 때 사용하는 종료 프레임 (사실상 무제한)
+UNBOUNDED_END_FRAME = 2 ** 31 - 1
+
+
+def crop_bounds(h: int, w: int, x_start: int, x_end: int, y_start: int, y_end: int) -> Tuple[int, int, int, int]:
+    """ 퍼센트 좌표를 픽셀 크롭 영역 (y1, y2, x1, x2)로 변환합니다. """
+    x_s, x_e = x_start / 100.0, x_end / 100.0
+    y_s, y_e = y_start / 100.0, y_end / 100.0
+    return int(h * y_s), int(h * y_e), int(w * x_s), int(w * x_e)
+
+
+def sample_select_filter(first_n, count, frame_step):
+    """
+    ffmpeg select 필터 식을 만듭니다.
+
+    process_video_frames의 OpenCV 경로와 똑같이 first_n + k * frame_step 번째 프레임만 통과시킵니다.
+    (first_n은 ffmpeg가 디코딩한 첫 프레임을 0으로 하는 번호)
+    """
+    return f"select='gte(n,{first_n})*lt(n,{first_n + count})*not(mod(n-{first_n},{frame_step}))'"
+
+
+def build_video_filter(first_n, count, frame_step, src_size, crop, max_width=None):
+    """
+    샘플링 -> 크롭 -> (선택) 축소를 디코더 안에서 수행하는 필터 체인과 출력 크기를 반환합니다.
+
+    crop은 (y1, y2, x1, x2) 픽셀 좌표입니다. 크롭을 색 변환 전에 적용하여
+    버려질 영역의 변환/복사 비용을 없앱니다.
+    """
+    src_w, src_h = src_size
+    y1, y2, x1, x2 = crop
+    out_w, out_h = x2 - x1, y2 - y1
+    filters = [sample_select_filter(first_n, count, frame_step)]
+    if (out_w, out_h) != (src_w, src_h):
+        # exact=1: 크로마 서브샘플링 때문에 홀수 좌표가 짝수로 반올림되는 것을 방지
+        filters.append(f"crop={out_w}:{out_h}:{x1}:{y1}:exact=1")
+    if max_width and out_w > max_width:
+        out_h = max(int(round(out_h * max_width / out_w)), 1)
+        out_w = max_width
+    # 출력 크기를 강제하여 raw 버퍼 크기를 보장
+    filters.append(f"scale={out_w}:{out_h}")
+    return ",".join(filters), (out_w, out_h)
+
+
+class FrameStream:
+    """
+    ffmpeg 파이프에서 raw BGR 프레임을 읽어오는 스트림.
+
+    frames는 (start_f 기준 오프셋, 프레임) 튜플을 반환하는 제너레이터이며,
+    with 블록을 벗어나면 연결된 모든 서브프로세스를 종료합니다.
+    """
+
+    def __init__(self, procs, width, height, start_f, end_f, frame_step, fps=30.0):
+        self.procs = procs
+        self.fps = fps
+        self.width = width
+        self.height = height
+        self.start_f = start_f
+        self.end_f = end_f
+        self.frame_step = frame_step
+        self.started = time.perf_counter()
+        self.frames = self._read_frames()
+
+    def _read_frames(self):
+        frame_bytes = self.width * self.height * 3
+        stdout = self.procs[-1].stdout
+        k = 0
+        while True:
+            # 파이프 대기 시간 = ffmpeg 디코딩(스트리밍이면 다운로드 포함) 시간
+            with metrics.timed('decode'):
+                buf = stdout.read(frame_bytes)
+            if len(buf) < frame_bytes:
+                break
+            metrics.count_frames('decoded')  # ffmpeg가 샘플링 후 넘겨준 프레임 수
+            yield k * self.frame_step, np.frombuffer(buf, np.uint8).reshape(self.height, self.width, 3)
+            k += 1
+
+    def close(self):
+        elapsed = time.perf_counter() - self.started
+        for proc in reversed(self.procs):
+            kill_process_tree(proc)
+            proc.wait()
+            if proc.stdout:
+                proc.stdout.close()
+            metrics.observe_subprocess(os.path.splitext(os.path.basename(proc.args[0]))[0], elapsed)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def open_ffmpeg_frames(input_args, video_filter, out_size, start_f, end_f, frame_step,
+                       stdin=None, extra_procs=(), fps=30.0):
+    """ ffmpeg로 입력을 디코딩하여 필터를 통과한 프레임을 raw BGR로 내보내는 FrameStream을 엽니다. """
+    ffmpeg_path = get_bin_path('ffmpeg')
+
+    cmd = [ffmpeg_path, "-loglevel", "error", *input_args, "-an", "-vf", video_filter, "-vsync", "passthrough"]
+    if end_f < UNBOUNDED_END_FRAME:
+        # 필요한 프레임을 모두 받으면 즉시 종료 (남은 디코딩/다운로드도 함께 중단됨)
+        cmd += ["-frames:v", str(math.ceil((end_f - start_f) / frame_step))]
+    cmd += ["-f", "rawvideo", "-pix_fmt", "bgr24", "pipe:1"]
+
+    proc = subprocess.Popen(
+        cmd,
+        stdin=stdin,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        startupinfo=get_startup_info(),
+        creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0
+    )
+    out_w, out_h = out_size
+    return FrameStream([*extra_procs, proc], out_w, out_h, start_f, end_f, frame_step, fps)
+
+
+def open_file_frames(video_path, src_size, fps, start_f, end_f, frame_step, crop,
+                     max_width: Optional[int] = None):
+    """
+    로컬 영상 파일을 ffmpeg로 디코딩하여 크롭된 샘플 프레임만 스트리밍합니다.
+
+    시작 지점은 입력 탐색(-ss)으로 이동하므로 디코딩된 첫 프레임이 start_f가 됩니다.
+    """
+    video_filter, out_size = build_video_filter(0, end_f - start_f, frame_step, src_size, crop, max_width)
+    input_args = ["-ss", f"{start_f / fps:.6f}", "-i", video_path] if start_f else ["-i", video_path]
+    return open_ffmpeg_frames(input_args, video_filter, out_size, start_f, end_f, frame_step, fps=fps)
+
+
+def iter_stream_frames(url, start_time, end_time, frame_interval_sec, crop_percent,
+                       format_spec="bestvideo", max_width: Optional[int] = None):
+    """
+    yt-dlp 출력(stdout)을 ffmpeg에 직접 연결하여 다운로드 중인 영상의 프레임을 스트리밍합니다.
+
+    crop_percent는 (x_start, x_end, y_start, y_end) 퍼센트 좌표이며, 크롭은 ffmpeg 안에서 수행됩니다.
+    시작 시간이 있으면 ffmpeg가 스트림 URL을 직접 열어 입력 탐색(-ss)으로 이동하므로 앞부분을 받거나
+    디코딩하지 않습니다. (파이프 입력은 탐색할 수 없음) URL을 얻지 못하면 파이프를 처음부터 디코딩하고
+    select 필터로 시작 전 프레임을 버립니다.
+    """
+    info = get_video_stream_info(url, format_spec)
+    fps = info['fps']
+
+    start_f = int(start_time * fps) if start_time else 0
+    if end_time:
+        end_f = int(end_time * fps)
+    elif info['duration']:
+        end_f = int(info['duration'] * fps)
+    else:
+        end_f = UNBOUNDED_END_FRAME
+    frame_step = max(int(fps * frame_interval_sec), 1)
+
+    x_start, x_end, y_start, y_end = crop_percent
+    crop = crop_bounds(info['height'], info['width'], x_start, x_end, y_start, y_end)
+    src_size = (info['width'], info['height'])
+
+    if start_f and info['url']:
+        # open_file_frames와 같이 디코딩된 첫 프레임이 start_f가 됨
+        video_filter, out_size = build_video_filter(0, end_f - start_f, frame_step, src_size, crop, max_width)
+        return open_ffmpeg_frames(["-ss", f"{start_f / fps:.6f}", "-i", info['url']], video_filter, out_size,
+                                  start_f, end_f, frame_step, fps=fps)
+
+    video_filter, out_size = build_video_filter(start_f, end_f - start_f, frame_step, src_size, crop, max_width)
+
+    ytdlp_proc = open_video_pipe(url, format_spec)
+    try:
+        stream = open_ffmpeg_frames(["-i", "pipe:0"], video_filter, out_size, start_f, end_f, frame_step,
+                                    stdin=ytdlp_proc.stdout, extra_procs=[ytdlp_proc], fps=fps)
+    except Exception:
+        ytdlp_proc.kill()
+        raise
+    # ffmpeg가 파이프를 소유하도록 부모 쪽 핸들을 닫음 (ffmpeg 종료 시 yt-dlp가 SIGPIPE를 받음)
+    ytdlp_proc.stdout.close()
+    ytdlp_proc.stdout = None
+    return stream
@@ -0,0 +1,232 @@
+# modules/frame_store.py
+import io
+import json
+import mmap
+import os
+import threading
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+
+FRAME_DATA_FILE = 'frames.bin'
+FRAME_INDEX_FILE = 'frames.idx'
+
+# 검수 목록용 썸네일 (WebP를 쓸 수 없는 OpenCV 빌드에서는 JPEG)
+THUMBNAIL_WIDTH = 480
+THUMBNAIL_QUALITY = 80
+
+
+def encode_thumbnail(image: 'np.ndarray') -> Tuple[bytes, str, int, int]:
+    """ 페이지 이미지를 축소하여 (데이터, MIME 타입, 폭, 높이)를 반환합니다. """
+    import cv2  # 색인 조회/전송 경로(검수 화면)는 OpenCV 없이 동작하도록 압축할 때만 불러옴
+    h, w = image.shape[:2]
+    if w > THUMBNAIL_WIDTH:
+        h = max(int(round(h * THUMBNAIL_WIDTH / w)), 1)
+        w = THUMBNAIL_WIDTH
+        image = cv2.resize(image, (w, h), interpolation=cv2.INTER_AREA)
+    try:
+        ok, buf = cv2.imencode('.webp', image, [cv2.IMWRITE_WEBP_QUALITY, THUMBNAIL_QUALITY])
+        if ok:
+            return buf.tobytes(), 'image/webp', w, h
+    except cv2.error:
+        pass
+    ok, buf = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, THUMBNAIL_QUALITY])
+    if not ok:
+        raise ValueError("Thumbnail encoding failed.")
+    return buf.tobytes(), 'image/jpeg', w, h
+
+
+class FrameStoreWriter:
+    """
+    검수 세션의 페이지 이미지를 파일 하나에 이어 붙여 저장합니다. (append-only)
+
+    - frames.bin: PNG로 압축한 페이지 데이터와 그 썸네일을 순서대로 연결
+    - frames.idx: 페이지마다 한 줄씩의 JSON 색인
+      {name, offset, length, width, height, time(분석 영상 기준 초), score(직전 페이지 대비 변화량),
+       thumb: {offset, length, mimetype, width, height}}
+
+    데이터를 모두 쓴 뒤에 색인 줄을 추가하므로, 읽는 쪽은 색인에 있는 페이지만 보면 항상 완전한 데이터를 얻습니다.
+    여러 스레드에서 동시에 append해도 안전하며, 기존 저장소에 이어서 쓸 수도 있습니다. (재선택)
+    """
+
+    def __init__(self, session_dir: str, fps: float = 30.0, start_f: int = 0):
+        self._data = open(os.path.join(session_dir, FRAME_DATA_FILE), 'ab')
+        self._index = open(os.path.join(session_dir, FRAME_INDEX_FILE), 'a', encoding='utf-8')
+        self._lock = threading.Lock()
+        self.fps = fps
+        self.start_f = start_f
+
+    def set_timing(self, fps: float, start_f: int):
+        self.fps = fps
+        self.start_f = start_f
+
+    def append(self, name: str, image: 'np.ndarray', offset: Optional[int] = None,
+               score: Optional[float] = None, time: Optional[float] = None):
+        """ image(BGR)를 PNG와 썸네일로 압축하여 추가합니다. offset은 start_f 기준 프레임 오프셋입니다. """
+        import cv2
+
+        # 압축은 잠금 밖에서 (여러 기록 스레드가 동시에 수행)
+        ok, buf = cv2.imencode('.png', image)
+        if not ok:
+            raise ValueError(f"PNG encoding failed: {name}")
+        thumb, thumb_type, thumb_w, thumb_h = encode_thumbnail(image)
+        if time is None and offset is not None:
+            time = (self.start_f + offset) / self.fps
+
+        h, w = image.shape[:2]
+        with self._lock:
+            self._data.seek(0, os.SEEK_END)
+            start = self._data.tell()
+            record = {'name': name, 'offset': start, 'length': len(buf), 'width': w, 'height': h,
+                      'time': time, 'score': score,
+                      'thumb': {'offset': start + len(buf), 'length': len(thumb), 'mimetype': thumb_type,
+                                'width': thumb_w, 'height': thumb_h}}
+            self._data.write(buf.tobytes())
+            self._data.write(thumb)
+            self._data.flush()
+            self._index.write(json.dumps(record) + '\n')
+            self._index.flush()
+
+    def close(self):
+        self._data.close()
+        self._index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+# 세션 폴더 -> (색인 파일 크기, {이름: 기록}). 색인은 추가만 되므로 크기가 같으면 내용도 같음
+_INDEX_CACHE: Dict[str, tuple] = {}
+_INDEX_CACHE_SIZE = 32  # 최근 사용한 세션 수
+_INDEX_LOCK = threading.Lock()
+
+
+def has_frame_store(session_dir: str) -> bool:
+    return os.path.exists(os.path.join(session_dir, FRAME_INDEX_FILE))
+
+
+def load_frame_index(session_dir: str) -> Dict[str, Dict[str, Any]]:
+    """ 저장된 순서대로의 {이름: 기록}을 반환합니다. 색인이 바뀌지 않았으면 캐시를 그대로 사용합니다. """
+    index_path = os.path.join(session_dir, FRAME_INDEX_FILE)
+    try:
+        size = os.path.getsize(index_path)
+    except OSError:
+        return {}
+
+    with _INDEX_LOCK:
+        cached = _INDEX_CACHE.pop(session_dir, None)
+        if cached is not None and cached[0] == size:
+            _INDEX_CACHE[session_dir] = cached  # 가장 최근 사용으로 이동
+            return cached[1]
+
+    records = {}
+    with open(index_path, encoding='utf-8') as f:
+        for line in f.read(size).splitlines():
+            if line:
+                record = json.loads(line)
+                records[record['name']] = record
+    with _INDEX_LOCK:
+        _INDEX_CACHE[session_dir] = (size, records)
+        while len(_INDEX_CACHE) > _INDEX_CACHE_SIZE:
+            del _INDEX_CACHE[next(iter(_INDEX_CACHE))]
+    return records
+
+
+class FrameStore:
+    """
+    frames.bin을 메모리 맵으로 열어 페이지 데이터를 복사 없이(memoryview) 읽습니다.
+
+    with 블록 안에서만 사용하며, 반환된 memoryview는 블록을 벗어나기 전에 다 써야 합니다.
+    """
+
+    def __init__(self, session_dir: str):
+        self.index = load_frame_index(session_dir)
+        self._file = open(os.path.join(session_dir, FRAME_DATA_FILE), 'rb')
+        size = os.fstat(self._file.fileno()).st_size
+        # 빈 파일은 매핑할 수 없음 (Windows)
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        self._views = []
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.index
+
+    def view(self, name: str) -> memoryview:
+        record = self.index[name]
+        view = memoryview(self._map)[record['offset']:record['offset'] + record['length']]
+        self._views.append(view)
+        return view
+
+    def close(self):
+        # 내보낸 memoryview가 남아 있으면 mmap을 닫을 수 없으므로 먼저 해제
+        for view in self._views:
+            view.release()
+        self._views = []
+        if self._map is not None:
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def frame_entry(record: Dict[str, Any], thumbnail: bool = False) -> Dict[str, Any]:
+    """ 원본 또는 썸네일의 {offset, length, mimetype, width, height} """
+    if thumbnail:
+        return record['thumb']
+    return {'offset': record['offset'], 'length': record['length'], 'mimetype': 'image/png',
+            'width': record['width'], 'height': record['height']}
+
+
+class FrameReader(io.RawIOBase):
+    """
+    frames.bin에서 페이지 하나(또는 썸네일)의 구간만 읽는 파일 객체. (응답 본문용)
+
+    구간 시작 위치로 이동해 둔 실제 파일이므로, wsgi.file_wrapper로 sendfile을 쓰는 서버(gunicorn 등)는
+    Content-Length만큼을 커널에서 바로 전송합니다. seek/tell은 구간 시작 기준입니다. (Range 요청)
+    """
+
+    def __init__(self, path: str, offset: int, length: int):
+        super().__init__()
+        self._file = open(path, 'rb', buffering=0)
+        self._start = offset
+        self._end = offset + length
+        self._file.seek(offset)
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def fileno(self) -> int:
+        return self._file.fileno()
+
+    def tell(self) -> int:
+        return self._file.tell() - self._start
+
+    def seek(self, pos: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: self._start, io.SEEK_CUR: self._file.tell(), io.SEEK_END: self._end}[whence]
+        self._file.seek(min(max(base + pos, self._start), self._end))
+        return self.tell()
+
+    def readinto(self, buffer) -> int:
+        remaining = self._end - self._file.tell()
+        if remaining <= 0:
+            return 0
+        return self._file.readinto(memoryview(buffer)[:remaining])
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+
+def open_frame(session_dir: str, entry: Dict[str, Any]) -> FrameReader:
+    """ frame_entry()가 반환한 구간을 읽는 파일 객체를 엽니다. 전체 파일을 매핑하거나 데이터를 미리 읽지 않습니다. """
+    return FrameReader(os.path.join(session_dir, FRAME_DATA_FILE), entry['offset'], entry['length'])
@@ -2,134 +2,828 @@
 
 import cv2
 import io
+import math
+import multiprocessing
 import numpy as np
 import os
-from typing import Optional, List
+import queue
+import shutil
+import signal
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from functools import partial
+from typing import Any, Callable, Iterable, Optional, List, Tuple
+
+from modules import metrics
+from modules.cancellation import CancelToken, check_cancelled, kill_on_cancel
+from modules.feature_store import FeatureWriter, pack_features
+from modules.frame_source import crop_bounds, iter_stream_frames, open_file_frames
+from modules.youtube_downloader import kill_process_tree
+from modules.frame_store import FrameStoreWriter
+from modules.page_index import PageIndex, phash
+
+
+class AnalysisPlan:
+    """
+    프레임 분석에 필요한 상수와 커널을 미리 계산해 둔 계획.
 
+    analysis_width가 주어지면 크롭 ROI를 해당 폭으로 축소한 뒤 마스킹/비교를 수행하고,
+    모폴로지 커널도 같은 비율로 줄여 마스크가 덮는 상대 면적을 유지합니다.
+    변화량은 '바뀐 픽셀 비율 x 255'이므로 해상도와 무관하며, 같은 threshold를 그대로 사용합니다.
+    전체 해상도 픽셀은 저장되는 페이지에만 사용됩니다.
+    """
 
-def process_video_frames(
-        video_path: str, output_dir: str,
-        start_time: Optional[int], end_time: Optional[int],
-        x_start: int, x_end: int, y_start: int, y_end: int,
-        threshold: float, frame_interval_sec: float = 1.0
-) -> List[str]:
+    SATURATION_MIN = 10
+    VALUE_MIN = 50
+    BINARY_THRESHOLD = 200
+    KERNEL_SIZE = 5
+    DILATE_ITERATIONS = 2  # 3회에서 2회로 조정 (성능)
+
+    def __init__(self, analysis_width: Optional[int] = None):
+        self.analysis_width = analysis_width
+        self._sizes = {}  # (w, h) -> (분석 크기 또는 None, 커널)
+
+    def prepare(self, cropped: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """ 분석용 영상(필요 시 축소)과 해당 크기에 맞는 커널을 반환합니다. """
+        h, w = cropped.shape[:2]
+        entry = self._sizes.get((w, h))
+        if entry is None:
+            target, kernel_size = None, self.KERNEL_SIZE
+            if self.analysis_width and w > self.analysis_width:
+                scale = self.analysis_width / w
+                target = (self.analysis_width, max(int(round(h * scale)), 1))
+                # 홀수 크기 유지, 최소 3
+                kernel_size = max(3, int(round(self.KERNEL_SIZE * scale)) | 1)
+            kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (kernel_size, kernel_size))
+            entry = self._sizes[(w, h)] = (target, kernel)
+
+        target, kernel = entry
+        if target is not None:
+            cropped = cv2.resize(cropped, target, interpolation=cv2.INTER_AREA)
+        return cropped, kernel
+
+
+def _analyze_frame(cropped: np.ndarray, plan: AnalysisPlan) -> Tuple[np.ndarray, np.ndarray]:
+    """ 크롭된 프레임에서 하이라이트를 제거한 이진 영상과 가변 영역 마스크를 계산합니다. """
+    image, kernel = plan.prepare(cropped)
+
+    # 1. HSV 변환 및 채도/명도 기반 마스킹 (메모리 재사용 고려)
+    hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
+    s_channel = hsv[:, :, 1]
+    v_channel = hsv[:, :, 2]
+
+    # 채도 10 이상 & 명도 50 이상 영역 추출
+    _, s_mask = cv2.threshold(s_channel, plan.SATURATION_MIN, 255, cv2.THRESH_BINARY)
+    _, v_mask = cv2.threshold(v_channel, plan.VALUE_MIN, 255, cv2.THRESH_BINARY)
+    color_mask = cv2.bitwise_and(s_mask, v_mask)
+
+    # 모폴로지 및 팽창 (커널 연산 통합)
+    color_mask = cv2.morphologyEx(color_mask, cv2.MORPH_CLOSE, kernel)
+    dilated_mask = cv2.dilate(color_mask, kernel, iterations=plan.DILATE_ITERATIONS)
+
+    # 2. 그레이스케일 변환 및 하이라이트 제거
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    # 마스크 영역을 흰색으로 덮어씀 (Inpainting 대체)
+    gray[dilated_mask > 0] = 255
+
+    # 3. 이진화
+    _, binary = cv2.threshold(gray, plan.BINARY_THRESHOLD, 255, cv2.THRESH_BINARY)
+    return binary, dilated_mask
+
+
+def _diff_score(last_binary: np.ndarray, last_mask: np.ndarray,
+                binary: np.ndarray, dilated_mask: np.ndarray) -> float:
+    """ 직전 저장 페이지 대비 변화량(0~255 평균)을 계산합니다. """
+    # XOR 대신 absdiff 사용 - 속도면에서 유사하나 직관적
+    diff = cv2.absdiff(last_binary, binary)
+
+    # 가변 영역(바 이동 경로) 무시
+    unstable_region = cv2.bitwise_or(last_mask, dilated_mask)
+    diff[unstable_region > 0] = 0
+
+    # 평균 변화량 계산 (전체 면적 대비 변화율)
+    return float(np.mean(diff))
+
+
+class _ChangeDetector:
+    """ 직전에 저장된 페이지(reference)와 비교하여 새 페이지 여부를 판정합니다. """
+
+    def __init__(self, threshold: float, plan: Optional[AnalysisPlan] = None):
+        self.threshold = threshold
+        self.plan = plan or AnalysisPlan()
+        self.reference = None  # (binary, dilated_mask)
+
+    def analyze(self, cropped: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        with metrics.timed('analyze'):
+            features = _analyze_frame(cropped, self.plan)
+        metrics.count_frames('analysed')
+        return features
+
+    def score(self, features: Tuple[np.ndarray, np.ndarray]) -> Optional[float]:
+        """ 기준 페이지 대비 변화량 (기준 페이지가 없으면 None) """
+        if self.reference is None:
+            return None
+        return _diff_score(*self.reference, *features)
+
+    def is_new_page(self, features: Tuple[np.ndarray, np.ndarray]) -> bool:
+        score = self.score(features)
+        return score is None or score > self.threshold
+
+    def accept(self, features: Tuple[np.ndarray, np.ndarray]):
+        self.reference = features
+
+
+# 파이프라인 모드: 디코딩 대기열 길이와 PNG 저장 스레드 수
+PIPELINE_QUEUE_SIZE = 8
+PIPELINE_WRITERS = 2
+
+
+def _prefetch_frames(frames: Iterable[Tuple[int, np.ndarray]], maxsize: int = PIPELINE_QUEUE_SIZE):
     """
-    영상에서 악보 프레임을 최적화된 방식으로 추출합니다.
+    별도 디코딩 스레드에서 frames를 미리 읽어 크기가 제한된 대기열로 넘깁니다.
 
-    최적화 포인트:
-    1. cap.set() 대신 cap.grab()을 사용하여 프레임 건너뛰기 속도 개선.
-    2. 마스크 연산 시 불필요한 복사를 줄이고 비트 연산 최적화.
-    3. 메모리 효율을 위해 대형 객체 재사용.
+    대기열이 가득 차면 디코더가 멈추므로(backpressure) 메모리 사용량이 제한됩니다.
+    OpenCV/파이프 읽기는 GIL을 해제하므로 분석과 디코딩이 실제로 겹쳐 실행됩니다.
+    """
+    q: "queue.Queue" = queue.Queue(maxsize=maxsize)
+    stop = threading.Event()
+    done = object()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def producer():
+        try:
+            for item in frames:
+                if not put(item):
+                    return
+            put(done)
+        except BaseException as e:
+            put(e)
+
+    # 디코딩 스레드의 단계 시간도 현재 작업의 timings에 기록되도록 컨텍스트를 넘김
+    thread = threading.Thread(target=metrics.bind_context(producer), name='frame-decoder', daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = q.get()
+            if item is done:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        # 소비자가 먼저 끝나면 디코딩 스레드도 정리
+        stop.set()
+        thread.join()
+
+
+class _PageWriter:
+    """
+    저장할 페이지를 PNG로 기록합니다.
+
+    workers > 0이면 스레드 풀에서 비동기로 압축/기록하며, 동시에 진행 중인 기록 수를 제한합니다.
+    파일 이름은 제출 순서대로 정해지므로 페이지 순서는 항상 결정적입니다.
+
+    page_index가 주어지면 이전에 저장한 모든 페이지와 지각 해시를 비교하여
+    정책에 따라 중복 페이지를 건너뛰거나 표시합니다.
+
+    encoder가 주어지면 파일을 쓰지 않고 encoder(크롭 프레임)의 결과를 메모리에 모읍니다.
+    frame_store가 주어지면 개별 PNG 파일 대신 세션 프레임 저장소에 추가합니다. (경로의 파일 이름으로 등록)
+    close() 이후 pages에는 페이지 순서대로 파일 경로 또는 encoder 결과가 들어 있습니다.
+    """
+
+    def __init__(self, output_dir: str, workers: int = 0, page_index: Optional[PageIndex] = None,
+                 encoder: Optional[Callable[[np.ndarray], Any]] = None,
+                 frame_store: Optional[FrameStoreWriter] = None):
+        self.output_dir = output_dir
+        self.page_index = page_index
+        self.encoder = encoder
+        self.frame_store = frame_store
+        self.paths: List[str] = []
+        self.pages: List[Any] = []
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='page-writer') if workers else None
+        self._slots = threading.BoundedSemaphore(workers * 2) if workers else None
+        self._futures = []
+
+    def write(self, cropped: np.ndarray, features: Tuple[np.ndarray, np.ndarray],
+              offset: Optional[int] = None, score: Optional[float] = None) -> Optional[str]:
+        """
+        페이지를 기록하고 경로를 반환합니다. 중복으로 건너뛴 경우 None
+
+        offset(시작 프레임 기준)과 score(직전 페이지 대비 변화량)는 프레임 저장소의 메타데이터로 남습니다.
+        """
+        img_path = os.path.join(self.output_dir, f'frame_{len(self.paths):04d}.png')
+        if not self.register(img_path, phash(features[0]) if self.page_index else None):
+            return None
+
+        self.paths.append(img_path)
+        metrics.count_frames('saved')
+        if self._pool is None:
+            self.pages.append(self._store(img_path, cropped, offset, score))
+        else:
+            self._slots.acquire()
+            future = self._pool.submit(metrics.bind_context(self._store), img_path, cropped, offset, score)
+            future.add_done_callback(lambda _: self._slots.release())
+            self._futures.append(future)
+        return img_path
+
+    def _store(self, img_path: str, cropped: np.ndarray, offset: Optional[int] = None,
+               score: Optional[float] = None) -> Any:
+        if self.encoder is not None:
+            with metrics.timed('page_encode'):
+                return self.encoder(cropped)
+        with metrics.timed('page_write'):
+            if self.frame_store is not None:
+                self.frame_store.append(os.path.basename(img_path), cropped, offset, score)
+            else:
+                cv2.imwrite(img_path, cropped)
+        return img_path
+
+    def register(self, img_path: str, page_hash: Optional[int]) -> bool:
+        """ 페이지 색인에 등록합니다. skip 정책에서 중복이면 False를 반환합니다. """
+        if self.page_index is None:
+            return True
+        page_id = os.path.basename(img_path)
+        duplicate_of = self.page_index.find_duplicate(page_hash)
+        if duplicate_of is not None and self.page_index.policy == 'skip':
+            return False
+        self.page_index.add(page_hash, page_id, duplicate_of)
+        return True
+
+    def close(self):
+        """ 남은 기록을 모두 기다리고, 실패한 기록이 있으면 예외를 다시 발생시킵니다. """
+        if self._pool is None:
+            return
+        try:
+            self.pages = [future.result() for future in self._futures]
+        finally:
+            self._pool.shutdown(wait=True)
+
+
+def _extract_pages(
+        frames: Iterable[Tuple[int, np.ndarray]], output_dir: str,
+        threshold: float, frame_step: int, total: int,
+        progress_callback: Optional[Callable[[int, int, int], None]] = None,
+        feature_writer: Optional[FeatureWriter] = None,
+        pipeline: bool = False, plan: Optional[AnalysisPlan] = None,
+        page_index: Optional[PageIndex] = None, page_encoder: Optional[Callable[[np.ndarray], Any]] = None,
+        frame_store: Optional[FrameStoreWriter] = None, cancel_token: Optional[CancelToken] = None
+) -> List[Any]:
+    """
+    (시작 프레임 기준 오프셋, 크롭 프레임) 이터레이터를 받아
+    직전 저장 페이지와의 변화량이 threshold를 넘는 프레임만 PNG로 저장합니다.
+    (page_encoder가 있으면 파일 대신 인코딩 결과를 반환)
+
+    feature_writer가 주어지면 모든 샘플의 특징을 기록하여 threshold 재조정에 사용합니다.
+    pipeline=True이면 디코딩 스레드 -> 분석(현재 스레드) -> PNG 저장 스레드 풀로 나누어 실행합니다.
+    """
+    detector = _ChangeDetector(threshold, plan)
+    writer = _PageWriter(output_dir, PIPELINE_WRITERS if pipeline else 0, page_index, page_encoder, frame_store)
+    if pipeline:
+        frames = _prefetch_frames(frames)
+
+    # Local environment: limit removed
+    # MAX_IMAGES = 200
+
+    try:
+        for offset, cropped in frames:
+            check_cancelled(cancel_token)
+            features = detector.analyze(cropped)
+            score = detector.score(features)
+            saved = False
+            if score is None or score > threshold:
+                # 중복으로 건너뛰어도 기준 페이지는 갱신 (같은 페이지를 반복 판정하지 않도록)
+                saved = writer.write(cropped, features, offset, score) is not None
+                detector.accept(features)
+
+                # Local environment: limit removed
+                # if len(writer.paths) >= MAX_IMAGES:
+                #     break
+
+            if feature_writer:
+                feature_writer.append(offset, features, saved)
+
+            if progress_callback:
+                progress_callback(min(offset + frame_step, total), total, len(writer.paths))
+    finally:
+        if pipeline:
+            frames.close()
+        writer.close()
+
+    return writer.pages
+
+
+def _opencv_frames(cap, start_f: int, end_f: int, frame_step: int,
+                   x_start: int, x_end: int, y_start: int, y_end: int):
+    """ VideoCapture에서 frame_step 간격으로 크롭 프레임을 읽어옵니다. """
+    # 시작 지점으로 이동 (최초 1회는 set 사용)
+    cap.set(cv2.CAP_PROP_POS_FRAMES, start_f)
+    current_frame = start_f
+
+    while current_frame < end_f:
+        started = time.perf_counter()
+        ret, frame = cap.read()
+        if not ret:
+            break
+        metrics.observe_stage('decode', time.perf_counter() - started)
+        metrics.count_frames('decoded')
+
+        h, w = frame.shape[:2]
+        # 크롭 영역 계산 및 유효성 검사
+        y1, y2, x1, x2 = crop_bounds(h, w, x_start, x_end, y_start, y_end)
+        cropped = frame[y1:y2, x1:x2]
+        if cropped.size > 0:
+            yield current_frame - start_f, cropped
+
+        # 핵심: 다음 분석 프레임까지 순차적으로 grab() 하여 속도 향상
+        # cap.set()을 반복하는 것보다 cap.grab()이 프레임 간격이 짧을 때 훨씬 빠름
+        started, grabbed = time.perf_counter(), 0
+        for _ in range(frame_step - 1):
+            if not cap.grab():
+                break
+            grabbed += 1
+        if grabbed:
+            metrics.observe_stage('grab', time.perf_counter() - started)
+            metrics.count_frames('decoded', grabbed)
+        current_frame += frame_step
+
+
+class _RandomAccessReader:
+    """
+    임의 위치의 크롭 프레임과 특징을 읽어오는 도우미 (적응형 샘플링용).
+
+    가까운 앞쪽 위치는 grab()으로 전진하고, 그 외에는 seek합니다.
+    최근에 읽은 프레임은 작은 캐시에 보관하여 이분 탐색 중 중복 디코딩을 피합니다.
     """
-    print(f"🚀 Optimized Processing Start: Threshold={threshold}, Interval={frame_interval_sec}s")
 
+    CACHE_SIZE = 8
+
+    def __init__(self, cap, detector: _ChangeDetector, crop_percent: Tuple[int, int, int, int], grab_limit: int):
+        self.cap = cap
+        self.detector = detector
+        self.crop_percent = crop_percent
+        self.grab_limit = grab_limit
+        self.next_pos = None  # 다음 read()가 반환할 프레임 번호
+        self.decoded = 0
+        self._cache = {}
+
+    def read(self, frame_idx: int):
+        """ (크롭 프레임, 특징)을 반환합니다. 읽을 수 없거나 크롭이 비면 None """
+        if frame_idx in self._cache:
+            return self._cache[frame_idx]
+
+        started = time.perf_counter()
+        gap = None if self.next_pos is None else frame_idx - self.next_pos
+        if gap is not None and 0 <= gap <= self.grab_limit:
+            for _ in range(gap):
+                self.cap.grab()
+            metrics.count_frames('decoded', gap)
+        else:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
+        ret, frame = self.cap.read()
+        metrics.observe_stage('decode', time.perf_counter() - started)
+        metrics.count_frames('decoded')
+        self.next_pos = frame_idx + 1
+        self.decoded += 1
+
+        result = None
+        if ret:
+            h, w = frame.shape[:2]
+            y1, y2, x1, x2 = crop_bounds(h, w, *self.crop_percent)
+            cropped = frame[y1:y2, x1:x2]
+            if cropped.size > 0:
+                result = (cropped, self.detector.analyze(cropped))
+
+        if len(self._cache) >= self.CACHE_SIZE:
+            self._cache.pop(next(iter(self._cache)))
+        self._cache[frame_idx] = result
+        return result
+
+
+def _process_adaptive(
+        cap, output_dir: str, start_f: int, end_f: int, frame_step: int,
+        crop_percent: Tuple[int, int, int, int], threshold: float, coarse_factor: int,
+        progress_callback: Optional[Callable[[int, int, int], None]] = None,
+        feature_writer: Optional[FeatureWriter] = None, plan: Optional[AnalysisPlan] = None,
+        page_index: Optional[PageIndex] = None, page_encoder: Optional[Callable[[np.ndarray], Any]] = None,
+        frame_store: Optional[FrameStoreWriter] = None, cancel_token: Optional[CancelToken] = None
+) -> List[Any]:
+    """
+    거친 간격(frame_step * coarse_factor)으로 훑다가 변화가 감지되면
+    직전 거친 샘플과의 사이를 frame_step 단위로 이분 탐색하여 페이지가 바뀐 지점을 찾고,
+    이후 연속한 두 샘플의 변화량이 threshold 이하가 되는(페이지가 안정된) 프레임을 저장합니다.
+
+    악보 영상은 오랫동안 정지해 있으므로 고정 간격보다 훨씬 적은 프레임만 디코딩합니다.
+    페이지 전환 이후 변화 상태가 유지된다는(단조성) 가정을 사용합니다.
+    """
+    detector = _ChangeDetector(threshold, plan)
+    coarse_step = frame_step * max(coarse_factor, 1)
+    reader = _RandomAccessReader(cap, detector, crop_percent, grab_limit=coarse_step)
+    total = end_f - start_f
+
+    writer = _PageWriter(output_dir, 0, page_index, page_encoder, frame_store)
+    saved_frames = set()
+    visited = {}  # 프레임 번호 -> 특징 (feature_writer 기록용)
+
+    def read(frame_idx):
+        check_cancelled(cancel_token)
+        result = reader.read(frame_idx)
+        if result is not None and feature_writer:
+            visited.setdefault(frame_idx, result[1])
+        return result
+
+    def save(frame_idx, cropped, features):
+        if writer.write(cropped, features, frame_idx - start_f, detector.score(features)) is not None:
+            saved_frames.add(frame_idx)
+        detector.accept(features)
+
+    # 거친 샘플 위치 (마지막 미세 샘플도 반드시 포함)
+    last_fine = start_f + ((end_f - 1 - start_f) // frame_step) * frame_step
+    coarse_positions = list(range(start_f, end_f, coarse_step))
+    if coarse_positions and coarse_positions[-1] != last_fine:
+        coarse_positions.append(last_fine)
+
+    prev = None  # 직전 거친 샘플 (기준 페이지와 같은 상태로 확인된 위치)
+    for c in coarse_positions:
+        current = read(c)
+        if current is None:
+            continue
+
+        while detector.is_new_page(current[1]):
+            if detector.reference is None or prev is None:
+                save(c, *current)
+                break
+
+            # 1. 이분 탐색: prev(변화 없음) ~ c(변화 있음) 사이에서 처음 바뀐 미세 샘플
+            lo, hi = prev, c
+            while hi - lo > frame_step:
+                mid = lo + ((hi - lo) // frame_step // 2) * frame_step
+                probe = read(mid)
+                if probe is not None and detector.is_new_page(probe[1]):
+                    hi = mid
+                else:
+                    lo = mid
+
+            # 2. 안정화: 연속한 미세 샘플 간 변화가 threshold 이하가 될 때까지 전진
+            cand, cand_result = hi, read(hi) or current
+            while cand < c:
+                nxt_result = read(cand + frame_step)
+                if nxt_result is None:
+                    break
+                if _diff_score(*cand_result[1], *nxt_result[1]) <= threshold:
+                    break
+                cand, cand_result = cand + frame_step, nxt_result
+
+            save(cand, *cand_result)
+            # 같은 거친 구간 안에서 페이지가 또 바뀌었을 수 있으므로 c를 새 기준과 다시 비교
+            prev = cand
+        prev = c
+
+        if progress_callback:
+            progress_callback(min(c - start_f + frame_step, total), total, len(writer.pages))
+
+    if feature_writer:
+        for frame_idx in sorted(visited):
+            feature_writer.append(frame_idx - start_f, visited[frame_idx], frame_idx in saved_frames)
+
+    print(f"🔎 Adaptive sampling decoded {reader.decoded} frames "
+          f"(fixed sampling would analyse {math.ceil(total / frame_step)}).")
+    return writer.pages
+
+
+# 병렬 모드에서 구간 하나가 가져야 할 최소 샘플 수 (너무 잘게 나누면 탐색 비용이 커짐)
+MIN_SEGMENT_SAMPLES = 60
+
+
+def _analyze_segment(video_path: str, seg_dir: str, seg_start: int, seg_end: int, frame_step: int,
+                     crop_percent: Tuple[int, int, int, int], threshold: float,
+                     record_features: bool = False, plan: Optional[AnalysisPlan] = None):
+    """
+    워커 프로세스: 구간 첫 프레임을 기준으로 독립적인 변화 감지를 수행합니다.
+
+    반환값은 ([(프레임 번호, 이미지 경로), ...], 마지막 저장 페이지의 특징,
+    [(프레임 번호, 압축 특징), ...], 통계)입니다. 압축 특징은 record_features일 때만 채워집니다.
+    통계 {'seconds', 'analysed', 'decoded'}는 워커 프로세스의 지표를 부모 프로세스에서 기록하기 위한 값입니다.
+    """
+    started = time.perf_counter()
     cap = cv2.VideoCapture(video_path)
     if not cap.isOpened():
         raise IOError("Cannot open video file.")
 
+    detector = _ChangeDetector(threshold, plan)
+    pages = []
+    packed_features = []
+    analysed = 0
     try:
-        # 1. 좌표 및 시간 초기 설정
-        x_s, x_e = x_start / 100.0, x_end / 100.0
-        y_s, y_e = y_start / 100.0, y_end / 100.0
+        for offset, cropped in _opencv_frames(cap, seg_start, seg_end, frame_step, *crop_percent):
+            features = detector.analyze(cropped)
+            analysed += 1
+            if record_features:
+                packed_features.append((seg_start + offset, pack_features(*features)))
+            if detector.is_new_page(features):
+                frame_idx = seg_start + offset
+                img_path = os.path.join(seg_dir, f'{frame_idx:09d}.png')
+                cv2.imwrite(img_path, cropped)
+                pages.append((frame_idx, img_path))
+                detector.accept(features)
+    finally:
+        cap.release()
+    # 구간은 read()/grab()으로 순차 디코딩하므로 (분석 수 x 간격)이 디코딩한 프레임 수
+    stats = {'seconds': time.perf_counter() - started, 'analysed': analysed,
+             'decoded': min(seg_end - seg_start, analysed * frame_step)}
+    return pages, detector.reference, packed_features, stats
 
-        fps = cap.get(cv2.CAP_PROP_FPS) or 30
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
 
-        start_f = int(start_time * fps) if start_time else 0
-        end_f = int(end_time * fps) if end_time else total_frames
-        frame_step = max(int(fps * frame_interval_sec), 1)
+def _reconcile_segment(cap, detector: _ChangeDetector, seg_dir: str, seg_start: int, seg_end: int,
+                       frame_step: int, crop_percent: Tuple[int, int, int, int], local_pages, local_reference,
+                       cancel_token: Optional[CancelToken] = None):
+    """
+    이전 구간의 실제 마지막 저장 페이지(detector.reference)를 기준으로 구간 앞부분을 다시 판정합니다.
 
-        # 시작 지점으로 이동 (최초 1회는 set 사용)
-        cap.set(cv2.CAP_PROP_POS_FRAMES, start_f)
-        current_frame = start_f
+    순차 실행과 워커 결과가 같은 프레임을 저장하는 순간 두 판정의 기준 페이지가 같아지므로,
+    그 이후의 워커 결과는 그대로 사용할 수 있습니다. 동기화 전까지는 순차 실행과 같은 판정을
+    직접 수행하여 결과가 순차 실행과 완전히 동일하도록 보장합니다.
+    """
+    local_frames = {frame_idx for frame_idx, _ in local_pages}
+    pages = []
+
+    for offset, cropped in _opencv_frames(cap, seg_start, seg_end, frame_step, *crop_percent):
+        check_cancelled(cancel_token)
+        frame_idx = seg_start + offset
+        features = detector.analyze(cropped)
+        if not detector.is_new_page(features):
+            continue
+
+        if frame_idx in local_frames:
+            # 동기화 지점: 이후 판정은 워커 결과와 동일
+            pages.extend(page for page in local_pages if page[0] >= frame_idx)
+            detector.accept(local_reference)
+            return pages
+
+        img_path = os.path.join(seg_dir, f'{frame_idx:09d}.png')
+        cv2.imwrite(img_path, cropped)
+        pages.append((frame_idx, img_path))
+        detector.accept(features)
+
+    return pages
+
+
+def _report_worker_pid(worker_pids):
+    """ 병렬 분석 워커 초기화: 취소 시 종료할 수 있도록 자신의 pid를 부모에게 알립니다. """
+    worker_pids.put(os.getpid())
+
+
+def _terminate_pool(pool: ProcessPoolExecutor, worker_pids):
+    """ 대기 중인 구간을 취소하고 실행 중인 워커 프로세스를 종료합니다. (작업 취소 시) """
+    pool.shutdown(wait=False, cancel_futures=True)
+    # ProcessPoolExecutor에는 실행 중인 작업을 멈추는 공개 API가 없으므로 워커가 알려 온 pid로 직접 종료
+    while not worker_pids.empty():
+        try:
+            os.kill(worker_pids.get(), signal.SIGTERM)  # Windows에서는 TerminateProcess
+        except OSError:
+            pass  # 이미 종료됨
+
+
+def _process_segments_parallel(
+        video_path: str, output_dir: str, start_f: int, end_f: int, frame_step: int,
+        crop_percent: Tuple[int, int, int, int], threshold: float, workers: int,
+        progress_callback: Optional[Callable[[int, int, int], None]] = None,
+        feature_writer: Optional[FeatureWriter] = None, plan: Optional[AnalysisPlan] = None,
+        page_index: Optional[PageIndex] = None, page_encoder: Optional[Callable[[np.ndarray], Any]] = None,
+        frame_store: Optional[FrameStoreWriter] = None, cancel_token: Optional[CancelToken] = None
+) -> List[Any]:
+    """
+    [start_f, end_f) 구간을 샘플 격자에 맞춰 나눈 뒤 프로세스 풀에서 구간별로 분석하고,
+    구간 경계에서 순차 실행과 같은 결과가 되도록 재조정합니다.
 
-        processed_image_paths = []
-        last_binary_frame = None
-        last_dilated_mask = None
+    cancel_token이 취소되면 남은 구간을 취소하고 실행 중인 워커 프로세스를 종료합니다.
+    """
+    n_samples = math.ceil((end_f - start_f) / frame_step)
+    n_segments = max(1, min(workers * 2, n_samples // MIN_SEGMENT_SAMPLES))
+    bounds = [start_f + (n_samples * i // n_segments) * frame_step for i in range(n_segments)] + [end_f]
+    segments = [(bounds[i], min(bounds[i + 1], end_f)) for i in range(n_segments)]
 
-        # Local environment: limit removed
-        # MAX_IMAGES = 200
-        kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (5, 5))
+    work_dir = os.path.join(output_dir, '.segments')
+    os.makedirs(work_dir, exist_ok=True)
 
-        while current_frame < end_f:
-            ret, frame = cap.read()
-            if not ret:
-                break
+    total = end_f - start_f
+    results = {}
+    try:
+        # spawn: 서버 스레드가 있는 상태에서 fork하지 않도록 함
+        mp_context = multiprocessing.get_context('spawn')
+        worker_pids = mp_context.SimpleQueue()
+        with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context, initializer=_report_worker_pid,
+                                 initargs=(worker_pids,)) as pool, \
+                kill_on_cancel(cancel_token, pool, kill=partial(_terminate_pool, worker_pids=worker_pids)):
+            futures = {
+                pool.submit(_analyze_segment, video_path, work_dir, seg_start, seg_end,
+                            frame_step, crop_percent, threshold, feature_writer is not None, plan): i
+                for i, (seg_start, seg_end) in enumerate(segments)
+            }
+            analysed = 0
+            for future in as_completed(futures):
+                check_cancelled(cancel_token)
+                i = futures[future]
+                results[i] = future.result()
+                stats = results[i][3]
+                metrics.observe_stage('segment', stats['seconds'])
+                metrics.count_frames('analysed', stats['analysed'])
+                metrics.count_frames('decoded', stats['decoded'])
+                seg_start, seg_end = segments[i]
+                analysed += seg_end - seg_start
+                if progress_callback:
+                    progress_callback(min(analysed, total), total, sum(len(r[0]) for r in results.values()))
+
+        # 구간 경계 재조정 (부모 프로세스에서 순서대로)
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            raise IOError("Cannot open video file.")
+        detector = _ChangeDetector(threshold, plan)
+        pages = []
+        try:
+            for i, (seg_start, seg_end) in enumerate(segments):
+                local_pages, local_reference = results[i][:2]
+                pages.extend(_reconcile_segment(cap, detector, work_dir, seg_start, seg_end, frame_step,
+                                                crop_percent, local_pages, local_reference, cancel_token))
+        finally:
+            cap.release()
+
+        # 전체 페이지 순서가 확정된 뒤 중복 색인을 적용 (저장된 페이지만 다시 분석하면 됨)
+        writer = _PageWriter(output_dir, 0, page_index, page_encoder, frame_store)
+        saved_frames = set()
+        reference = None  # 직전 저장 후보 페이지의 특징 (변화량 기록용)
+        for frame_idx, src_path in pages:
+            img_path = os.path.join(output_dir, f'frame_{len(writer.paths):04d}.png')
+            if page_index or page_encoder or frame_store:
+                image = cv2.imread(src_path)
+                features = detector.analyze(image)
+                score = _diff_score(*reference, *features) if reference is not None else None
+                reference = features
+            else:
+                image, features, score = None, None, None
+            page_hash = phash(features[0]) if page_index else None
+            if not writer.register(img_path, page_hash):
+                continue
+            writer.paths.append(img_path)
+            metrics.count_frames('saved')
+            if page_encoder or frame_store:
+                writer.pages.append(writer._store(img_path, image, frame_idx - start_f, score))
+            else:
+                os.replace(src_path, img_path)
+                writer.pages.append(img_path)
+            saved_frames.add(frame_idx)
+        processed_image_paths = writer.pages
+
+        if feature_writer:
+            for i in range(len(segments)):
+                for frame_idx, packed in results[i][2]:
+                    feature_writer.append_packed(frame_idx - start_f, packed, frame_idx in saved_frames)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
 
-            h, w = frame.shape[:2]
-            # 크롭 영역 계산 및 유효성 검사
-            y1, y2 = int(h * y_s), int(h * y_e)
-            x1, x2 = int(w * x_s), int(w * x_e)
+    return processed_image_paths
 
-            cropped = frame[y1:y2, x1:x2]
-            if cropped.size == 0:
-                # 다음 구간까지 grab()으로 건너뛰기
-                for _ in range(frame_step - 1):
-                    cap.grab()
-                current_frame += frame_step
-                continue
 
-            # =========================================================
-            # [최적화된 알고리즘 로직]
-            # =========================================================
+def check_processing_options(backend: str, sampling: str = 'fixed', workers: int = 1):
+    """
+    process_video_frames가 지원하는 옵션 조합인지 확인합니다. (지원하지 않는 옵션을 조용히 무시하지 않도록)
 
-            # 1. HSV 변환 및 채도/명도 기반 마스킹 (메모리 재사용 고려)
-            hsv = cv2.cvtColor(cropped, cv2.COLOR_BGR2HSV)
-            s_channel = hsv[:, :, 1]
-            v_channel = hsv[:, :, 2]
+    - 'ffmpeg' 백엔드는 고정 간격(fixed) 순차 분석만 지원합니다.
+    - sampling='adaptive'는 순차 분석만 지원합니다. (workers > 1 불가)
+    """
+    if backend not in ('opencv', 'ffmpeg'):
+        raise ValueError(f"Unknown decode backend: {backend}")
+    if sampling not in ('fixed', 'adaptive'):
+        raise ValueError(f"Unknown sampling mode: {sampling}")
+    if backend == 'ffmpeg' and sampling != 'fixed':
+        raise ValueError("The ffmpeg backend supports only fixed sampling.")
+    if workers > 1 and (backend == 'ffmpeg' or sampling == 'adaptive'):
+        raise ValueError("Parallel analysis (workers > 1) requires the opencv backend with fixed sampling.")
+
+
+def process_video_frames(
+        video_path: str, output_dir: str,
+        start_time: Optional[int], end_time: Optional[int],
+        x_start: int, x_end: int, y_start: int, y_end: int,
+        threshold: float, frame_interval_sec: float = 1.0,
+        progress_callback: Optional[Callable[[int, int, int], None]] = None,
+        backend: str = 'opencv', max_width: Optional[int] = None,
+        workers: int = 1, feature_writer: Optional[FeatureWriter] = None,
+        sampling: str = 'fixed', coarse_factor: int = 4, pipeline: bool = False,
+        analysis_width: Optional[int] = None, page_index: Optional[PageIndex] = None,
+        page_encoder: Optional[Callable[[np.ndarray], Any]] = None,
+        frame_store: Optional[FrameStoreWriter] = None, cancel_token: Optional[CancelToken] = None
+) -> List[Any]:
+    """
+    영상에서 악보 프레임을 최적화된 방식으로 추출합니다.
+
+    최적화 포인트:
+    1. cap.set() 대신 cap.grab()을 사용하여 프레임 건너뛰기 속도 개선.
+    2. 마스크 연산 시 불필요한 복사를 줄이고 비트 연산 최적화.
+    3. 메모리 효율을 위해 대형 객체 재사용.
 
-            # 채도 10 이상 & 명도 50 이상 영역 추출
-            _, s_mask = cv2.threshold(s_channel, 10, 255, cv2.THRESH_BINARY)
-            _, v_mask = cv2.threshold(v_channel, 50, 255, cv2.THRESH_BINARY)
-            color_mask = cv2.bitwise_and(s_mask, v_mask)
+    backend:
+    - 'opencv': cv2.VideoCapture로 전체 프레임을 디코딩한 뒤 Python에서 크롭합니다.
+    - 'ffmpeg': 샘플링/크롭(및 max_width 축소)을 ffmpeg 필터에서 처리하여
+      분석할 ROI 프레임만 파이프로 받습니다. 저장되는 페이지는 opencv 경로와 같습니다.
 
-            # 모폴로지 및 팽창 (커널 연산 통합)
-            color_mask = cv2.morphologyEx(color_mask, cv2.MORPH_CLOSE, kernel)
-            dilated_mask = cv2.dilate(color_mask, kernel, iterations=2)  # 3회에서 2회로 조정 (성능)
+    지원하지 않는 backend/sampling/workers 조합은 ValueError입니다. (check_processing_options 참고)
 
-            # 2. 그레이스케일 변환 및 하이라이트 제거
-            gray = cv2.cvtColor(cropped, cv2.COLOR_BGR2GRAY)
-            # 마스크 영역을 흰색으로 덮어씀 (Inpainting 대체)
-            gray[dilated_mask > 0] = 255
+    workers > 1이면 (opencv 백엔드) 시간 구간을 나누어 프로세스 풀에서 병렬로 분석합니다.
+    구간 경계는 재조정되므로 저장되는 페이지는 순차 실행과 동일합니다.
 
-            # 3. 이진화
-            _, binary = cv2.threshold(gray, 200, 255, cv2.THRESH_BINARY)
+    feature_writer가 주어지면 샘플별 분석 특징(이진 영상, 가변 영역 마스크)을 기록합니다. (FeatureSet.select_pages 참고)
 
-            # 4. 변화량 계산 (XOR 대신 absdiff 사용 - 속도면에서 유사하나 직관적)
-            should_save = False
-            if last_binary_frame is None:
-                should_save = True
-            else:
-                diff = cv2.absdiff(last_binary_frame, binary)
+    sampling='adaptive'이면 (opencv 백엔드) frame_step * coarse_factor 간격으로 훑고
+    변화가 있는 구간만 이분 탐색으로 세밀하게 확인합니다.
 
-                # 가변 영역(바 이동 경로) 무시
-                unstable_region = cv2.bitwise_or(last_dilated_mask, dilated_mask)
-                diff[unstable_region > 0] = 0
+    pipeline=True이면 순차 경로(opencv/ffmpeg)에서 디코딩, 분석, PNG 저장을 서로 다른 스레드에서
+    겹쳐 실행합니다. 저장 결과와 순서는 동일합니다.
 
-                # 평균 변화량 계산 (전체 면적 대비 변화율)
-                diff_score = np.mean(diff)
+    analysis_width가 주어지면 변화 감지를 해당 폭으로 축소한 ROI에서 수행합니다. (AnalysisPlan 참고)
 
-                if diff_score > threshold:
-                    should_save = True
+    page_index가 주어지면 직전 페이지뿐 아니라 이전에 저장한 모든 페이지와 비교하여
+    반복되는 페이지를 건너뛰거나 표시합니다. (PageIndex 참고)
 
-            if should_save:
-                img_path = os.path.join(output_dir, f'frame_{len(processed_image_paths):04d}.png')
-                cv2.imwrite(img_path, cropped)
-                processed_image_paths.append(img_path)
+    page_encoder가 주어지면 페이지를 PNG 파일로 쓰지 않고 page_encoder(크롭 프레임)의 결과 목록을
+    반환합니다. (예: pdf_generator.encode_page_image로 PDF에 바로 넣을 압축 데이터 생성)
 
-                last_binary_frame = binary
-                last_dilated_mask = dilated_mask
+    frame_store가 주어지면 페이지를 개별 PNG 파일 대신 세션 프레임 저장소에 시각/변화량과 함께 추가합니다.
+    반환되는 경로의 파일 이름이 저장소의 페이지 이름입니다.
 
-                # Local environment: limit removed
-                # if len(processed_image_paths) >= MAX_IMAGES:
-                #     break
+    cancel_token이 취소되면 매 샘플마다 확인하여 JobCancelledError로 중단합니다.
+    (ffmpeg 프로세스와 병렬 분석 워커도 즉시 종료)
 
-            # 핵심: 다음 분석 프레임까지 순차적으로 grab() 하여 속도 향상
-            # cap.set()을 반복하는 것보다 cap.grab()이 프레임 간격이 짧을 때 훨씬 빠름
-            for _ in range(frame_step - 1):
-                if not cap.grab():
-                    break
-            current_frame += frame_step
+    progress_callback(analysed, total, saved)가 주어지면 분석한 프레임 위치(end_f - start_f 기준)와
+    저장된 페이지 수를 매 샘플마다 전달합니다.
+    """
+    check_processing_options(backend, sampling, workers)
+    print(f"🚀 Optimized Processing Start: Threshold={threshold}, Interval={frame_interval_sec}s, Backend={backend}, "
+          f"Sampling={sampling}, Workers={workers}")
+    started = time.perf_counter()
+
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise IOError("Cannot open video file.")
+
+    try:
+        # 좌표 및 시간 초기 설정
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+
+        start_f = int(start_time * fps) if start_time else 0
+        end_f = int(end_time * fps) if end_time else total_frames
+        frame_step = max(int(fps * frame_interval_sec), 1)
+        if feature_writer:
+            feature_writer.set_timing(fps, start_f, frame_step)
+        if frame_store:
+            frame_store.set_timing(fps, start_f)
+        plan = AnalysisPlan(analysis_width)
+
+        if backend == 'ffmpeg':
+            # 메타데이터만 읽고 디코딩은 ffmpeg에 맡김
+            src_w = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+            src_h = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            cap.release()
+
+            y1, y2, x1, x2 = crop_bounds(src_h, src_w, x_start, x_end, y_start, y_end)
+            if y2 <= y1 or x2 <= x1:
+                processed_image_paths = []
+            else:
+                with open_file_frames(video_path, (src_w, src_h), fps, start_f, end_f, frame_step,
+                                      (y1, y2, x1, x2), max_width) as stream, \
+                        kill_on_cancel(cancel_token, *stream.procs):
+                    processed_image_paths = _extract_pages(stream.frames, output_dir, threshold, frame_step,
+                                                           end_f - start_f, progress_callback, feature_writer,
+                                                           pipeline, plan, page_index, page_encoder, frame_store,
+                                                           cancel_token)
+        elif sampling == 'adaptive':
+            processed_image_paths = _process_adaptive(
+                cap, output_dir, start_f, end_f, frame_step, (x_start, x_end, y_start, y_end),
+                threshold, coarse_factor, progress_callback, feature_writer, plan, page_index, page_encoder,
+                frame_store, cancel_token
+            )
+        elif workers > 1 and (end_f - start_f) // frame_step >= 2 * MIN_SEGMENT_SAMPLES:
+            cap.release()
+            processed_image_paths = _process_segments_parallel(
+                video_path, output_dir, start_f, end_f, frame_step,
+                (x_start, x_end, y_start, y_end), threshold, workers, progress_callback, feature_writer, plan,
+                page_index, page_encoder, frame_store, cancel_token
+            )
+        else:
+            frames = _opencv_frames(cap, start_f, end_f, frame_step, x_start, x_end, y_start, y_end)
+            processed_image_paths = _extract_pages(frames, output_dir, threshold, frame_step,
+                                                   end_f - start_f, progress_callback, feature_writer,
+                                                   pipeline, plan, page_index, page_encoder, frame_store,
+                                                   cancel_token)
 
     except Exception as e:
         print(f"❌ Error during processing: {e}")
@@ -137,10 +831,117 @@ def process_video_frames(
     finally:
         cap.release()
 
-    print(f"✅ Extracted {len(processed_image_paths)} images.")
+    elapsed = time.perf_counter() - started
+    metrics.observe_stage('extract', elapsed)
+    print(f"✅ Extracted {len(processed_image_paths)} images in {elapsed:.1f}s.")
     return processed_image_paths
 
 
+def process_video_stream(
+        youtube_url: str, output_dir: str,
+        start_time: Optional[int], end_time: Optional[int],
+        x_start: int, x_end: int, y_start: int, y_end: int,
+        threshold: float, frame_interval_sec: float = 1.0,
+        progress_callback: Optional[Callable[[int, int, int], None]] = None,
+        max_width: Optional[int] = None, format_spec: str = "bestvideo",
+        feature_writer: Optional[FeatureWriter] = None, pipeline: bool = False,
+        analysis_width: Optional[int] = None, page_index: Optional[PageIndex] = None,
+        page_encoder: Optional[Callable[[np.ndarray], Any]] = None,
+        frame_store: Optional[FrameStoreWriter] = None, cancel_token: Optional[CancelToken] = None
+) -> List[Any]:
+    """
+    다운로드 완료를 기다리지 않고 yt-dlp -> ffmpeg 파이프에서 도착하는 프레임을 바로 분석합니다.
+
+    다운로드와 분석이 겹쳐 진행되므로 전체 소요 시간은 대략 max(다운로드, 분석)이 됩니다.
+    프레임 선택 규칙(start_f + k * frame_step)과 크롭은 ffmpeg 필터에서 처리되며
+    process_video_frames와 동일합니다. 취소되면 yt-dlp/ffmpeg 프로세스를 즉시 종료합니다.
+    """
+    print(f"🚀 Streaming Processing Start: Threshold={threshold}, Interval={frame_interval_sec}s")
+    started = time.perf_counter()
+
+    with iter_stream_frames(youtube_url, start_time, end_time, frame_interval_sec,
+                            (x_start, x_end, y_start, y_end), format_spec=format_spec,
+                            max_width=max_width) as stream, \
+            kill_on_cancel(cancel_token, *stream.procs, kill=kill_process_tree):
+        if feature_writer:
+            feature_writer.set_timing(stream.fps, stream.start_f, stream.frame_step)
+        if frame_store:
+            frame_store.set_timing(stream.fps, stream.start_f)
+        processed_image_paths = _extract_pages(stream.frames, output_dir, threshold, stream.frame_step,
+                                               stream.end_f - stream.start_f, progress_callback, feature_writer,
+                                               pipeline, AnalysisPlan(analysis_width), page_index, page_encoder,
+                                               frame_store, cancel_token)
+
+    elapsed = time.perf_counter() - started
+    metrics.observe_stage('extract', elapsed)
+    print(f"✅ Extracted {len(processed_image_paths)} images in {elapsed:.1f}s.")
+    return processed_image_paths
+
+
+# seek_frame: 목표보다 뒤에 떨어졌을 때 앞에서 다시 seek하는 최대 횟수
+SEEK_RETRY_LIMIT = 30
+
+
+def seek_frame(cap, target_frame: int, max_grab: Optional[int] = None) -> bool:
+    """
+    target_frame으로 정확히 이동합니다. 다음 read()가 target_frame을 반환하면 True.
+
+    seek은 키프레임 단위로 근사될 수 있으므로 이동 후 CAP_PROP_POS_FRAMES를 다시 읽고,
+    목표보다 앞이면 grab()으로 전진하고 뒤면 1초씩 앞에서 다시 seek합니다.
+    max_grab이 주어지면 그보다 많이 전진해야 할 때는 포기합니다.
+    """
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30
+    seek_to = target_frame
+    for _ in range(SEEK_RETRY_LIMIT):
+        cap.set(cv2.CAP_PROP_POS_FRAMES, seek_to)
+        position = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
+        if position <= target_frame or seek_to == 0:
+            break
+        seek_to = max(0, seek_to - int(fps))
+    gap = target_frame - position
+    if gap < 0 or (max_grab is not None and gap > max_grab):
+        return False
+    for _ in range(gap):
+        if not cap.grab():
+            return False
+    return True
+
+
+def extract_frames_at(video_path: str, times: List[float], output_paths: List[str],
+                      x_start: int, x_end: int, y_start: int, y_end: int,
+                      frame_store: Optional[FrameStoreWriter] = None) -> List[str]:
+    """
+    지정한 시각(초)의 프레임을 크롭하여 output_paths에 저장합니다. (재선택 시 새 페이지 생성용)
+
+    frame_store가 주어지면 파일 대신 저장소에 output_paths의 파일 이름으로 추가합니다.
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise IOError("Cannot open video file.")
+
+    written = []
+    try:
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30
+        for seconds, img_path in sorted(zip(times, output_paths)):
+            if not seek_frame(cap, int(round(seconds * fps))):
+                continue
+            ret, frame = cap.read()
+            if not ret:
+                continue
+            h, w = frame.shape[:2]
+            y1, y2, x1, x2 = crop_bounds(h, w, x_start, x_end, y_start, y_end)
+            cropped = frame[y1:y2, x1:x2]
+            if cropped.size > 0:
+                if frame_store is not None:
+                    frame_store.append(os.path.basename(img_path), cropped, time=seconds)
+                else:
+                    cv2.imwrite(img_path, cropped)
+                written.append(img_path)
+    finally:
+        cap.release()
+    return written
+
+
 def get_single_frame_as_bytes(stream_url, time_sec):
     """미리보기를 위한 단일 프레임 추출 (최적화)"""
     cap = cv2.VideoCapture(stream_url)
@@ -160,4 +961,4 @@ def get_single_frame_as_bytes(stream_url, time_sec):
         success, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 80])
         if success:
             return io.BytesIO(buffer)
-    return None
\ No newline at end of file
+    return None
@@ -0,0 +1,240 @@
+# modules/job_manager.py
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from modules import metrics
+from modules.cancellation import CancelToken, JobCancelledError
+from modules.shared_state import SharedState
+
+# 진행률이 바뀔 때 공유 저장소에 상태를 다시 기록하는 최소 간격 (초)
+PUBLISH_INTERVAL_SEC = 0.5
+
+
+class JobQueueFullError(RuntimeError):
+    """대기열이 가득 차 새 작업을 받을 수 없을 때 발생합니다."""
+
+
+class Job:
+    """ 백그라운드 작업 하나의 상태와 단계별 진행률을 보관합니다. """
+
+    def __init__(self, job_id: str, deadline_sec: Optional[float] = None,
+                 on_change: Optional[Callable[['Job'], None]] = None):
+        self.id = job_id
+        self.status = 'queued'  # queued -> running -> done | error | cancelled
+        self.stage = None
+        self.progress: Dict[str, Dict[str, Any]] = {}
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.timings = metrics.JobTimings()  # 단계별 소요 시간 (작업 실행 중 자동 기록)
+        # 작업 함수는 cancel_token을 주기적으로 확인하여 취소/제한 시간 초과 시 중단
+        self.cancel_token = CancelToken(deadline_sec)
+        self.last_seen = self.created_at  # 클라이언트가 마지막으로 상태를 조회한 시각
+        self._lock = threading.Lock()
+        self._on_change = on_change
+        self._published = 0.0
+
+    def update(self, stage: str, **values):
+        """ 현재 단계를 기록하고 해당 단계의 진행 값을 갱신합니다. """
+        with self._lock:
+            self.stage = stage
+            self.progress.setdefault(stage, {}).update(values)
+        self.changed()
+
+    def changed(self, force: bool = False):
+        """ 상태가 바뀌었음을 알립니다. 진행률 갱신은 PUBLISH_INTERVAL_SEC마다 한 번만 전달됩니다. """
+        if self._on_change is None:
+            return
+        now = time.monotonic()
+        if force or now - self._published >= PUBLISH_INTERVAL_SEC:
+            self._published = now
+            try:
+                self._on_change(self)
+            except Exception as e:
+                print(f"⚠️ Failed to publish job state: {e}")
+
+    def touch(self):
+        self.last_seen = time.time()
+
+    def cancel(self, reason: str = "Job cancelled."):
+        self.cancel_token.cancel(reason)
+
+    @property
+    def active(self) -> bool:
+        return self.status in ('queued', 'running')
+
+    def to_dict(self, timings: bool = False) -> Dict[str, Any]:
+        """ timings=True이면 대기/실행 시간과 단계별 소요 시간을 함께 반환합니다. """
+        with self._lock:
+            data = {
+                'job_id': self.id,
+                'status': self.status,
+                'stage': self.stage,
+                'progress': {k: dict(v) for k, v in self.progress.items()},
+                'error': self.error,
+            }
+        if timings:
+            end = self.finished_at or time.time()
+            data['timings'] = {
+                'queue_sec': round((self.started_at or end) - self.created_at, 3),
+                'run_sec': round(end - self.started_at, 3) if self.started_at else None,
+                'stages': self.timings.to_dict(),
+            }
+        return data
+
+
+class SharedJob:
+    """
+    다른 서버 프로세스가 실행 중인 작업. 공유 저장소에 기록된 상태를 Job과 같은 방식으로 보여 줍니다.
+
+    touch()/cancel()은 공유 저장소에 기록되고, 작업을 실행하는 프로세스가 sync_shared()에서 반영합니다.
+    """
+
+    def __init__(self, job_id: str, record: Dict[str, Any], state: SharedState):
+        self.id = job_id
+        self.status = record['status']
+        self.result = record['result']
+        self.error = record['state'].get('error')
+        self._data = record['state']
+        self._state = state
+
+    @property
+    def active(self) -> bool:
+        return self.status in ('queued', 'running')
+
+    def touch(self):
+        self._state.touch_job(self.id)
+
+    def cancel(self, reason: str = "Job cancelled."):
+        self._state.request_job_cancel(self.id, reason)
+
+    def to_dict(self, timings: bool = False) -> Dict[str, Any]:
+        data = dict(self._data)
+        if not timings:
+            data.pop('timings', None)
+        return data
+
+
+class JobManager:
+    """
+    고정 크기 워커 풀에서 작업을 실행하는 작업 관리자.
+
+    - 동시에 실행되는 작업 수는 max_workers로 제한됩니다.
+    - 실행 중 + 대기 중인 작업이 max_workers + max_pending을 넘으면
+      새 작업을 거부하여(JobQueueFullError) 스레드 고갈을 막습니다.
+    - deadline_sec가 주어지면 등록 후 그 시간이 지난 작업은 취소됩니다.
+    - state가 주어지면 작업 상태를 공유 저장소에 기록하여, 여러 서버 프로세스 중 어느 곳에서든
+      상태 조회/결과 요청/취소를 처리할 수 있게 합니다. (작업 실행은 등록받은 프로세스에서)
+    """
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 8, deadline_sec: Optional[float] = None,
+                 state: Optional[SharedState] = None):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.deadline_sec = deadline_sec
+        self.state = state
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._jobs: Dict[str, Job] = {}
+        self._active = 0
+        self._lock = threading.Lock()
+
+    def submit(self, fn: Callable[..., Any], *args, **kwargs) -> Job:
+        """ fn(job, *args, **kwargs)를 워커 풀에 등록하고 Job을 반환합니다. """
+        with self._lock:
+            if self._active >= self.max_workers + self.max_pending:
+                raise JobQueueFullError("Server is busy. Please try again later.")
+            self._active += 1
+            job = Job(str(uuid.uuid4()), self.deadline_sec, self._publish if self.state else None)
+            self._jobs[job.id] = job
+
+        job.changed(force=True)
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def _publish(self, job: Job):
+        self.state.save_job(job.id, job.status, job.to_dict(timings=True),
+                            job.result if job.status == 'done' else None, job.finished_at)
+
+    def _run(self, job: Job, fn, args, kwargs):
+        job.status = 'running'
+        job.started_at = time.time()
+        job.changed(force=True)
+        metrics.observe_stage('queue_wait', job.started_at - job.created_at)
+        try:
+            # 대기 중에 취소된 작업은 시작하지 않음
+            job.cancel_token.check()
+            with metrics.job_context(job.timings), metrics.timed('job'):
+                job.result = fn(job, *args, **kwargs)
+            job.status = 'done'
+        except JobCancelledError as e:
+            print(f"🛑 Job {job.id} stopped: {e}")
+            job.error = str(e)
+            job.status = 'cancelled'
+        except Exception as e:
+            if job.cancel_token.cancelled:
+                # 프로세스 종료 등 취소로 인해 생긴 오류
+                job.error = job.cancel_token.reason
+                job.status = 'cancelled'
+            else:
+                print(f"❌ Job {job.id} failed: {e}")
+                job.error = str(e)
+                job.status = 'error'
+        finally:
+            job.finished_at = time.time()
+            job.cancel_token.close()
+            metrics.JOBS.inc(status=job.status)
+            job.changed(force=True)
+            with self._lock:
+                self._active -= 1
+
+    def get(self, job_id: str):
+        """ 이 프로세스의 Job, 다른 프로세스가 실행 중이면 SharedJob, 없으면 None """
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None and self.state is not None:
+            record = self.state.load_job(job_id)
+            if record is not None:
+                job = SharedJob(job_id, record, self.state)
+        return job
+
+    def cancel(self, job_id: str, reason: str = "Job cancelled."):
+        job = self.get(job_id)
+        if job is not None and job.active:
+            job.cancel(reason)
+        return job
+
+    def sync_shared(self):
+        """ 다른 프로세스가 받은 상태 조회 시각과 취소 요청을 이 프로세스의 진행 중인 작업에 반영합니다. """
+        if self.state is None:
+            return
+        with self._lock:
+            active = {job.id: job for job in self._jobs.values() if job.active}
+        for job_id, (last_seen, cancel_reason) in self.state.job_signals(active).items():
+            job = active[job_id]
+            job.last_seen = max(job.last_seen, last_seen)
+            if cancel_reason:
+                job.cancel(cancel_reason)
+
+    def cancel_abandoned(self, max_idle_sec: float):
+        """ max_idle_sec 동안 상태 조회가 없는 (브라우저 탭이 닫힌) 진행 중 작업을 취소합니다. """
+        now = time.time()
+        with self._lock:
+            abandoned = [job for job in self._jobs.values() if job.active and now - job.last_seen > max_idle_sec]
+        for job in abandoned:
+            job.cancel("Job abandoned by the client.")
+
+    def prune(self, max_age_sec: float):
+        """ 완료된 지 max_age_sec가 지난 작업 기록을 정리합니다. """
+        now = time.time()
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items()
+                       if job.finished_at and now - job.finished_at > max_age_sec]
+            for job_id in expired:
+                del self._jobs[job_id]
+        if self.state is not None:
+            self.state.prune_jobs(max_age_sec)
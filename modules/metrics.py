@@ -0,0 +1,289 @@
+# modules/metrics.py
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# 단계별 소요 시간 히스토그램 구간 (초). 프레임 단위 작업(수 ms)부터 다운로드(수 분)까지
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 900)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Sequence[str], values: Tuple, extra: str = '') -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple:
+        return tuple(labels.get(n, '') for n in self.labelnames)
+
+    def render(self, others: Sequence[list] = ()) -> Iterable[str]:
+        """ others: 더할 다른 프로세스의 snapshot() 목록 """
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.kind}"
+        yield from self._samples(others)
+
+    def _samples(self, others: Sequence[list]) -> Iterable[str]:
+        raise NotImplementedError
+
+    def snapshot(self) -> Optional[list]:
+        """ 다른 프로세스에 넘길 수 있는 [[레이블 값 목록, 값], ...] (수집 시점에 계산하는 지표는 None) """
+        return None
+
+    def reset(self):
+        pass
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def __init__(self, name, help_text, labelnames=()):
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def snapshot(self):
+        with self._lock:
+            return [[list(key), value] for key, value in self._values.items()]
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+    def _samples(self, others=()):
+        with self._lock:
+            values = dict(self._values)
+        for snapshot in others:
+            for key, value in snapshot:
+                key = tuple(key)
+                values[key] = values.get(key, 0) + value
+        for key, value in values.items():
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {value}"
+
+
+class Gauge(_Metric):
+    """ 수집 시점에 callback()이 반환하는 {레이블 값 튜플: 값}을 내보내는 게이지 """
+    kind = 'gauge'
+
+    def __init__(self, name, help_text, labelnames=(), callback: Callable[[], Dict[Tuple, float]] = dict):
+        super().__init__(name, help_text, labelnames)
+        self.callback = callback
+
+    def _samples(self, others=()):
+        try:
+            values = self.callback()
+        except Exception:
+            return  # 수집 실패가 /metrics 전체를 막지 않도록
+        for key, value in values.items():
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {value}"
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labelnames=(), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values: Dict[Tuple, list] = {}  # key -> [구간별 개수..., 합계, 개수]
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+                    break
+            state[-2] += value
+            state[-1] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return [[list(key), list(state)] for key, state in self._values.items()]
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+    def _samples(self, others=()):
+        with self._lock:
+            values = {key: list(state) for key, state in self._values.items()}
+        for snapshot in others:
+            for key, state in snapshot:
+                key = tuple(key)
+                if key not in values:
+                    values[key] = list(state)
+                elif len(values[key]) == len(state):  # 구간 설정이 다른 버전의 값은 무시
+                    values[key] = [a + b for a, b in zip(values[key], state)]
+        for key, state in values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, state):
+                cumulative += count
+                le = _format_labels(self.labelnames, key, 'le="%s"' % bound)
+                yield f"{self.name}_bucket{le} {cumulative}"
+            le = _format_labels(self.labelnames, key, 'le="+Inf"')
+            yield f"{self.name}_bucket{le} {state[-1]}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, key)} {state[-2]}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, key)} {state[-1]}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def _list(self) -> List[_Metric]:
+        with self._lock:
+            return list(self._metrics.values())
+
+    def render(self, others: Iterable[Dict[str, list]] = ()) -> str:
+        """
+        Prometheus 텍스트 형식 (version 0.0.4)
+
+        others: 다른 프로세스의 snapshot() 목록. 카운터와 히스토그램은 이 프로세스의 값에 더하고,
+        게이지는 이 프로세스에서 수집한 값을 그대로 내보냅니다.
+        """
+        others = list(others)
+        lines = []
+        for metric in self._list():
+            lines.extend(metric.render([o[metric.name] for o in others if metric.name in o]))
+        return '\n'.join(lines) + '\n'
+
+    def snapshot(self) -> Dict[str, list]:
+        """ {지표 이름: 값} (JSON으로 저장해 다른 프로세스의 render(others)에 넘길 수 있음) """
+        snapshots = {}
+        for metric in self._list():
+            snapshot = metric.snapshot()
+            if snapshot is not None:
+                snapshots[metric.name] = snapshot
+        return snapshots
+
+    def reset(self):
+        """ 누적 값을 비웁니다. (fork된 프로세스가 부모의 값을 물려받아 중복 집계하지 않도록) """
+        for metric in self._list():
+            metric.reset()
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    'ysc_stage_duration_seconds', 'Time spent in each pipeline stage.', ['stage']))
+SUBPROCESS_SECONDS = REGISTRY.register(Histogram(
+    'ysc_subprocess_duration_seconds', 'Wall time of external processes.', ['command']))
+FRAMES = REGISTRY.register(Counter(
+    'ysc_frames_total', 'Frames decoded, analysed and saved as pages.', ['step']))
+DOWNLOADED_BYTES = REGISTRY.register(Counter(
+    'ysc_downloaded_bytes_total', 'Bytes of video downloaded by yt-dlp.'))
+JOBS = REGISTRY.register(Counter(
+    'ysc_jobs_total', 'Finished extraction jobs by outcome.', ['status']))
+CACHE_LOOKUPS = REGISTRY.register(Counter(
+    'ysc_cache_lookups_total', 'In-memory cache lookups by cache and result.', ['cache', 'result']))
+
+
+def register_gauge(name: str, help_text: str, labelnames: Sequence[str],
+                   callback: Callable[[], Dict[Tuple, float]]) -> Gauge:
+    return REGISTRY.register(Gauge(name, help_text, labelnames, callback))
+
+
+class JobTimings:
+    """ 작업 하나의 단계별 누적 시간과 횟수 (작업 상태 응답의 timings) """
+
+    def __init__(self):
+        self._stages: Dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float):
+        with self._lock:
+            entry = self._stages.setdefault(stage, [0.0, 0])
+            entry[0] += seconds
+            entry[1] += 1
+
+    def to_dict(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {stage: {'seconds': round(total, 4), 'count': count}
+                    for stage, (total, count) in self._stages.items()}
+
+
+# 현재 스레드(컨텍스트)가 실행 중인 작업의 JobTimings
+_CURRENT_TIMINGS: contextvars.ContextVar = contextvars.ContextVar('ysc_job_timings', default=None)
+
+
+@contextmanager
+def job_context(timings: JobTimings):
+    """ with 블록 안에서 기록되는 단계 시간을 timings에도 누적합니다. """
+    token = _CURRENT_TIMINGS.set(timings)
+    try:
+        yield timings
+    finally:
+        _CURRENT_TIMINGS.reset(token)
+
+
+def observe_stage(stage: str, seconds: float):
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    timings: Optional[JobTimings] = _CURRENT_TIMINGS.get()
+    if timings is not None:
+        timings.add(stage, seconds)
+
+
+@contextmanager
+def timed(stage: str):
+    """ with 블록의 소요 시간을 단계 히스토그램(및 현재 작업의 timings)에 기록합니다. """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - started)
+
+
+def observe_subprocess(command: str, seconds: float):
+    SUBPROCESS_SECONDS.observe(seconds, command=command)
+    timings: Optional[JobTimings] = _CURRENT_TIMINGS.get()
+    if timings is not None:
+        timings.add(f"subprocess:{command}", seconds)
+
+
+@contextmanager
+def timed_subprocess(command: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_subprocess(command, time.perf_counter() - started)
+
+
+def count_frames(step: str, n: int = 1):
+    """ step: 'decoded' | 'analysed' | 'saved' """
+    FRAMES.inc(n, step=step)
+
+
+def bind_context(fn: Callable) -> Callable:
+    """ 다른 스레드에서 실행할 함수가 현재 작업의 timings에 기록하도록 컨텍스트를 묶습니다. """
+    ctx = contextvars.copy_context()
+    return lambda *args, **kwargs: ctx.run(fn, *args, **kwargs)
@@ -0,0 +1,96 @@
+# modules/page_index.py
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+# 축소 크기와 사용할 저주파 DCT 계수 블록 크기 (16x16 = 256비트)
+# 악보 페이지는 오선 배치가 비슷하여 8x8(64비트) 해시로는 서로 다른 페이지도 거리가 가까움
+HASH_IMAGE_SIZE = 64
+HASH_BLOCK_SIZE = 16
+
+
+def phash(image: np.ndarray) -> int:
+    """
+    256비트 지각 해시(pHash)를 계산합니다.
+
+    64x64로 축소한 영상의 DCT 저주파 16x16 계수를 중앙값과 비교합니다.
+    하이라이트가 제거된 이진 영상을 넣으면 재생 바 위치와 무관한 페이지 해시가 됩니다.
+    """
+    if image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    size = (HASH_IMAGE_SIZE, HASH_IMAGE_SIZE)
+    small = cv2.resize(image, size, interpolation=cv2.INTER_AREA).astype(np.float32)
+    low = cv2.dct(small)[:HASH_BLOCK_SIZE, :HASH_BLOCK_SIZE].flatten()
+    bits = low > np.median(low[1:])  # DC 성분은 중앙값 계산에서 제외
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+
+class BKTree:
+    """ 해밍 거리 기반 BK-트리. 반경 r 이내 검색이 전체 비교보다 훨씬 적은 노드만 방문합니다. """
+
+    def __init__(self):
+        self._root: Optional[Tuple[int, str, Dict[int, tuple]]] = None
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def add(self, key: int, value: str):
+        self._size += 1
+        if self._root is None:
+            self._root = (key, value, {})
+            return
+        node = self._root
+        while True:
+            dist = hamming(key, node[0])
+            child = node[2].get(dist)
+            if child is None:
+                node[2][dist] = (key, value, {})
+                return
+            node = child
+
+    def search(self, key: int, radius: int) -> List[Tuple[int, str]]:
+        """ key와의 거리가 radius 이하인 (거리, 값) 목록을 가까운 순으로 반환합니다. """
+        if self._root is None:
+            return []
+        found = []
+        stack = [self._root]
+        while stack:
+            node_key, value, children = stack.pop()
+            dist = hamming(key, node_key)
+            if dist <= radius:
+                found.append((dist, value))
+            for child_dist, child in children.items():
+                if dist - radius <= child_dist <= dist + radius:
+                    stack.append(child)
+        return sorted(found)
+
+
+class PageIndex:
+    """
+    저장된 모든 페이지의 지각 해시 색인.
+
+    반복 구간(도돌이표, D.C.)이나 잠깐 나타난 오버레이 때문에 이전 페이지가 다시 저장되는 것을 막습니다.
+    - policy='skip': 이전 페이지와 거의 같으면 저장하지 않음
+    - policy='flag': 저장하되 duplicates에 {페이지: 원본 페이지}로 기록 (검수 화면에서 표시)
+    """
+
+    def __init__(self, max_distance: int = 24, policy: str = 'skip'):
+        self.max_distance = max_distance
+        self.policy = policy
+        self.duplicates: Dict[str, str] = {}
+        self._tree = BKTree()
+
+    def find_duplicate(self, page_hash: int) -> Optional[str]:
+        matches = self._tree.search(page_hash, self.max_distance)
+        return matches[0][1] if matches else None
+
+    def add(self, page_hash: int, page_id: str, duplicate_of: Optional[str] = None):
+        self._tree.add(page_hash, page_id)
+        if duplicate_of is not None:
+            self.duplicates[page_id] = duplicate_of
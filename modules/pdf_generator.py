@@ -1,72 +1,307 @@
 import io
-from fpdf import FPDF
+import os
+import struct
+import threading
+import time
+import zlib
 from PIL import Image
-from typing import List, Union
+from typing import Callable, Iterable, Iterator, List, Optional, Union
 
+import cv2
+import numpy as np
 
-def create_pdf_from_images(image_paths: List[str]) -> Union[io.BytesIO, None]:
-    if not image_paths:
-        print("No images provided for PDF generation.")
+from modules import metrics
+
+# A4 레이아웃 (mm)
+PAGE_WIDTH = 210
+PAGE_HEIGHT = 297
+MARGIN = 10
+IMAGE_SPACING = 5  # 이미지 사이의 간격 (mm)
+MM_TO_PT = 72 / 25.4
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+FLATE_LEVEL = 6
+JPEG_QUALITY = 90
+# 바로 PDF를 만드는 작업이 압축된 페이지를 모아 두는 작업 폴더 안의 임시 파일 (PageSpool)
+PAGE_SPOOL_FILE = 'pages.spool'
+
+
+class PdfImage:
+    """
+    PDF에 그대로 넣을 수 있도록 이미 압축된 이미지 데이터.
+
+    크기와 압축 방식(filter)을 함께 보관하므로 PDF 생성 시 다시 디코딩하지 않습니다.
+    - FlateDecode: zlib 압축된 raw 픽셀 (PNG IDAT는 decode_parms의 예측자와 함께 그대로 사용)
+    - DCTDecode: JPEG 파일 그대로
+    """
+    __slots__ = ('width', 'height', 'data', 'filter', 'color_space', 'decode_parms')
+
+    def __init__(self, width: int, height: int, data: bytes, filter: str,
+                 color_space: str = 'DeviceRGB', decode_parms: Optional[str] = None):
+        self.width = width
+        self.height = height
+        self.data = data
+        self.filter = filter
+        self.color_space = color_space
+        self.decode_parms = decode_parms
+
+
+class SpooledPage:
+    """ PageSpool에 기록된 페이지의 위치와 PdfImage 속성 (압축 데이터는 파일에 있음) """
+    __slots__ = ('offset', 'length', 'width', 'height', 'filter', 'color_space', 'decode_parms')
+
+    def __init__(self, offset: int, image: PdfImage):
+        self.offset = offset
+        self.length = len(image.data)
+        self.width = image.width
+        self.height = image.height
+        self.filter = image.filter
+        self.color_space = image.color_space
+        self.decode_parms = image.decode_parms
+
+
+class PageSpool:
+    """
+    압축된 페이지(PdfImage)를 임시 파일에 이어 쓰고, 메모리에는 위치와 크기만 남깁니다.
+
+    바로 PDF를 만들 때 페이지 수만큼의 압축 데이터가 추출이 끝날 때까지 메모리에 쌓이지 않도록 하며,
+    images()로 PDF를 만들 때 한 장씩 다시 읽습니다. 여러 스레드에서 append해도 안전합니다.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'w+b')
+        self._lock = threading.Lock()
+
+    def append(self, image: PdfImage) -> SpooledPage:
+        with self._lock:
+            self._file.seek(0, os.SEEK_END)
+            page = SpooledPage(self._file.tell(), image)
+            self._file.write(image.data)
+        return page
+
+    def images(self, pages: Iterable[SpooledPage]) -> Iterator[PdfImage]:
+        for page in pages:
+            with self._lock:
+                self._file.seek(page.offset)
+                data = self._file.read(page.length)
+            yield PdfImage(page.width, page.height, data, page.filter, page.color_space, page.decode_parms)
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def encode_page_image(image: np.ndarray, fmt: str = 'flate') -> PdfImage:
+    """ 추출기의 BGR 프레임을 PDF용으로 압축합니다. ('flate': 무손실, 'jpeg': 손실) """
+    h, w = image.shape[:2]
+    if fmt == 'jpeg':
+        ok, buf = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY])
+        if not ok:
+            raise ValueError("JPEG encoding failed.")
+        return PdfImage(w, h, buf.tobytes(), 'DCTDecode')
+    rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    return PdfImage(w, h, zlib.compress(rgb.tobytes(), FLATE_LEVEL), 'FlateDecode')
+
+
+def _png_passthrough(data) -> Optional[PdfImage]:
+    """ 8비트 비인터레이스 회색조/RGB PNG의 IDAT를 압축 해제 없이 사용합니다. 그 외 형식은 None """
+    pos = len(PNG_SIGNATURE)
+    header, idat = None, []
+    while pos + 8 <= len(data):
+        length, chunk_type = struct.unpack('>I4s', data[pos:pos + 8])
+        body = bytes(data[pos + 8:pos + 8 + length])
+        if chunk_type == b'IHDR':
+            header = struct.unpack('>IIBBBBB', body)
+        elif chunk_type == b'IDAT':
+            idat.append(body)
+        elif chunk_type == b'IEND':
+            break
+        pos += 12 + length
+
+    if header is None or not idat:
         return None
+    width, height, bit_depth, color_type, _, _, interlace = header
+    colors = {0: 1, 2: 3}.get(color_type)
+    if bit_depth != 8 or colors is None or interlace:
+        return None
+    return PdfImage(width, height, b''.join(idat), 'FlateDecode',
+                    'DeviceGray' if colors == 1 else 'DeviceRGB',
+                    f"<< /Predictor 15 /Colors {colors} /BitsPerComponent 8 /Columns {width} >>")
 
-    print(f"📄 Starting PDF generation: {len(image_paths)} images.")
 
-    # A4 사이즈 PDF 생성
-    pdf = FPDF(orientation='P', unit='mm', format='A4')
-    pdf.set_auto_page_break(auto=False)
+def load_page_image(path: str) -> PdfImage:
+    """ 저장된 PNG/JPEG 파일을 가능한 한 디코딩 없이 PdfImage로 읽습니다. """
+    with open(path, 'rb') as f:
+        return page_image_from_bytes(f.read())
 
-    # 첫 페이지 추가
-    pdf.add_page()
 
-    margin = 10
-    page_width = 210
-    page_height = 297
-    max_w = page_width - (2 * margin)
-    max_h = page_height - (2 * margin)
+def page_image_from_bytes(data) -> PdfImage:
+    """ PNG/JPEG 데이터(bytes 또는 memoryview)를 PdfImage로 변환합니다. 압축 데이터는 복사본으로 보관합니다. """
+    with metrics.timed('pdf_load'):
+        return _page_image_from_bytes(data)
 
-    # [수정 1] 현재 이미지가 그려질 Y 위치 추적 변수 초기화
-    current_y = margin
-    image_spacing = 5  # 이미지 사이의 간격 (mm)
 
-    for img_path in image_paths:
-        try:
-            with Image.open(img_path) as img:
-                w_px, h_px = img.size
+def _page_image_from_bytes(data) -> PdfImage:
+    signature = bytes(data[:len(PNG_SIGNATURE)])
+    if signature == PNG_SIGNATURE:
+        image = _png_passthrough(data)
+        if image is not None:
+            return image
+    elif signature.startswith(b'\xff\xd8'):
+        data = bytes(data)
+        with Image.open(io.BytesIO(data)) as img:  # 헤더만 읽음
+            if img.mode in ('RGB', 'L'):
+                return PdfImage(img.width, img.height, data, 'DCTDecode',
+                                'DeviceGray' if img.mode == 'L' else 'DeviceRGB')
+
+    # 그 밖의 형식(알파 채널, 16비트 등)은 한 번 디코딩하여 RGB로 압축
+    with Image.open(io.BytesIO(bytes(data))) as img:
+        rgb = img.convert('RGB')
+    return PdfImage(rgb.width, rgb.height, zlib.compress(rgb.tobytes(), FLATE_LEVEL), 'FlateDecode')
+
+
+class _PdfStreamWriter:
+    """ PDF 객체를 순서대로 내보내며 xref용 바이트 오프셋을 기록합니다. """
+
+    def __init__(self):
+        self.offset = 0
+        self.offsets = {}
+        self.next_id = 3  # 1: Catalog, 2: Pages (마지막에 기록)
+
+    def reserve(self) -> int:
+        obj_id = self.next_id
+        self.next_id += 1
+        return obj_id
+
+    def chunk(self, data: bytes) -> bytes:
+        self.offset += len(data)
+        return data
+
+    def obj(self, obj_id: int, body: bytes, stream: Optional[bytes] = None) -> bytes:
+        self.offsets[obj_id] = self.offset
+        parts = [f"{obj_id} 0 obj\n".encode('ascii'), body]
+        if stream is not None:
+            parts += [b"\nstream\n", stream, b"\nendstream"]
+        parts.append(b"\nendobj\n")
+        return self.chunk(b''.join(parts))
+
+
+def stream_pdf(
+        images: Iterable[PdfImage], total: Optional[int] = None,
+        progress_callback: Optional[Callable[[int, int], None]] = None
+) -> Iterator[bytes]:
+    """
+    압축된 페이지 이미지를 A4 페이지에 위에서부터 쌓아 PDF를 조각 단위로 생성합니다.
 
-            # 비율 유지하며 가로 길이를 페이지 너비(max_w)에 맞춤
-            aspect = w_px / h_px
-            display_w = max_w
-            display_h = display_w / aspect
+    이미지는 받는 즉시 내보내고 버리므로 메모리에는 현재 PDF 페이지의 배치 정보만 남습니다.
+    레이아웃은 가로를 여백 안쪽 너비에 맞추고(페이지보다 높으면 높이에 맞춤), 공간이 부족하면
+    다음 페이지로 넘기는 기존 방식과 같습니다.
+    """
+    started = time.perf_counter()
+    writer = _PdfStreamWriter()
+    max_w = PAGE_WIDTH - (2 * MARGIN)
+    max_h = PAGE_HEIGHT - (2 * MARGIN)
+    page_ids: List[int] = []
+    placements = []  # 현재 PDF 페이지: (이미지 객체 번호, x, y, w, h) mm
+    current_y = MARGIN
 
-            # (예외 처리) 만약 이미지 하나가 페이지 전체 높이보다 크다면 줄임
-            if display_h > max_h:
-                display_h = max_h
-                display_w = display_h * aspect
+    def flush_page():
+        content = ''.join(
+            f"q {w * MM_TO_PT:.2f} 0 0 {h * MM_TO_PT:.2f} {x * MM_TO_PT:.2f} "
+            f"{(PAGE_HEIGHT - y - h) * MM_TO_PT:.2f} cm /I{obj_id} Do Q\n"
+            for obj_id, x, y, w, h in placements
+        ).encode('ascii')
+        content_id, page_id = writer.reserve(), writer.reserve()
+        xobjects = ' '.join(f"/I{obj_id} {obj_id} 0 R" for obj_id, *_ in placements)
+        page_ids.append(page_id)
+        return (
+            writer.obj(content_id, f"<< /Length {len(content)} >>".encode('ascii'), content)
+            + writer.obj(page_id, (
+                f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH * MM_TO_PT:.2f} "
+                f"{PAGE_HEIGHT * MM_TO_PT:.2f}] /Resources << /XObject << {xobjects} >> >> "
+                f"/Contents {content_id} 0 R >>").encode('ascii'))
+        )
 
-            # [수정 2] 현재 페이지에 공간이 부족하면 새 페이지 추가
-            # (현재 위치 + 이미지 높이)가 (페이지 높이 - 하단 여백)을 넘는지 확인
-            if current_y + display_h > (page_height - margin):
-                pdf.add_page()
-                current_y = margin  # Y 위치를 다시 맨 위로 초기화
+    yield writer.chunk(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
 
-            # [수정 3] 중앙 정렬 위치 계산 (X는 중앙, Y는 current_y 사용)
-            x_pos = (page_width - display_w) / 2
+    for count, image in enumerate(images, start=1):
+        if progress_callback:
+            progress_callback(count, total or count)
 
-            # 이미지 그리기
-            pdf.image(img_path, x=x_pos, y=current_y, w=display_w, h=display_h)
+        # 비율 유지하며 가로 길이를 페이지 너비(max_w)에 맞춤
+        aspect = image.width / image.height
+        display_w = max_w
+        display_h = display_w / aspect
+        # (예외 처리) 만약 이미지 하나가 페이지 전체 높이보다 크다면 줄임
+        if display_h > max_h:
+            display_h = max_h
+            display_w = display_h * aspect
 
-            # [수정 4] 다음 이미지를 위해 Y 위치 갱신 (이미지 높이 + 간격)
-            current_y += display_h + image_spacing
+        # 현재 페이지에 공간이 부족하면 새 페이지
+        if placements and current_y + display_h > (PAGE_HEIGHT - MARGIN):
+            yield flush_page()
+            placements = []
+            current_y = MARGIN
 
+        embed_started = time.perf_counter()
+        obj_id = writer.reserve()
+        dict_parts = [
+            "<< /Type /XObject /Subtype /Image",
+            f"/Width {image.width} /Height {image.height}",
+            f"/ColorSpace /{image.color_space} /BitsPerComponent 8",
+            f"/Filter /{image.filter}",
+        ]
+        if image.decode_parms:
+            dict_parts.append(f"/DecodeParms {image.decode_parms}")
+        dict_parts.append(f"/Length {len(image.data)} >>")
+        chunk = writer.obj(obj_id, ' '.join(dict_parts).encode('ascii'), image.data)
+        metrics.observe_stage('pdf_embed', time.perf_counter() - embed_started)
+        yield chunk
+
+        placements.append((obj_id, (PAGE_WIDTH - display_w) / 2, current_y, display_w, display_h))
+        current_y += display_h + IMAGE_SPACING
+
+    # 빈 문서도 유효한 PDF가 되도록 최소 한 페이지
+    if placements or not page_ids:
+        yield flush_page()
+
+    kids = ' '.join(f"{page_id} 0 R" for page_id in page_ids)
+    yield writer.obj(2, f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>".encode('ascii'))
+    yield writer.obj(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+
+    xref_offset = writer.offset
+    lines = [f"xref\n0 {writer.next_id}\n", "0000000000 65535 f \n"]
+    for obj_id in range(1, writer.next_id):
+        lines.append(f"{writer.offsets[obj_id]:010d} 00000 n \n")
+    lines.append(f"trailer\n<< /Size {writer.next_id} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n")
+    yield writer.chunk(''.join(lines).encode('ascii'))
+    # 소비자(응답 전송)가 조각을 받아 가는 시간까지 포함한 PDF 전체 생성 시간
+    metrics.observe_stage('pdf_total', time.perf_counter() - started)
+
+
+def iter_page_images(image_paths: List[str]) -> Iterator[PdfImage]:
+    """ 파일 목록을 순서대로 읽되, 읽을 수 없는 파일은 건너뜁니다. """
+    for img_path in image_paths:
+        try:
+            yield load_page_image(img_path)
         except Exception as e:
             print(f"⚠️ Error processing {img_path}: {e}")
-            continue
 
-    if pdf.page_no() > 0:
-        pdf_output = pdf.output(dest='S')
-        if isinstance(pdf_output, str):
-            pdf_output = pdf_output.encode('latin1')
 
-        return io.BytesIO(pdf_output)
+def create_pdf_from_images(
+        image_paths: List[str],
+        progress_callback: Optional[Callable[[int, int], None]] = None
+) -> Union[io.BytesIO, None]:
+    """ 이미지 파일 목록으로 PDF 전체를 메모리에 만듭니다. (스트리밍이 필요하면 stream_pdf 사용) """
+    if not image_paths:
+        print("No images provided for PDF generation.")
+        return None
 
-    return None
\ No newline at end of file
+    print(f"📄 Starting PDF generation: {len(image_paths)} images.")
+    return io.BytesIO(b''.join(stream_pdf(iter_page_images(image_paths), len(image_paths), progress_callback)))
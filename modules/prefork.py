@@ -0,0 +1,94 @@
+# modules/prefork.py
+import os
+import signal
+import time
+from typing import Callable, Dict, Optional
+
+# 워커 상태를 확인하는 주기와, 비정상 종료된 워커를 다시 띄우기 전 대기 시간 (초)
+WORKER_CHECK_INTERVAL_SEC = 1.0
+WORKER_RESTART_DELAY_SEC = 1.0
+
+
+def serve_forever(server, workers: int = 1, on_worker_start: Optional[Callable[[], None]] = None,
+                  on_started: Optional[Callable[[], None]] = None,
+                  on_worker_exit: Optional[Callable[[int], None]] = None):
+    """
+    이미 열어 둔 server(werkzeug BaseWSGIServer)의 소켓을 workers개의 자식 프로세스가 함께 받아 처리합니다. (pre-fork)
+
+    - 워커는 서로 다른 인터프리터이므로 CPU를 많이 쓰는 추출 작업이 하나의 GIL을 두고 경쟁하지 않습니다.
+    - on_worker_start()는 각 워커에서 요청을 받기 전에 호출됩니다. (백그라운드 스레드 시작 등)
+    - on_started()는 워커를 모두 띄운 뒤 부모에서 한 번 호출됩니다. (스레드가 도는 중에 fork하지 않도록)
+    - 워커가 비정상 종료되면 on_worker_exit(pid)를 호출한 뒤 다시 띄웁니다.
+    - 부모가 SIGTERM/SIGINT를 받으면 워커를 모두 종료하고 반환합니다.
+    - workers가 1 이하이거나 fork를 지원하지 않는 플랫폼(Windows)에서는 현재 프로세스에서 그대로 실행합니다.
+    """
+    if workers > 1 and not hasattr(os, 'fork'):
+        print("⚠️ Multi-process serving requires fork(); running a single server process.")
+        workers = 1
+    if workers <= 1:
+        if on_worker_start:
+            on_worker_start()
+        if on_started:
+            on_started()
+        server.serve_forever()
+        return
+
+    children: Dict[int, int] = {}  # pid -> 슬롯 번호
+    stopping = False
+
+    def spawn(slot: int):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.default_int_handler)
+            code = 0
+            try:
+                if on_worker_start:
+                    on_worker_start()
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+            except BaseException as e:
+                print(f"❌ Server worker {os.getpid()} crashed: {e}")
+                code = 1
+            finally:
+                os._exit(code)
+        children[pid] = slot
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except OSError:
+                pass
+
+    for slot in range(workers):
+        spawn(slot)
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    print(f"🧵 Serving with {workers} worker processes: {', '.join(map(str, children))}")
+    if on_started:
+        on_started()
+
+    # os.wait()는 다른 자식 프로세스(yt-dlp -U 등)의 종료 상태까지 가져가므로 워커만 개별 확인
+    while children:
+        time.sleep(WORKER_CHECK_INTERVAL_SEC)
+        for pid in list(children):
+            try:
+                done, status = os.waitpid(pid, os.WNOHANG)
+            except ChildProcessError:
+                done, status = pid, 0
+            if not done:
+                continue
+            slot = children.pop(pid)
+            if stopping:
+                continue
+            print(f"⚠️ Server worker {pid} exited (status {status}); restarting.")
+            if on_worker_exit:
+                on_worker_exit(pid)
+            time.sleep(WORKER_RESTART_DELAY_SEC)
+            if not stopping:  # 대기 중에 종료 신호를 받았으면 다시 띄우지 않음
+                spawn(slot)
+    server.server_close()
@@ -0,0 +1,63 @@
+# modules/session_store.py
+import os
+from typing import Any, Dict, List, Optional
+
+from modules.frame_store import has_frame_store, load_frame_index
+from modules.shared_state import STATE_DB_FILE, SharedState, open_state
+
+FEATURES_FILE = 'features.npz'
+
+# 세션 메타데이터와 페이지 목록은 세션 폴더들이 있는 기본 폴더의 공유 저장소(state.db)에 보관하여
+# 어느 서버 프로세스가 요청을 받든 같은 내용을 봅니다. (세션 ID = 세션 폴더 이름)
+
+
+def _state(session_dir: str) -> SharedState:
+    return open_state(os.path.join(os.path.dirname(os.path.abspath(session_dir)), STATE_DB_FILE))
+
+
+def _session_id(session_dir: str) -> str:
+    return os.path.basename(os.path.abspath(session_dir))
+
+
+def find_session_dir(base_dir: str, session_id: str) -> Optional[str]:
+    """ 등록된 검수 세션이면 그 폴더를, 아니면 None을 반환합니다. (임의 경로 접근 방지) """
+    session_dir = open_state(os.path.join(base_dir, STATE_DB_FILE)).session_dir(session_id)
+    return session_dir if session_dir and os.path.isdir(session_dir) else None
+
+
+def save_session_meta(session_dir: str, meta: Dict[str, Any]):
+    """ 검수 세션을 등록하고 원본 영상/설정 정보를 저장합니다. (재선택 시 사용) """
+    _state(session_dir).save_session(_session_id(session_dir), session_dir, meta=meta)
+
+
+def load_session_meta(session_dir: str) -> Optional[Dict[str, Any]]:
+    return _state(session_dir).load_session(_session_id(session_dir), 'meta')
+
+
+def save_page_manifest(session_dir: str, pages: List[Dict[str, Any]], files: Dict[str, str]):
+    """
+    검수 페이지에 표시할 이미지 목록을 저장합니다.
+
+    - pages: 표시 순서대로의 [{'file': 파일명, 'sample': 샘플 번호}, ...]
+    - files: 지금까지 만들어진 모든 이미지의 {샘플 번호: 파일명} (재선택 시 재사용)
+    """
+    _state(session_dir).save_session(_session_id(session_dir), session_dir,
+                                     manifest={'pages': pages, 'files': files})
+
+
+def load_page_manifest(session_dir: str) -> Optional[Dict[str, Any]]:
+    return _state(session_dir).load_session(_session_id(session_dir), 'manifest')
+
+
+def list_session_images(session_dir: str) -> List[str]:
+    """
+    매니페스트가 있으면 그 순서를, 없으면 프레임 저장소의 저장 순서를 반환합니다.
+    (둘 다 없는 이전 형식 세션은 images 폴더의 PNG 파일을 이름순으로 반환)
+    """
+    manifest = load_page_manifest(session_dir)
+    if manifest is not None:
+        return [page['file'] for page in manifest['pages']]
+    if has_frame_store(session_dir):
+        return list(load_frame_index(session_dir))
+    image_dir = os.path.join(session_dir, 'images')
+    return sorted([f for f in os.listdir(image_dir) if f.endswith('.png')])
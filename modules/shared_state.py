@@ -0,0 +1,190 @@
+# modules/shared_state.py
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+STATE_DB_FILE = 'state.db'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS settings (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    dir TEXT NOT NULL,
+    meta TEXT,
+    manifest TEXT,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    owner INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    state TEXT NOT NULL,
+    result TEXT,
+    updated REAL NOT NULL,
+    finished REAL,
+    last_seen REAL NOT NULL,
+    cancel_reason TEXT
+);
+CREATE TABLE IF NOT EXISTS metrics (
+    process TEXT PRIMARY KEY,
+    snapshot TEXT NOT NULL,
+    updated REAL NOT NULL
+);
+"""
+
+_ACTIVE_STATUSES = ('queued', 'running')
+
+
+def _dumps(value: Any) -> Optional[str]:
+    """ JSON으로 바꿀 수 없는 값(메모리의 PDF 페이지 등)은 None """
+    try:
+        return json.dumps(value, ensure_ascii=False)
+    except (TypeError, ValueError):
+        return None
+
+
+def _loads(text: Optional[str]) -> Any:
+    return json.loads(text) if text is not None else None
+
+
+class SharedState:
+    """
+    여러 서버 프로세스가 함께 보는 상태를 로컬 SQLite 파일(WAL 모드)에 저장합니다.
+
+    - settings: 업데이트 정보 등 키-값
+    - sessions: 검수 세션 ID -> 폴더, 메타데이터, 페이지 목록 (어느 프로세스가 만든 세션이든 조회 가능)
+    - jobs: 작업을 실행하는 프로세스가 기록한 상태 스냅샷과, 다른 프로세스가 남긴 상태 조회 시각/취소 요청
+    - metrics: 프로세스별 성능 지표(카운터, 히스토그램) 스냅샷. 종료된 프로세스의 값도 남겨 합계가 줄지 않도록 함
+
+    WAL 모드에서는 읽기가 쓰기를 기다리지 않으므로 상태 조회가 잦아도 서로 막히지 않습니다.
+    연결은 스레드(및 fork된 프로세스)마다 따로 엽니다.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            # isolation_level=None: 문장마다 바로 커밋 (긴 트랜잭션으로 다른 프로세스를 막지 않도록)
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.executescript(_SCHEMA)
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    # --- 설정 ---
+    def get_setting(self, key: str, default: Any = None) -> Any:
+        row = self._conn().execute('SELECT value FROM settings WHERE key = ?', (key,)).fetchone()
+        return _loads(row[0]) if row else default
+
+    def set_setting(self, key: str, value: Any):
+        self._conn().execute('INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)', (key, _dumps(value)))
+
+    # --- 검수 세션 ---
+    def save_session(self, session_id: str, session_dir: str, **fields: Any):
+        """ 세션을 등록하고 fields(meta, manifest)를 저장합니다. 주어지지 않은 필드는 그대로 둡니다. """
+        conn = self._conn()
+        conn.execute('INSERT OR IGNORE INTO sessions (id, dir, updated) VALUES (?, ?, ?)',
+                     (session_id, session_dir, time.time()))
+        for field, value in fields.items():
+            if field not in ('meta', 'manifest'):
+                raise ValueError(f"Unknown session field: {field}")
+            conn.execute(f'UPDATE sessions SET {field} = ?, updated = ? WHERE id = ?',
+                         (_dumps(value), time.time(), session_id))
+
+    def load_session(self, session_id: str, field: str) -> Any:
+        if field not in ('meta', 'manifest'):
+            raise ValueError(f"Unknown session field: {field}")
+        row = self._conn().execute(f'SELECT {field} FROM sessions WHERE id = ?', (session_id,)).fetchone()
+        return _loads(row[0]) if row else None
+
+    def session_dir(self, session_id: str) -> Optional[str]:
+        row = self._conn().execute('SELECT dir FROM sessions WHERE id = ?', (session_id,)).fetchone()
+        return row[0] if row else None
+
+    # --- 작업 ---
+    def save_job(self, job_id: str, status: str, state: Dict[str, Any], result: Any = None,
+                 finished: Optional[float] = None):
+        """ 작업 상태 스냅샷을 기록합니다. (결과는 JSON으로 바꿀 수 있을 때만 저장) """
+        now = time.time()
+        self._conn().execute(
+            'INSERT INTO jobs (id, owner, status, state, result, updated, finished, last_seen) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?) '
+            'ON CONFLICT(id) DO UPDATE SET status = excluded.status, state = excluded.state, '
+            'result = excluded.result, updated = excluded.updated, finished = excluded.finished',
+            (job_id, os.getpid(), status, _dumps(state), _dumps(result), now, finished, now))
+
+    def load_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute(
+            'SELECT owner, status, state, result, cancel_reason FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        if row is None:
+            return None
+        owner, status, state, result, cancel_reason = row
+        return {'owner': owner, 'status': status, 'state': _loads(state), 'result': _loads(result),
+                'cancel_reason': cancel_reason}
+
+    def touch_job(self, job_id: str):
+        self._conn().execute('UPDATE jobs SET last_seen = ? WHERE id = ?', (time.time(), job_id))
+
+    def request_job_cancel(self, job_id: str, reason: str):
+        """ 작업을 실행 중인 프로세스가 다음 동기화 때 취소하도록 요청을 남깁니다. """
+        self._conn().execute('UPDATE jobs SET cancel_reason = ? WHERE id = ? AND cancel_reason IS NULL',
+                             (reason, job_id))
+
+    def job_signals(self, job_ids: Iterable[str]) -> Dict[str, Tuple[float, Optional[str]]]:
+        """ {작업 ID: (마지막 상태 조회 시각, 취소 요청 사유)} """
+        job_ids = list(job_ids)
+        if not job_ids:
+            return {}
+        placeholders = ','.join('?' * len(job_ids))
+        rows = self._conn().execute(
+            f'SELECT id, last_seen, cancel_reason FROM jobs WHERE id IN ({placeholders})', job_ids)
+        return {job_id: (last_seen, reason) for job_id, last_seen, reason in rows}
+
+    def fail_jobs_of(self, owner: int, error: str):
+        """ 비정상 종료된 프로세스가 실행하던 작업을 오류로 표시합니다. (기다리는 클라이언트가 멈추지 않도록) """
+        conn = self._conn()
+        rows = conn.execute('SELECT id, state FROM jobs WHERE owner = ? AND status IN (?, ?)',
+                            (owner, *_ACTIVE_STATUSES)).fetchall()
+        for job_id, state in rows:
+            state = _loads(state) or {}
+            state.update(status='error', error=error)
+            conn.execute('UPDATE jobs SET status = ?, state = ?, finished = ? WHERE id = ?',
+                         ('error', _dumps(state), time.time(), job_id))
+
+    def prune_jobs(self, max_age_sec: float):
+        self._conn().execute('DELETE FROM jobs WHERE finished IS NOT NULL AND finished < ?',
+                             (time.time() - max_age_sec,))
+
+    # --- 성능 지표 ---
+    def save_metrics(self, process: str, snapshot: Dict[str, list]):
+        self._conn().execute('INSERT OR REPLACE INTO metrics (process, snapshot, updated) VALUES (?, ?, ?)',
+                             (process, _dumps(snapshot), time.time()))
+
+    def load_metrics(self, exclude: Optional[str] = None) -> List[Dict[str, list]]:
+        """ exclude를 제외한 모든 프로세스의 지표 스냅샷 """
+        rows = self._conn().execute('SELECT snapshot FROM metrics WHERE process != ?', (exclude or '',))
+        return [_loads(snapshot) for snapshot, in rows]
+
+
+_STATES: Dict[str, SharedState] = {}
+_STATES_LOCK = threading.Lock()
+
+
+def open_state(path: str) -> SharedState:
+    """ 같은 파일에 대해서는 프로세스 안에서 하나의 SharedState를 공유합니다. """
+    path = os.path.abspath(path)
+    with _STATES_LOCK:
+        state = _STATES.get(path)
+        if state is None:
+            state = _STATES[path] = SharedState(path)
+        return state
@@ -0,0 +1,58 @@
+# modules/startup.py
+import importlib
+import threading
+import time
+from typing import Dict, Iterable
+
+from modules import metrics
+
+
+class StartupReport:
+    """
+    서버 시작 과정의 단계별 시각과 미리 불러온 모듈의 임포트 시간을 기록합니다.
+
+    - phases: {단계 이름: 앱 임포트 시작부터의 경과 초} (예: imports, listening, preloaded)
+    - imports: {모듈 이름: 임포트에 걸린 초} (첫 사용 전에 이미 불러와져 있었다면 0에 가까움)
+    시작 로그로 출력되며 /metrics의 ysc_startup_seconds, ysc_startup_import_seconds로도 제공됩니다.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+        self.imports: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def mark(self, phase: str) -> float:
+        elapsed = time.perf_counter() - self.started
+        with self._lock:
+            self.phases[phase] = elapsed
+        return elapsed
+
+    def preload(self, modules: Iterable[str]) -> float:
+        """ 무거운 모듈을 미리 불러와 첫 작업이 임포트를 기다리지 않게 합니다. """
+        for name in modules:
+            started = time.perf_counter()
+            try:
+                importlib.import_module(name)
+            except Exception as e:
+                print(f"⚠️ Preload failed: {name} ({e})")
+                continue
+            with self._lock:
+                self.imports[name] = time.perf_counter() - started
+        return self.mark('preloaded')
+
+    def summary(self) -> str:
+        with self._lock:
+            phases = ', '.join(f"{name} {seconds:.2f}s" for name, seconds in self.phases.items())
+            imports = ', '.join(f"{name} {seconds:.2f}s" for name, seconds in self.imports.items())
+        return f"{phases} | preloaded: {imports}" if imports else phases
+
+    def register_metrics(self):
+        metrics.register_gauge(
+            'ysc_startup_seconds', 'Seconds from app import to each startup phase.', ['phase'],
+            lambda: {(name,): round(seconds, 4) for name, seconds in dict(self.phases).items()}
+        )
+        metrics.register_gauge(
+            'ysc_startup_import_seconds', 'Import time of modules loaded after the server started.', ['module'],
+            lambda: {(name,): round(seconds, 4) for name, seconds in dict(self.imports).items()}
+        )
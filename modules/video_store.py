@@ -0,0 +1,333 @@
+# modules/video_store.py
+import hashlib
+import os
+import shutil
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+from modules.cancellation import JobCancelledError
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# 폴더를 사용 중인 프로세스가 잠그는 파일 (다운로드 중인 폴더, 영상을 읽는 중인 항목)
+LOCK_FILE = '.lock'
+# 삭제할 폴더는 먼저 이 접두어의 이름으로 바꾼 뒤 지움
+TRASH_PREFIX = 'trash-'
+# 다운로드 폴더를 만든 직후 잠그기 전에 지워지지 않도록, 이보다 최근에 만들어진 폴더는 그대로 둠 (초)
+PARTIAL_GRACE_SEC = 60
+
+
+def dir_size(path: str) -> int:
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                total += os.path.getsize(os.path.join(dirpath, name))
+            except OSError:
+                pass
+    return total
+
+
+def _open_lock(path: str, exclusive: bool = False, blocking: bool = True):
+    """
+    path 폴더의 잠금 파일을 열어 잠근 파일 객체를 반환합니다. 폴더가 없거나, 비차단 모드에서 이미 잠겨 있으면 None
+
+    잠금은 파일을 닫거나 프로세스가 종료되면 운영체제가 해제하므로, 비정상 종료된 프로세스의 잠금은 남지 않습니다.
+    fcntl이 없는 Windows에서는 파일을 열어 두기만 합니다. (열린 파일이 있는 폴더는 이름을 바꿀 수 없음, _retire 참고)
+    """
+    try:
+        f = open(os.path.join(path, LOCK_FILE), 'ab')
+    except OSError:
+        return None
+    if fcntl is not None:
+        try:
+            fcntl.flock(f.fileno(), (fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH) | (0 if blocking else fcntl.LOCK_NB))
+        except OSError:
+            f.close()
+            return None
+    return f
+
+
+class VideoNotCachedError(LookupError):
+    """ 다운로드 함수 없이 요청한 영상이 저장소에 없을 때 발생합니다. """
+
+
+class _InFlight:
+    """ 진행 중인 다운로드 하나를 여러 요청이 함께 기다리기 위한 객체 """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.error: Optional[BaseException] = None
+
+
+class VideoStore:
+    """
+    (영상 ID, 포맷) 단위로 다운로드한 영상을 세션 간에 공유하는 영구 저장소.
+
+    - 항목은 root/<키 해시>/video.* 에 저장되며, 폴더 mtime을 마지막 사용 시각으로 씁니다.
+    - 전체 크기가 quota_bytes를 넘으면 사용 중이 아닌 항목부터 LRU 순서로 삭제합니다.
+    - 같은 항목을 동시에 요청하면 다운로드는 한 번만 수행되고 나머지는 결과를 기다립니다.
+    - 같은 폴더를 쓰는 다른 프로세스(서버 워커, 일괄 변환)가 받아 둔 항목도 디스크에서 찾아 사용합니다.
+    - 사용 중 표시는 항목 폴더의 잠금 파일(공유 잠금)로 하므로, 어느 프로세스가 읽고 있는 항목이든
+      다른 프로세스가 삭제하지 않습니다. 잠금은 프로세스가 종료되면 운영체제가 해제합니다.
+    - 용량은 프로세스별 기록이 아니라 폴더 전체를 기준으로 계산하며, 정리는 root의 잠금 파일(배타 잠금)을
+      잡은 한 프로세스씩 수행합니다.
+    """
+
+    def __init__(self, root: str, quota_bytes: int):
+        self.root = root
+        self.quota_bytes = quota_bytes
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, float]] = {}  # key -> {'size', 'last_access'}
+        self._in_flight: Dict[str, _InFlight] = {}
+        os.makedirs(root, exist_ok=True)
+        self._load()
+
+    @staticmethod
+    def make_key(video_id: str, format_spec: str) -> str:
+        return hashlib.sha1(f"{video_id}|{format_spec}".encode('utf-8')).hexdigest()[:20]
+
+    def _load(self):
+        """
+        디스크의 기존 항목을 읽고, 중단된 다운로드 잔여물은 삭제합니다.
+
+        같은 폴더를 쓰는 다른 프로세스(서버 워커, 일괄 변환)가 받는 중인 폴더는 잠겨 있으므로 그대로 둡니다.
+        """
+        now = time.time()
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            try:
+                if not os.path.isdir(path):
+                    continue
+                if name.startswith(TRASH_PREFIX):
+                    shutil.rmtree(path, ignore_errors=True)  # 삭제 도중 중단된 폴더
+                elif '.partial' in name:
+                    if now - os.path.getmtime(path) > PARTIAL_GRACE_SEC:
+                        self._retire(path)
+                elif self._find_video(path) is None:
+                    self._retire(path)
+                else:
+                    self._entries[name] = {'size': dir_size(path), 'last_access': os.path.getmtime(path)}
+            except OSError:
+                continue  # 다른 프로세스가 그 사이 옮기거나 지운 폴더
+
+    def _retire(self, path: str) -> bool:
+        """
+        잠겨 있지 않은 폴더를 삭제합니다. 다른 곳에서 사용 중이면 삭제하지 않고 False
+
+        배타 잠금을 잡은 채 이름부터 바꾸므로, 삭제가 진행되는 동안 원래 경로에는 새 사용자가 생기지 않습니다.
+        """
+        lock = None
+        if fcntl is not None:
+            lock = _open_lock(path, exclusive=True, blocking=False)
+            if lock is None:
+                return not os.path.isdir(path)
+        trash = os.path.join(self.root, f"{TRASH_PREFIX}{uuid.uuid4().hex[:12]}")
+        try:
+            # Windows: 다른 곳에서 폴더 안의 파일(잠금 파일, 영상)을 열고 있으면 실패 -> 사용 중
+            os.rename(path, trash)
+        except OSError:
+            return not os.path.isdir(path)
+        finally:
+            if lock is not None:
+                lock.close()
+        shutil.rmtree(trash, ignore_errors=True)
+        return True
+
+    @staticmethod
+    def _find_video(entry_dir: str) -> Optional[str]:
+        for f in os.listdir(entry_dir):
+            if f.startswith('video'):
+                return os.path.join(entry_dir, f)
+        return None
+
+    def total_size(self) -> int:
+        self._scan()
+        with self._lock:
+            return sum(int(e['size']) for e in self._entries.values())
+
+    def _scan(self):
+        """
+        다른 프로세스가 추가하거나 삭제한 항목을 목록에 반영합니다.
+
+        완성된 항목은 바뀌지 않으므로 크기는 처음 볼 때만 계산하고, 마지막 사용 시각은 폴더 mtime을 씁니다.
+        """
+        names = set()
+        for name in os.listdir(self.root):
+            if name.startswith(TRASH_PREFIX) or '.partial' in name:
+                continue
+            if os.path.isdir(os.path.join(self.root, name)):
+                names.add(name)
+        with self._lock:
+            for key in set(self._entries) - names:
+                del self._entries[key]
+            for key in names - set(self._entries):
+                try:
+                    self._adopt(key, os.path.join(self.root, key), last_access=self._mtime(key))
+                except OSError:
+                    pass  # 그 사이 다른 프로세스가 삭제한 폴더
+
+    def _touch(self, key: str):
+        now = time.time()
+        self._entries[key]['last_access'] = now
+        try:
+            os.utime(os.path.join(self.root, key), (now, now))
+        except OSError:
+            pass
+
+    @contextmanager
+    def acquire(self, video_id: str, format_spec: str, download_fn: Optional[Callable[[str], Optional[str]]]):
+        """
+        저장된 영상 경로를 반환하는 컨텍스트 매니저. 없으면 download_fn(다운로드 폴더)로 받아옵니다.
+
+        download_fn이 None이면 받지 않고 VideoNotCachedError를 발생시킵니다. (다른 요청이 받는 중이면 기다림)
+
+        with 블록 안에서는 해당 항목이 (다른 프로세스에서도) 삭제되지 않도록 잠깁니다.
+        """
+        key = self.make_key(video_id, format_spec)
+        entry_dir = os.path.join(self.root, key)
+
+        while True:
+            with self._lock:
+                if key not in self._entries:
+                    self._adopt(key, entry_dir)
+                known = key in self._entries
+                if not known:
+                    waiting = self._in_flight.get(key)
+                    leader = waiting is None
+                    if leader:
+                        if download_fn is None:
+                            raise VideoNotCachedError(key)
+                        waiting = self._in_flight[key] = _InFlight()
+            if known:
+                lease = self._lease(entry_dir)
+                if lease is not None:
+                    with self._lock:
+                        if key in self._entries:
+                            self._touch(key)
+                    break
+                # 그 사이 다른 프로세스가 삭제한 항목: 목록에서 빼고 다시 확인 (필요하면 다시 받음)
+                with self._lock:
+                    self._entries.pop(key, None)
+                continue
+            if leader:
+                lease = self._download(key, entry_dir, download_fn, waiting)
+                break
+            # 다른 요청이 같은 영상을 받는 중이면 완료를 기다린 뒤 다시 확인
+            waiting.done.wait()
+            # 그 요청이 취소되어 중단된 경우에는 이 요청이 이어받아 다시 다운로드
+            if waiting.error is not None and not isinstance(waiting.error, JobCancelledError):
+                raise waiting.error
+
+        try:
+            yield self._find_video(entry_dir)
+        finally:
+            lease.close()
+            self.evict()
+
+    def _lease(self, entry_dir: str):
+        """
+        항목 폴더에 공유 잠금을 걸어 반환합니다. 폴더가 없거나 그 사이 삭제되었으면 None
+
+        삭제하는 쪽이 배타 잠금을 잡고 있으면 이름 변경이 끝날 때까지 기다린 뒤,
+        잠근 파일이 아직 원래 경로에 있는지(삭제 대상으로 옮겨지지 않았는지) 확인합니다.
+        """
+        lock = _open_lock(entry_dir)
+        if lock is None:
+            return None
+        try:
+            same = os.path.samestat(os.fstat(lock.fileno()), os.stat(os.path.join(entry_dir, LOCK_FILE)))
+        except OSError:
+            same = False
+        if not same or self._find_video(entry_dir) is None:
+            lock.close()
+            return None
+        return lock
+
+    def _adopt(self, key: str, entry_dir: str, last_access: Optional[float] = None):
+        """ 다른 프로세스가 완성해 둔 항목을 등록합니다. (self._lock 안에서 호출) """
+        if os.path.isdir(entry_dir) and self._find_video(entry_dir) is not None:
+            self._entries[key] = {'size': dir_size(entry_dir),
+                                  'last_access': time.time() if last_access is None else last_access}
+
+    def _download(self, key: str, entry_dir: str, download_fn, in_flight: _InFlight):
+        partial_dir = os.path.join(self.root, f"{key}.partial-{uuid.uuid4().hex[:8]}")
+        os.makedirs(partial_dir)
+        # 받는 동안 잠가 두어 다른 프로세스의 _load가 삭제하지 않도록 함 (이 프로세스가 종료되면 자동 해제)
+        lock = _open_lock(partial_dir)
+        try:
+            if lock is None:
+                raise IOError("Download folder was removed.")
+            if not download_fn(partial_dir):
+                raise IOError("Video download failed.")
+            lock.close()  # Windows에서는 열린 파일이 있는 폴더의 이름을 바꿀 수 없음
+            try:
+                os.replace(partial_dir, entry_dir)
+            except OSError:
+                # 다른 프로세스가 같은 항목을 먼저 완성한 경우 그쪽을 사용
+                if not os.path.isdir(entry_dir) or self._find_video(entry_dir) is None:
+                    raise
+                shutil.rmtree(partial_dir, ignore_errors=True)
+            lease = self._lease(entry_dir)
+            if lease is None:
+                raise IOError("Cached video is missing.")
+            with self._lock:
+                self._entries[key] = {'size': dir_size(entry_dir), 'last_access': time.time()}
+            return lease
+        except BaseException as e:
+            if lock is not None:
+                lock.close()
+            shutil.rmtree(partial_dir, ignore_errors=True)
+            in_flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            in_flight.done.set()
+
+    def evict(self):
+        """
+        용량 한도를 넘은 만큼 사용 중이 아닌 항목을 오래된 순서로 삭제합니다.
+
+        같은 폴더를 쓰는 모든 프로세스의 항목을 합한 크기로 판단하며, 여러 프로세스가 동시에 정리해
+        필요 이상으로 지우지 않도록 root의 잠금 파일을 배타적으로 잡은 채 수행합니다.
+        이 프로세스나 다른 프로세스가 잠그고 있는 항목은 건너뜁니다. (_retire 참고)
+        """
+        store_lock = _open_lock(self.root, exclusive=True)
+        try:
+            self._evict()
+        finally:
+            if store_lock is not None:
+                store_lock.close()
+
+    def _evict(self):
+        self._scan()
+        with self._lock:
+            total = sum(int(e['size']) for e in self._entries.values())
+            if total <= self.quota_bytes:
+                return
+            candidates = [(key, e['last_access'], int(e['size'])) for key, e in self._entries.items()]
+
+        # 다른 프로세스가 사용한 시각은 폴더 mtime에 남아 있음
+        candidates = [(key, max(last_access, self._mtime(key)), size) for key, last_access, size in candidates]
+        for key, _, size in sorted(candidates, key=lambda c: c[1]):
+            if total <= self.quota_bytes:
+                break
+            if not self._retire(os.path.join(self.root, key)):
+                continue
+            with self._lock:
+                self._entries.pop(key, None)
+            total -= size
+            print(f"🧹 Evicting cached video {key}")
+
+    def _mtime(self, key: str) -> float:
+        try:
+            return os.path.getmtime(os.path.join(self.root, key))
+        except OSError:
+            return 0.0
@@ -1,9 +1,43 @@
 # modules/youtube_downloader.py
+import functools
 import os
+import re
 import sys
 import subprocess
 import io
-import cv2
+import math
+import signal
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import parse_qs, urlparse
+
+from modules import metrics
+from modules.cache import TTLCache
+from modules.cancellation import JobCancelledError, check_cancelled, kill_on_cancel
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# yt-dlp 진행률 출력 줄을 구분하기 위한 접두어
+PROGRESS_PREFIX = "[ysc-progress] "
+# 서버 프로세스들이 yt-dlp 실행/업데이트를 조정하는 잠금 파일 이름 (상태 폴더에 만듦, YtDlpGate 참고)
+YTDLP_LOCK_FILE = 'yt-dlp.lock'
+
+# --- 캐시 설정 ---
+# 스트림 URL: googlevideo URL의 expire 값까지만 유지 (만료 5분 전 폐기)
+STREAM_URL_CACHE = TTLCache(maxsize=64, ttl=3600)
+STREAM_URL_EXPIRE_MARGIN_SEC = 300
+# 미리보기 JPEG: (영상 ID, 초) 단위로 보관
+PREVIEW_CACHE = TTLCache(maxsize=256, ttl=3600)
+
+# 필름스트립: 다음 시점까지 이 시간(초) 이내면 seek 대신 grab()으로 전진
+SPRITE_GRAB_LIMIT_SEC = 4.0
+SPRITE_MAX_FRAMES = 60
+
+_VIDEO_ID_PATTERN = re.compile(r'(?:youtu\.be/|v/|/u/\w/|embed/|shorts/|watch\?(?:.*&)?v=)([A-Za-z0-9_-]{11})')
 
 
 def get_bin_path(bin_name):
@@ -26,7 +60,160 @@ def get_startup_info():
     return None
 
 
+def kill_process_tree(proc):
+    """
+    프로세스와 그 자식(yt-dlp가 실행한 ffmpeg 등)을 함께 종료합니다.
+
+    POSIX에서는 start_new_session=True로 시작한 프로세스 그룹 전체에 신호를 보냅니다.
+    """
+    if proc.poll() is not None:
+        return
+    try:
+        if sys.platform == "win32":
+            subprocess.run(["taskkill", "/F", "/T", "/PID", str(proc.pid)],
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                           creationflags=subprocess.CREATE_NO_WINDOW)
+        else:
+            os.killpg(proc.pid, signal.SIGKILL)
+    except OSError:
+        proc.kill()
+
+
+class YtDlpGate:
+    """
+    yt-dlp 실행과 자체 업데이트(yt-dlp -U)가 겹치지 않도록 조정합니다.
+
+    실행 중인 바이너리를 교체하면 다운로드가 끊기거나 (Windows) 업데이트 자체가 실패하므로,
+    업데이트는 실행 중인 yt-dlp가 하나도 없을 때만 시작하고 업데이트 중의 새 실행은 끝날 때까지 기다립니다.
+
+    lock_path가 지정되면(configure) 그 파일의 flock으로 여러 서버 프로세스 사이에서도 조정합니다.
+    yt-dlp를 쓰는 쪽은 공유 잠금, 업데이트는 배타 잠금을 잡으며, 잠금은 프로세스가 종료되면 운영체제가 해제합니다.
+    """
+
+    def __init__(self, lock_path=None):
+        self.lock_path = lock_path
+        self._cond = threading.Condition()
+        self._active = 0
+        self._pipes = []  # 함수가 반환된 뒤에도 계속 실행되는 프로세스 (스트리밍 파이프)
+        self._updating = False
+
+    def configure(self, lock_path):
+        self.lock_path = lock_path
+
+    def _open_lock(self, exclusive=False, blocking=True):
+        """ 잠금 파일을 잠가 반환합니다. 프로세스 간 잠금을 쓰지 않으면 None, 비차단 모드에서 이미 잠겨 있으면 False """
+        if fcntl is None or self.lock_path is None:
+            return None
+        f = open(self.lock_path, 'ab')
+        try:
+            fcntl.flock(f.fileno(), (fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH) | (0 if blocking else fcntl.LOCK_NB))
+        except OSError:
+            f.close()
+            return False
+        return f
+
+    def _busy(self):
+        self._pipes = [proc for proc in self._pipes if proc.poll() is None]
+        return self._active > 0 or bool(self._pipes)
+
+    @contextmanager
+    def running(self):
+        """ with 블록 동안 yt-dlp를 실행 중인 것으로 표시합니다. 업데이트 중이면 (다른 프로세스의 것도) 끝날 때까지 기다립니다. """
+        with self._cond:
+            while self._updating:
+                self._cond.wait()
+            self._active += 1
+        lock = None
+        try:
+            lock = self._open_lock()
+            yield
+        finally:
+            if lock:
+                lock.close()
+            with self._cond:
+                self._active -= 1
+
+    def holding(self, fn):
+        """ fn이 실행되는 동안 업데이트를 막는 함수를 반환합니다. (작업 전체를 실행 중으로 표시할 때) """
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with self.running():
+                return fn(*args, **kwargs)
+        return wrapper
+
+    def track(self, proc):
+        """ 종료될 때까지 실행 중으로 볼 프로세스를 등록합니다. (running() 블록 안에서 호출) """
+        with self._cond:
+            self._pipes.append(proc)
+        lock = self._open_lock()
+        if lock:
+            # 다른 프로세스의 업데이트도 막도록 프로세스가 끝날 때까지 공유 잠금을 유지
+            threading.Thread(target=self._release_after, args=(proc, lock), daemon=True).start()
+        return proc
+
+    @staticmethod
+    def _release_after(proc, lock):
+        try:
+            proc.wait()
+        finally:
+            lock.close()
+
+    def try_exclusive(self, fn) -> bool:
+        """ 실행 중인 yt-dlp가 (어느 프로세스에도) 없으면 새 실행을 막은 채 fn()을 수행하고 True, 사용 중이면 바로 False """
+        with self._cond:
+            if self._updating or self._busy():
+                return False
+            lock = self._open_lock(exclusive=True, blocking=False)
+            if lock is False:
+                return False
+            self._updating = True
+        try:
+            fn()
+        finally:
+            if lock:
+                lock.close()
+            with self._cond:
+                self._updating = False
+                self._cond.notify_all()
+        return True
+
+
+YTDLP_GATE = YtDlpGate()
+
+
+def extract_video_id(url):
+    """ YouTube URL에서 11자리 영상 ID를 추출합니다. (실패 시 URL 자체를 반환) """
+    match = _VIDEO_ID_PATTERN.search(url or '')
+    return match.group(1) if match else url
+
+
+def _stream_url_ttl(stream_url):
+    """ googlevideo 스트림 URL의 expire 파라미터로부터 남은 유효 시간을 계산합니다. """
+    parsed = urlparse(stream_url)
+    expire = parse_qs(parsed.query).get('expire', [None])[0]
+    if expire is None:
+        # 매니페스트 형식: .../expire/1700000000/...
+        match = re.search(r'/expire/(\d+)', parsed.path)
+        expire = match.group(1) if match else None
+    if expire is None:
+        return None
+    return int(expire) - time.time() - STREAM_URL_EXPIRE_MARGIN_SEC
+
+
 def get_video_stream_url(url):
+    """ 캐시를 우선 조회하고, 없으면 yt-dlp로 스트림 URL을 가져와 캐시에 저장합니다. """
+    video_id = extract_video_id(url)
+    stream_url = STREAM_URL_CACHE.get(video_id)
+    if stream_url:
+        return stream_url
+
+    stream_url = _resolve_video_stream_url(url)
+    if stream_url:
+        STREAM_URL_CACHE.set(video_id, stream_url, ttl=_stream_url_ttl(stream_url))
+    return stream_url
+
+
+def _resolve_video_stream_url(url):
     """ yt-dlp를 사용하여 영상 스트림 URL을 가져옵니다. (사용자 IP 사용) """
     ytdlp_path = get_bin_path('yt-dlp')
     startup_info = get_startup_info()
@@ -34,34 +221,296 @@ def get_video_stream_url(url):
     try:
         cmd = [ytdlp_path, "-g", "-f", "bestvideo", url]
         # startupinfo 옵션 추가
+        with YTDLP_GATE.running(), metrics.timed('resolve_stream'), metrics.timed_subprocess('yt-dlp'):
+            result = subprocess.check_output(
+                cmd,
+                stderr=subprocess.STDOUT,
+                text=True,
+                startupinfo=startup_info,
+                creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0
+            )
+        # 경고 메시지가 섞일 수 있으므로 마지막 URL 줄만 사용
+        lines = [line for line in result.strip().splitlines() if line.startswith('http')]
+        return lines[-1] if lines else None
+    except Exception as e:
+        print(f"Error fetching stream URL: {e}")
+        return None
+
+
+def get_video_stream_info(url, format_spec="bestvideo"):
+    """ 다운로드 없이 선택된 포맷의 해상도, fps, 길이와 스트림 URL(ffmpeg가 직접 읽을 수 있으면)을 조회합니다. """
+    ytdlp_path = get_bin_path('yt-dlp')
+    startup_info = get_startup_info()
+
+    cmd = [ytdlp_path, "-f", format_spec, "--print", "%(width)s %(height)s %(fps)s %(duration)s",
+           "--print", "%(url)s", url]
+    with YTDLP_GATE.running(), metrics.timed('stream_info'), metrics.timed_subprocess('yt-dlp'):
         result = subprocess.check_output(
             cmd,
-            stderr=subprocess.STDOUT,
             text=True,
             startupinfo=startup_info,
             creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0
         )
-        return result.strip()
-    except Exception as e:
-        print(f"Error fetching stream URL: {e}")
-        return None
+    lines = result.strip().splitlines()
+    width, height, fps, duration = lines[-2].split()
+    return {
+        'width': int(width),
+        'height': int(height),
+        'fps': float(fps) if fps != "NA" else 30.0,
+        'duration': float(duration) if duration != "NA" else None,
+        'url': lines[-1] if lines[-1].startswith('http') else None,
+    }
+
+
+def list_playlist_videos(url):
+    """
+    재생목록/채널 URL에 포함된 영상 목록 [{'id', 'title', 'url'}, ...]을 다운로드 없이 조회합니다.
+
+    단일 영상 URL이면 yt-dlp를 실행하지 않고 그 영상 하나만 반환합니다.
+    """
+    video_id = extract_video_id(url)
+    if video_id != url and 'list=' not in url:
+        return [{'id': video_id, 'title': None, 'url': url}]
+
+    ytdlp_path = get_bin_path('yt-dlp')
+    cmd = [ytdlp_path, "--flat-playlist", "--print", "%(id)s\t%(title)s", url]
+    with YTDLP_GATE.running(), metrics.timed('playlist'), metrics.timed_subprocess('yt-dlp'):
+        result = subprocess.check_output(
+            cmd,
+            text=True,
+            startupinfo=get_startup_info(),
+            creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0
+        )
+    videos = []
+    for line in result.splitlines():
+        entry_id, _, title = line.partition('\t')
+        if re.fullmatch(r'[A-Za-z0-9_-]{11}', entry_id):
+            videos.append({'id': entry_id, 'title': title or None,
+                           'url': f"https://www.youtube.com/watch?v={entry_id}"})
+    return videos
+
+
+def open_video_pipe(url, format_spec="bestvideo"):
+    """ yt-dlp가 영상 데이터를 stdout으로 내보내는 프로세스를 시작합니다. """
+    ytdlp_path = get_bin_path('yt-dlp')
+    ffmpeg_path = get_bin_path('ffmpeg')
+    startup_info = get_startup_info()
+
+    cmd = [
+        ytdlp_path,
+        "-q",
+        "-f", format_spec,
+        "--ffmpeg-location", os.path.dirname(ffmpeg_path),
+        "-o", "-",
+        url
+    ]
+    with YTDLP_GATE.running():
+        return YTDLP_GATE.track(subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            startupinfo=startup_info,
+            creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0,
+            start_new_session=sys.platform != "win32"
+        ))
 
 
 def get_single_frame_as_bytes(stream_url, seconds):
     """ OpenCV를 사용하여 특정 시점의 프레임을 캡처합니다. """
+    import cv2  # 서버 시작을 늦추지 않도록 처음 사용할 때 불러옴 (app.py의 지연 임포트 참고)
+    with metrics.timed('preview_frame'):
+        cap = cv2.VideoCapture(stream_url)
+        cap.set(cv2.CAP_PROP_POS_MSEC, seconds * 1000)
+        success, frame = cap.read()
+        if success:
+            _, buffer = cv2.imencode('.jpg', frame)
+            cap.release()
+            return io.BytesIO(buffer)
+        cap.release()
+        return None
+
+
+def get_frames_as_sprite(stream_url, timestamps, tile_width=320, columns=5):
+    """
+    스트림을 한 번만 열어 여러 시점의 프레임을 타일 형태의 JPEG 한 장(스프라이트)으로 만듭니다.
+
+    시점은 정렬된 순서로 방문하며, 가까운 다음 시점은 seek 대신 grab()으로 전진합니다.
+    반환값은 (JPEG 바이트, 레이아웃 dict)이며 캡처하지 못한 시점은 검은 타일로 채워집니다.
+    """
+    import cv2
+    import numpy as np
+    from modules.image_processor import seek_frame
+
+    targets = sorted(set(timestamps))[:SPRITE_MAX_FRAMES]
+    if not targets:
+        return None, None
+
+    started = time.perf_counter()
     cap = cv2.VideoCapture(stream_url)
-    cap.set(cv2.CAP_PROP_POS_MSEC, seconds * 1000)
-    success, frame = cap.read()
-    if success:
-        _, buffer = cv2.imencode('.jpg', frame)
+    if not cap.isOpened():
+        return None, None
+
+    frames = []
+    try:
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30
+        current_frame = None  # 다음 read()가 반환할 프레임 번호 (실제 위치를 읽어 둠)
+        for seconds in targets:
+            target_frame = int(seconds * fps)
+            gap = None if current_frame is None else target_frame - current_frame
+            if gap is not None and 0 <= gap <= SPRITE_GRAB_LIMIT_SEC * fps:
+                positioned = all(cap.grab() for _ in range(gap))
+            else:
+                positioned = seek_frame(cap, target_frame)
+            success, frame = cap.read() if positioned else (False, None)
+            frames.append(frame if success else None)
+            current_frame = int(cap.get(cv2.CAP_PROP_POS_FRAMES)) if success else None
+    finally:
         cap.release()
-        return io.BytesIO(buffer)
-    cap.release()
+        metrics.observe_stage('sprite_capture', time.perf_counter() - started)
+        metrics.count_frames('decoded', len(frames))
+
+    sample = next((f for f in frames if f is not None), None)
+    if sample is None:
+        return None, None
+
+    tile_height = max(int(round(sample.shape[0] * tile_width / sample.shape[1])), 1)
+    columns = max(1, min(columns, len(frames)))
+    rows = (len(frames) + columns - 1) // columns
+    sprite = np.zeros((rows * tile_height, columns * tile_width, 3), dtype=np.uint8)
+    for i, frame in enumerate(frames):
+        if frame is None:
+            continue
+        row, col = divmod(i, columns)
+        tile = cv2.resize(frame, (tile_width, tile_height), interpolation=cv2.INTER_AREA)
+        sprite[row * tile_height:(row + 1) * tile_height, col * tile_width:(col + 1) * tile_width] = tile
+
+    success, buffer = cv2.imencode('.jpg', sprite, [cv2.IMWRITE_JPEG_QUALITY, 80])
+    if not success:
+        return None, None
+    layout = {
+        'columns': columns,
+        'tile_width': tile_width,
+        'tile_height': tile_height,
+        'timestamps': targets,
+        'missing': [t for t, f in zip(targets, frames) if f is None],
+    }
+    return buffer.tobytes(), layout
+
+
+def get_preview_frame(url, seconds):
+    """
+    미리보기용 JPEG 바이트를 반환합니다.
+
+    (영상 ID, 초) 단위로 캐시하며, 캐시된 스트림 URL로 캡처에 실패하면
+    URL이 만료된 것으로 보고 한 번 다시 조회합니다.
+    """
+    video_id = extract_video_id(url)
+    cache_key = (video_id, seconds)
+    jpeg = PREVIEW_CACHE.get(cache_key)
+    if jpeg is not None:
+        return jpeg
+
+    for attempt in range(2):
+        stream_url = get_video_stream_url(url)
+        if not stream_url:
+            return None
+        frame_io = get_single_frame_as_bytes(stream_url, seconds)
+        if frame_io is not None:
+            jpeg = frame_io.getvalue()
+            PREVIEW_CACHE.set(cache_key, jpeg)
+            return jpeg
+        STREAM_URL_CACHE.pop(video_id)
     return None
 
 
-def download_youtube_video(url, download_dir):
-    """ 영상을 로컬 임시 폴더로 다운로드합니다. """
+def select_video_format(y_start, y_end, min_roi_height):
+    """
+    크롭된 악보 영역의 세로 픽셀이 min_roi_height 이상이 되는 가장 작은 스트림을 고르는 포맷 문자열.
+
+    변화 감지는 threshold 200으로 이진화하므로 4K 해상도가 필요하지 않습니다.
+    다만 저장되는 페이지도 같은 스트림에서 잘라내므로 결과 악보의 해상도도 함께 낮아집니다.
+    min_roi_height가 0이거나 조건을 만족하는 스트림이 없으면 가장 좋은 스트림(bestvideo)을 사용합니다.
+    """
+    if not min_roi_height:
+        return "bestvideo"
+    roi_fraction = max((y_end - y_start) / 100.0, 0.01)
+    required_height = math.ceil(min_roi_height / roi_fraction)
+    return f"worstvideo[height>={required_height}]/bestvideo"
+
+
+def plan_download_section(start_time, end_time, margin_sec):
+    """
+    [start_time, end_time] 구간에 키프레임 여유(margin_sec)를 더한 다운로드 구간 (clip_start, clip_end)을 반환합니다.
+
+    시간이 지정되지 않았으면 None (전체 다운로드)을 반환하며, clip_end가 None이면 영상 끝까지입니다.
+    """
+    if not start_time and not end_time:
+        return None
+    clip_start = max(0, (start_time or 0) - margin_sec)
+    clip_end = end_time + margin_sec if end_time else None
+    return clip_start, clip_end
+
+
+def section_offset(video_path, section):
+    """
+    구간만 받은 영상(download_youtube_video의 section)의 0초가 원본 영상의 몇 초인지 반환합니다.
+
+    yt-dlp는 구간을 스트림 복사로 자르므로 시작이 clip_start 앞의 키프레임(최대 GOP 하나)으로 당겨지고,
+    편집 목록이 없는 컨테이너(webm)에서는 그 키프레임이 0초가 됩니다. 끝은 clip_end에서 잘리므로
+    실제 시작 = clip_end - 디코딩되는 영상 길이로 계산합니다. (clip_start보다 늦을 수는 없음)
+    clip_end가 없거나(영상 끝까지) 길이를 읽을 수 없으면 clip_start를 반환합니다.
+    """
+    clip_start, clip_end = section
+    if clip_end is None:
+        return clip_start
+    duration = _decoded_duration(video_path)
+    if not duration:
+        return clip_start
+    return min(clip_start, max(0.0, clip_end - duration))
+
+
+def _decoded_duration(video_path):
+    """
+    디코더가 내보내는 마지막 프레임까지의 길이(초). 읽을 수 없으면 None
+
+    편집 목록(mp4)으로 앞부분이 가려진 영상은 CAP_PROP_FRAME_COUNT가 실제보다 크므로,
+    끝에서부터 1초씩 앞으로 옮기며 읽히는 위치를 찾은 뒤 끝까지 읽어 마지막 프레임 시각을 구합니다.
+    """
+    import cv2
+    cap = cv2.VideoCapture(video_path)
+    try:
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        if not fps or frames <= 0:
+            return None
+        step = max(int(fps), 1)
+        for pos in range(frames - 1, max(frames - 1 - 30 * step, -1), -step):
+            cap.set(cv2.CAP_PROP_POS_FRAMES, pos)
+            if cap.grab():
+                break
+        else:
+            return None
+        last_msec = cap.get(cv2.CAP_PROP_POS_MSEC)
+        while cap.grab():
+            last_msec = cap.get(cv2.CAP_PROP_POS_MSEC)
+        return last_msec / 1000 + 1 / fps
+    finally:
+        cap.release()
+
+
+def download_youtube_video(url, download_dir, progress_callback=None, format_spec="bestvideo", section=None,
+                           cancel_token=None):
+    """
+    영상을 로컬 임시 폴더로 다운로드합니다.
+
+    progress_callback(downloaded_bytes, total_bytes)가 주어지면
+    yt-dlp의 진행률 출력을 파싱하여 주기적으로 호출합니다. (total은 모를 경우 None)
+
+    section=(clip_start, clip_end)가 주어지면 해당 구간만 받습니다. 결과 영상의 0초는 clip_start 앞의
+    키프레임일 수 있으므로 원본 시각으로 바꿀 때는 section_offset을 사용합니다.
+
+    cancel_token이 취소되면 yt-dlp와 그 자식 프로세스를 즉시 종료하고 JobCancelledError를 발생시킵니다.
+    """
     ytdlp_path = get_bin_path('yt-dlp')
     ffmpeg_path = get_bin_path('ffmpeg')
     output_template = os.path.join(download_dir, 'video.%(ext)s')
@@ -71,24 +520,88 @@ def download_youtube_video(url, download_dir):
         # ffmpeg-location을 지정하여 빌드 내부의 ffmpeg를 사용하게 함
         cmd = [
             ytdlp_path,
-            "-f", "bestvideo",
+            "-f", format_spec,
             "--ffmpeg-location", os.path.dirname(ffmpeg_path),
             "-o", output_template,
             url
         ]
+        if section is not None:
+            clip_start, clip_end = section
+            clip_end = "inf" if clip_end is None else f"{clip_end:g}"
+            cmd[1:1] = ["--download-sections", f"*{clip_start:g}-{clip_end}"]
 
-        # startupinfo 옵션 추가
-        subprocess.check_call(
-            cmd,
-            startupinfo=startup_info,
-            creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0
-        )
+        check_cancelled(cancel_token)
+        with YTDLP_GATE.running(), metrics.timed('download'), metrics.timed_subprocess('yt-dlp'):
+            if progress_callback is None:
+                # startupinfo 옵션 추가
+                proc = subprocess.Popen(
+                    cmd,
+                    startupinfo=startup_info,
+                    creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0,
+                    start_new_session=sys.platform != "win32"
+                )
+                with kill_on_cancel(cancel_token, proc, kill=kill_process_tree):
+                    returncode = proc.wait()
+                check_cancelled(cancel_token)
+                if returncode != 0:
+                    raise subprocess.CalledProcessError(returncode, cmd)
+            else:
+                _run_with_progress(cmd, progress_callback, startup_info, cancel_token)
 
         # 실제 생성된 파일명 찾기
         for f in os.listdir(download_dir):
             if f.startswith('video'):
-                return os.path.join(download_dir, f)
+                video_path = os.path.join(download_dir, f)
+                metrics.DOWNLOADED_BYTES.inc(os.path.getsize(video_path))
+                return video_path
         return None
+    except JobCancelledError:
+        raise
     except Exception as e:
         print(f"Download Error: {e}")
-        return None
\ No newline at end of file
+        return None
+
+
+def _run_with_progress(cmd, progress_callback, startup_info, cancel_token=None):
+    """ yt-dlp를 진행률 템플릿과 함께 실행하고 한 줄씩 읽어 콜백으로 전달합니다. """
+    cmd = cmd[:1] + [
+        "--newline",
+        "--progress-template",
+        "download:" + PROGRESS_PREFIX + "%(progress.downloaded_bytes)s %(progress.total_bytes,progress.total_bytes_estimate)s",
+    ] + cmd[1:]
+
+    proc = subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        startupinfo=startup_info,
+        creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0,
+        start_new_session=sys.platform != "win32"
+    )
+    # 취소되면 프로세스가 종료되어 stdout이 닫히므로 아래 읽기 루프도 바로 끝남
+    with kill_on_cancel(cancel_token, proc, kill=kill_process_tree):
+        try:
+            for line in proc.stdout:
+                if not line.startswith(PROGRESS_PREFIX):
+                    continue
+                fields = line[len(PROGRESS_PREFIX):].split()
+                try:
+                    downloaded = int(float(fields[0]))
+                except (ValueError, IndexError):
+                    continue
+                try:
+                    total = int(float(fields[1]))
+                except (ValueError, IndexError):
+                    total = None
+                progress_callback(downloaded, total)
+        except BaseException:
+            kill_process_tree(proc)
+            raise
+        finally:
+            proc.wait()
+            proc.stdout.close()
+
+    check_cancelled(cancel_token)
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, cmd)
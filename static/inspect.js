@@ -31,6 +31,8 @@ document.addEventListener('DOMContentLoaded', () => {
     if (imageGrid) {
         imageGrid.addEventListener('click', (e) => {
             // 클릭된 요소가 .img-item 자신이거나 그 내부 요소일 경우 탐색
+            // 원본 보기 링크는 선택을 바꾸지 않고 새 탭에서 열림
+            if (e.target.closest('.full-link')) return;
             const item = e.target.closest('.img-item');
             if (item) {
                 e.preventDefault(); // 이미지 드래그 등 기본 동작 방지
@@ -42,7 +44,68 @@ document.addEventListener('DOMContentLoaded', () => {
         console.error("Image grid element not found!");
     }
 
-    // 3. 최종 PDF 생성 로직
+    // 3. 감도(threshold) 재선택: 저장된 특징으로 페이지 목록만 다시 계산
+    const reselectBtn = document.getElementById('reselectBtn');
+    const reselectThreshold = document.getElementById('reselectThreshold');
+    const imageBase = `/temp_images/${sessionId}/`;
+    const thumbBase = `/temp_thumbs/${sessionId}/`;
+
+    function renderImages(images, duplicates = {}) {
+        imageGrid.innerHTML = '';
+        images.forEach(filename => {
+            const item = document.createElement('div');
+            // 이전 페이지와 거의 같은 페이지는 기본으로 제외
+            const duplicateOf = duplicates[filename];
+            item.className = duplicateOf ? 'img-item' : 'img-item selected';
+            item.dataset.filename = filename;
+            const img = document.createElement('img');
+            img.src = thumbBase + encodeURIComponent(filename);
+            img.alt = 'Score Frame';
+            img.loading = 'lazy';
+            const overlay = document.createElement('div');
+            overlay.className = 'img-overlay';
+            overlay.textContent = '✓';
+            const fullLink = document.createElement('a');
+            fullLink.className = 'full-link';
+            fullLink.href = imageBase + encodeURIComponent(filename);
+            fullLink.target = '_blank';
+            fullLink.textContent = '원본 보기';
+            item.append(img, overlay, fullLink);
+            if (duplicateOf) {
+                const badge = document.createElement('div');
+                badge.className = 'duplicate-badge';
+                badge.textContent = `중복: ${duplicateOf}`;
+                item.appendChild(badge);
+            }
+            imageGrid.appendChild(item);
+        });
+    }
+
+    if (reselectBtn && reselectThreshold && imageGrid) {
+        reselectBtn.addEventListener('click', async () => {
+            const threshold = parseFloat(reselectThreshold.value);
+            if (isNaN(threshold)) return alert("감도 값을 입력해주세요.");
+
+            reselectBtn.disabled = true;
+            try {
+                const response = await fetch('/reselect', {
+                    method: 'POST',
+                    headers: { 'Content-Type': 'application/json' },
+                    body: JSON.stringify({ session_id: sessionId, threshold: threshold })
+                });
+                const data = await response.json();
+                if (!response.ok) throw new Error(data.error || "재선택 실패");
+                renderImages(data.images, data.duplicates);
+            } catch (err) {
+                console.error(err);
+                alert("오류: " + err.message);
+            } finally {
+                reselectBtn.disabled = false;
+            }
+        });
+    }
+
+    // 4. 최종 PDF 생성 로직
     async function generatePdf() {
         if (!sessionId) return alert("세션 정보가 없습니다.");
 
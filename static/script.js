@@ -9,6 +9,7 @@ document.addEventListener('DOMContentLoaded', function() {
         resetBtn: document.getElementById('resetBtn'), // [추가] 리셋 버튼
         url: document.getElementById('url'),
         videoPreview: document.getElementById('videoPreview'),
+        filmstrip: document.getElementById('filmstrip'),
         selectionArea: document.getElementById('selectionArea'),
         startTime: document.getElementById('start_time'),
         endTime: document.getElementById('end_time'),
@@ -45,6 +46,12 @@ document.addEventListener('DOMContentLoaded', function() {
     };
 
     const utils = {
+        // 'HH:MM:SS', 'MM:SS' 또는 초 -> 초 (서버의 time_to_seconds와 같은 규칙, 잘못된 값은 null)
+        toSeconds: (value) => {
+            const parts = String(value).trim().split(':').map(Number);
+            if (!value || parts.length > 3 || parts.some(n => !Number.isInteger(n) || n < 0)) return null;
+            return parts.reduce((total, n) => total * 60 + n, 0);
+        },
         extractVideoId: (url) => {
             const regExp = /^.*((youtu.be\/)|(v\/)|(\/u\/\w\/)|(embed\/)|(watch\?))\??v?=?([^#&?]*).*/;
             const match = url.match(regExp);
@@ -90,6 +97,8 @@ document.addEventListener('DOMContentLoaded', function() {
                 setTimeout(() => {
                     utils.updatePreview(); // 선택 영역 박스 초기화
                     elements.videoPreview.style.backgroundImage = 'none'; // 썸네일 제거
+                    elements.filmstrip.replaceChildren();
+                    elements.filmstrip.style.display = 'none';
 
                     // 3. URL 파라미터 제거
                     window.history.replaceState({}, '', window.location.pathname);
@@ -154,21 +163,81 @@ document.addEventListener('DOMContentLoaded', function() {
     window.addEventListener('mouseup', () => state.isDragging = false);
 
     // 프레임 미리보기 로드
+    // 시작 시점(미리보기)과 시작~종료 구간의 필름스트립을 /get_frames 한 번의 요청으로 받음
+    const FILMSTRIP_TILES = 8;
+    let previewObjectURL = null;
+
+    function filmstripTimes() {
+        const start = utils.toSeconds(elements.startTime.value);
+        const end = utils.toSeconds(elements.endTime.value);
+        if (start === null) return [];
+        if (end === null || end <= start) return [start];
+        const times = [];
+        for (let i = 0; i < FILMSTRIP_TILES; i++) {
+            times.push(Math.round(start + (end - start) * i / (FILMSTRIP_TILES - 1)));
+        }
+        return [...new Set(times)];
+    }
+
+    // 스프라이트의 한 타일을 캔버스로 잘라냄
+    function tileCanvas(bitmap, index, layout) {
+        const canvas = document.createElement('canvas');
+        canvas.width = layout.tileWidth;
+        canvas.height = layout.tileHeight;
+        const col = index % layout.columns, row = Math.floor(index / layout.columns);
+        canvas.getContext('2d').drawImage(bitmap, col * layout.tileWidth, row * layout.tileHeight,
+            layout.tileWidth, layout.tileHeight, 0, 0, layout.tileWidth, layout.tileHeight);
+        return canvas;
+    }
+
+    function showInPreview(canvas) {
+        canvas.toBlob(blob => {
+            if (previewObjectURL) URL.revokeObjectURL(previewObjectURL);
+            previewObjectURL = URL.createObjectURL(blob);
+            elements.videoPreview.style.backgroundImage = `url('${previewObjectURL}')`;
+        }, 'image/jpeg', 0.9);
+    }
+
     async function fetchFrame() {
         const videoId = utils.extractVideoId(elements.url.value);
-        if (!videoId || !elements.startTime.value) return;
+        const times = filmstripTimes();
+        if (!videoId || !times.length) return;
 
         elements.videoPreview.style.opacity = '0.5';
         const formData = new FormData();
         formData.append('url', elements.url.value);
-        formData.append('start_time', elements.startTime.value);
+        formData.append('timestamps', times.join(','));
+        formData.append('tile_width', '640');
+        formData.append('columns', String(times.length));
 
         try {
-            const resp = await fetch('/get_frame', { method: 'POST', body: formData });
-            if (resp.ok) {
-                const blob = await resp.blob();
-                elements.videoPreview.style.backgroundImage = `url('${URL.createObjectURL(blob)}')`;
-            }
+            const resp = await fetch('/get_frames', { method: 'POST', body: formData });
+            if (!resp.ok) return;
+            const layout = {
+                columns: parseInt(resp.headers.get('X-Sprite-Columns')),
+                tileWidth: parseInt(resp.headers.get('X-Sprite-Tile-Width')),
+                tileHeight: parseInt(resp.headers.get('X-Sprite-Tile-Height'))
+            };
+            const stamps = (resp.headers.get('X-Sprite-Timestamps') || '').split(',').map(Number);
+            const missing = new Set((resp.headers.get('X-Sprite-Missing') || '').split(',').filter(Boolean).map(Number));
+            const bitmap = await createImageBitmap(await resp.blob());
+            const tiles = stamps.map((seconds, i) => ({ seconds, canvas: tileCanvas(bitmap, i, layout) }));
+            bitmap.close();
+
+            // 첫 타일(시작 시간)을 미리보기로 사용
+            if (!missing.has(stamps[0])) showInPreview(tiles[0].canvas);
+
+            elements.filmstrip.replaceChildren(...tiles.map(({ seconds, canvas }) => {
+                const tile = document.createElement('div');
+                tile.className = 'filmstrip-tile';
+                tile.title = '클릭하면 위 미리보기에 표시합니다.';
+                const label = document.createElement('span');
+                label.textContent = `${Math.floor(seconds / 60)}:${String(seconds % 60).padStart(2, '0')}`;
+                tile.append(canvas, label);
+                tile.addEventListener('click', () => showInPreview(canvas));
+                return tile;
+            }));
+            elements.filmstrip.style.display = tiles.length > 1 ? 'flex' : 'none';
         } finally {
             elements.videoPreview.style.opacity = '1';
         }
@@ -177,6 +246,48 @@ document.addEventListener('DOMContentLoaded', function() {
     [elements.startTime, elements.endTime].forEach(el => el.addEventListener('change', fetchFrame));
     elements.url.addEventListener('blur', fetchFrame);
 
+    // 작업 진행률 표시 문자열 생성
+    function describeProgress(job) {
+        const p = job.progress || {};
+        const mb = (bytes) => (bytes / (1024 * 1024)).toFixed(1);
+        if (job.status === 'queued') return '대기열에서 순서를 기다리는 중입니다...';
+        if (job.stage === 'download' && p.download) {
+            const d = p.download;
+            return d.total_bytes
+                ? `영상 다운로드 중... ${mb(d.downloaded_bytes)} / ${mb(d.total_bytes)} MB`
+                : `영상 다운로드 중... ${mb(d.downloaded_bytes || 0)} MB`;
+        }
+        if (job.stage === 'analyze' && p.analyze) {
+            const a = p.analyze;
+            const pct = a.frames_total ? Math.round((a.frames_analysed / a.frames_total) * 100) : 0;
+            return `프레임 분석 중... ${pct}% (저장된 페이지 ${a.pages_saved || 0}장)`;
+        }
+        if (job.stage === 'pdf' && p.pdf) {
+            return `PDF 생성 중... ${p.pdf.pages_done} / ${p.pdf.pages_total} 페이지`;
+        }
+        return '분석 중입니다. 잠시만 기다려주세요.';
+    }
+
+    // 진행 중인 작업 (탭을 닫거나 새로고침하면 서버에 취소 요청)
+    let activeJobId = null;
+    window.addEventListener('pagehide', () => {
+        if (activeJobId) navigator.sendBeacon(`/jobs/${activeJobId}/cancel`);
+    });
+
+    // 작업이 끝날 때까지 상태를 주기적으로 조회
+    async function pollJob(jobId) {
+        while (true) {
+            const resp = await fetch(`/jobs/${jobId}`);
+            if (!resp.ok) throw new Error((await resp.json()).error || '작업 조회 실패');
+            const job = await resp.json();
+            if (job.status === 'done') return job;
+            if (job.status === 'error') throw new Error(job.error || '분석 실패');
+            if (job.status === 'cancelled') throw new Error(job.error || '작업이 취소되었습니다.');
+            utils.showStatus(describeProgress(job), 'processing');
+            await new Promise(resolve => setTimeout(resolve, 1000));
+        }
+    }
+
     // 실행 및 다운로드
     elements.configForm.addEventListener('submit', async function(e) {
         e.preventDefault();
@@ -199,7 +310,16 @@ document.addEventListener('DOMContentLoaded', function() {
             const isInspect = elements.inspectionMode?.checked;
             formData.set('inspection_mode', !!isInspect);
 
-            const response = await fetch('/execute', { method: 'POST', body: formData });
+            const submitResp = await fetch('/execute', { method: 'POST', body: formData });
+            if (!submitResp.ok) throw new Error((await submitResp.json()).error || '작업 등록 실패');
+            const { job_id: jobId } = await submitResp.json();
+            activeJobId = jobId;
+
+            // 작업 완료까지 진행률 폴링
+            await pollJob(jobId);
+            activeJobId = null;
+
+            const response = await fetch(`/jobs/${jobId}/result`);
             if (!response.ok) throw new Error((await response.json()).error || '분석 실패');
 
             const contentType = response.headers.get("content-type");
@@ -227,6 +347,7 @@ document.addEventListener('DOMContentLoaded', function() {
         } catch (err) {
             utils.showStatus(`실패: ${err.message}`, 'error');
         } finally {
+            activeJobId = null;
             elements.runBtn.disabled = false;
             elements.runBtn.innerHTML = '▶️ 실행';
         }